@@ -0,0 +1,98 @@
+# File: benchmarks/bench_admin_geocoder.py
+#
+# Times offline reverse geocoding (processing/admin_geocoder.py) of a batch of
+# listing coordinates against the Bandung ADM4 polygons, and checks it agrees
+# with a geopandas sjoin. Uses the real shapefile if given, otherwise ~150
+# synthetic kelurahan (Voronoi cells over Bandung's bounding box).
+#
+# Usage (from the project root):
+#   python benchmarks/bench_admin_geocoder.py [--points 10000]
+#          [--shapefile data/raw/idn_admbnda_adm4_ID3_bps_20200401.shp]
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from processing.admin_geocoder import AdminReverseGeocoder, load_admin_polygons  # noqa: E402
+
+BANDUNG_BBOX = (107.55, -6.98, 107.74, -6.83)  # lon_min, lat_min, lon_max, lat_max
+
+
+def synthetic_polygons(n=151, seed=0):
+    import geopandas as gpd
+    import shapely
+
+    rng = np.random.default_rng(seed)
+    lon_min, lat_min, lon_max, lat_max = BANDUNG_BBOX
+    seeds = shapely.multipoints(np.c_[rng.uniform(lon_min, lon_max, n), rng.uniform(lat_min, lat_max, n)])
+    box = shapely.box(*BANDUNG_BBOX)
+    cells = [shapely.intersection(cell, box) for cell in shapely.get_parts(shapely.voronoi_polygons(seeds, extend_to=box))]
+    return gpd.GeoDataFrame({
+        "ADM1_EN": "Jawa Barat",
+        "ADM2_EN": "Kota Bandung",
+        "ADM3_EN": [f"Kecamatan {i // 5}" for i in range(len(cells))],
+        "ADM4_EN": [f"Kelurahan {i}" for i in range(len(cells))],
+        "ADM4_PCODE": [f"ID3273{i:06d}" for i in range(len(cells))],
+    }, geometry=cells, crs="EPSG:4326")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ADM4 reverse geocoding benchmark.")
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument("--shapefile", help="the BPS ADM4 shapefile (default: synthetic polygons)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.shapefile:
+        started = time.perf_counter()
+        polygons = load_admin_polygons(args.shapefile)
+        print(f"Loaded and clipped {args.shapefile} in {time.perf_counter() - started:.2f} s")
+    else:
+        polygons = synthetic_polygons()
+    print(f"{len(polygons)} ADM4 polygons, {args.points} points (1% outside the area, 1% missing)\n")
+
+    rng = np.random.default_rng(1)
+    lon_min, lat_min, lon_max, lat_max = polygons.total_bounds
+    lats = rng.uniform(lat_min, lat_max, args.points)
+    lons = rng.uniform(lon_min, lon_max, args.points)
+    lats[: args.points // 100] += 1.0
+    lats[-(args.points // 100):] = np.nan
+
+    started = time.perf_counter()
+    geocoder = AdminReverseGeocoder(polygons)
+    # Half the kelurahan get a zipcode, as if learned from earlier Google results
+    geocoder.zipcodes = {pcode: f"40{i:03d}" for i, pcode in enumerate(polygons["ADM4_PCODE"]) if i % 2 == 0}
+    print(f"  build STRtree          {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+    best = min(_timed(lambda: geocoder.resolve(lats, lons)) for _ in range(args.repeat))
+    result = geocoder.resolve(lats, lons)
+    print(f"  resolve {args.points} points   {best * 1000:8.1f} ms   ({args.points / best:,.0f} points/s)")
+    print(f"  inside a kelurahan     {result['ADM4_EN'].notna().mean():8.1%}")
+    print(f"  resolved (has zipcode) {result['resolved'].mean():8.1%}  -> the rest go to the paid API")
+
+    import geopandas as gpd
+    valid = ~np.isnan(lats)
+    points = gpd.GeoDataFrame(geometry=gpd.points_from_xy(lons[valid], lats[valid]), crs="EPSG:4326")
+    started = time.perf_counter()
+    joined = gpd.sjoin(points, polygons, how="left", predicate="within")
+    joined = joined[~joined.index.duplicated()]
+    print(f"  geopandas sjoin        {(time.perf_counter() - started) * 1000:8.1f} ms (reference)")
+    ours = result.loc[valid, "ADM4_PCODE"].to_numpy()
+    theirs = joined["ADM4_PCODE"].to_numpy()
+    agree = ((ours == theirs) | (pd.isna(ours) & pd.isna(theirs))).mean()
+    print(f"  agreement with sjoin   {agree:8.2%}")
+
+
+def _timed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# File: benchmarks/bench_datastore.py
+#
+# Stage hand-off cost: the notebooks' "failsafe" CSVs (to_csv, then read_csv
+# with a dtype dict) versus processing/datastore.py (typed Arrow IPC file
+# plus a text sidecar, memory-mapped on load). Synthetic listings shaped like
+# master_cleaned_features. Each load runs in a fresh interpreter so its peak
+# RSS is its own; a pruned load asks for the columns 03_deduplicate.ipynb's
+# geospatial step needs.
+#
+# Usage (from the project root):
+#   python benchmarks/bench_datastore.py [--rows 100000] [--repeat 3]
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from processing.datastore import load_stage, save_stage  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+PRUNED = ['id', 'price', 'latitude', 'longitude', 'land_size_sqm', 'building_size_sqm']
+CSV_DTYPES = {'id': 'str', 'zipcode': 'str', 'geo_confidence': 'str'}
+WORDS = ("rumah siap huni lingkungan aman dekat tol sekolah rumah sakit bebas banjir one gate system "
+         "sertifikat shm imb lengkap harga nego carport taman").split()
+
+# Run in the child: load one way, report seconds and peak RSS (VmHWM, KiB; Linux only)
+CHILD = """
+import json, re, sys, time
+sys.path.insert(0, {root!r})
+import pandas as pd
+from processing.datastore import load_stage
+started = time.perf_counter()
+{load}
+seconds = time.perf_counter() - started
+peak = int(re.search(r'VmHWM:\\s+(\\d+)', open('/proc/self/status').read()).group(1))
+print(json.dumps([seconds, peak, getattr(df, 'shape', None)]))
+"""
+
+
+def frame(n, seed=0):
+    rng = random.Random(seed)
+    kecamatan = [f"Kecamatan {i}" for i in range(30)]
+    rows = []
+    for i in range(n):
+        specs = {"Kamar Tidur": str(rng.randint(1, 6)), "Luas Tanah": f"{rng.randint(60, 600)} m²"}
+        rows.append({
+            'id': f"rumah-dijual-{i}-{rng.randrange(10**8)}",
+            'source': rng.choice(['Platform A', 'Platform B']),
+            'price': float(rng.randrange(300, 15000) * 1_000_000),
+            'master_address': f"Jl. Contoh No.{rng.randint(1, 200)}, {rng.choice(kecamatan)}, Kota Bandung",
+            'latitude': -6.9 + rng.random() / 10,
+            'longitude': 107.6 + rng.random() / 10,
+            'zipcode': f"40{rng.randint(100, 299)}" if rng.random() < 0.95 else None,
+            'bedrooms': rng.randint(1, 6) if rng.random() < 0.9 else None,
+            'bathrooms': rng.randint(1, 4) if rng.random() < 0.9 else None,
+            'land_size_sqm': rng.randint(60, 600) if rng.random() < 0.9 else None,
+            'building_size_sqm': rng.randint(36, 500) if rng.random() < 0.9 else None,
+            'description': " ".join(rng.choices(WORDS, k=rng.randint(40, 160))),
+            'specs': json.dumps(specs),
+            'url': f"https://example.com/listing/{i}",
+            'geo_confidence': rng.choice(['ROOFTOP', 'APPROXIMATE', 'GEOMETRIC_CENTER']),
+        })
+    df = pd.DataFrame(rows)
+    for column in ['bedrooms', 'bathrooms', 'land_size_sqm', 'building_size_sqm']:
+        df[column] = df[column].astype('Int64')
+    return df
+
+
+def child(load, repeat):
+    """Best seconds and the peak RSS (MiB) of `load` over `repeat` fresh interpreters."""
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", CHILD.format(root=str(ROOT), load=load)],
+                             check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return min(r[0] for r in runs), min(r[1] for r in runs) / 1024, runs[0][2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage hand-off (CSV vs typed Arrow) benchmark.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = frame(args.rows)
+    _, baseline, _ = child("df = None", args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, stage_path = Path(tmp) / "stage.csv", Path(tmp) / "stage.arrow"
+        started = time.perf_counter()
+        df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+        csv_save = time.perf_counter() - started
+        started = time.perf_counter()
+        save_stage(df, stage_path)
+        stage_save = time.perf_counter() - started
+        stage_bytes = sum(p.stat().st_size for p in Path(tmp).glob("stage*.arrow"))
+        print(f"{args.rows:,} listings")
+        print(f"  save   csv {csv_save:6.2f} s  {csv_path.stat().st_size / 2**20:7.1f} MiB   "
+              f"stage {stage_save:6.2f} s  {stage_bytes / 2**20:7.1f} MiB")
+
+        loads = [
+            ("csv, every column", f"df = pd.read_csv({str(csv_path)!r}, dtype={CSV_DTYPES!r})"),
+            ("csv, pruned", f"df = pd.read_csv({str(csv_path)!r}, dtype={CSV_DTYPES!r}, usecols={PRUNED!r})"),
+            ("stage, every column", f"df = load_stage({str(stage_path)!r}, text=True)"),
+            ("stage, no text columns", f"df = load_stage({str(stage_path)!r})"),
+            ("stage, pruned", f"df = load_stage({str(stage_path)!r}, columns={PRUNED!r})"),
+        ]
+        print(f"\n  {'load':<24}{'time':>9}{'peak RSS':>13}   (interpreter + pandas alone: {baseline:.0f} MiB)")
+        for label, load in loads:
+            seconds, peak, shape = child(load, args.repeat)
+            print(f"  {label:<24}{seconds:8.2f}s{peak:9.0f} MiB   {shape[1]} columns")
+
+        loaded = load_stage(stage_path, text=True)
+        print("\n  dtypes after load: " + ", ".join(f"{c}={loaded[c].dtype}" for c in
+                                                    ['id', 'source', 'zipcode', 'bedrooms', 'price']))
+        print(f"  round trip identical   {loaded.astype(object).equals(df.astype(object))}")
+
+
+if __name__ == "__main__":
+    main()
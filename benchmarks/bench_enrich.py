@@ -0,0 +1,107 @@
+# File: benchmarks/bench_enrich.py
+#
+# Geocoding throughput against the stub API (stub_api.py): the notebook's old
+# fan-out (10 threads, sleep 20 ms before each call) versus the asyncio engine
+# in processing/enrich.py (token bucket at the quota, bounded concurrency,
+# back-off on OVER_QUERY_LIMIT). Then an interrupted engine run is resumed
+# from its checkpoint, to show it only re-requests what was not finished.
+#
+# Usage (from the project root):
+#   python benchmarks/bench_enrich.py [--n 600] [--geocode-qps 50] [--latency 80] [--fail-rate 0.01]
+import argparse
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from processing.enrich import GoogleGeocoder, TokenBucket, enrich  # noqa: E402
+from stub_api import add_stub_arguments, make_server  # noqa: E402
+
+
+def addresses(n):
+    return [f"perumahan stub {i}, bandung" for i in range(n)]
+
+
+def run_threaded(url, keys):
+    """The notebook's original pattern: ThreadPoolExecutor(10), time.sleep(0.02) per call."""
+    failed = 0
+
+    def call(address):
+        time.sleep(0.02)
+        body = http.get(url, params={"address": address, "key": "stub"}).json()
+        return body["status"] == "OK"
+
+    with httpx.Client() as http, ThreadPoolExecutor(max_workers=10) as pool:
+        for ok in pool.map(call, keys):
+            failed += not ok
+    return failed
+
+
+async def run_engine(url, keys, qps, concurrency, checkpoint=None):
+    # No burst allowance: the stub, like Google, counts calls in a sliding one-second window
+    limiter = TokenBucket(qps, capacity=1)
+    async with GoogleGeocoder("stub", limiter, base_url=url) as geocoder:
+        results = await enrich(keys, geocoder.geocode, concurrency=concurrency, checkpoint=checkpoint,
+                               limiter=limiter, backoff=0.2, default={}, desc="engine")
+    return sum(1 for r in results.values() if not r)
+
+
+def timed(label, counts, func, n=None):
+    before = dict(counts)
+    started = time.perf_counter()
+    failed = func()
+    elapsed = time.perf_counter() - started
+    calls = counts.get("geocode", 0) - before.get("geocode", 0)
+    rejected = counts.get("geocode_over_quota", 0) - before.get("geocode_over_quota", 0)
+    geocoded = n - failed if n else None
+    rate = f"{geocoded / elapsed:6.1f} geocoded/s" if n else ""
+    print(f"  {label:<24} {elapsed:7.2f} s  {calls:6} requests  {rejected:5} over quota  {failed:5} failed  {rate}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geocoding engine benchmark against the stub API.")
+    add_stub_arguments(parser)
+    parser.add_argument("--n", type=int, default=600, help="distinct addresses to geocode")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    server, counts = make_server(args.port, args.geocode_qps, 0, args.latency, args.fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{args.port}/maps/api/geocode/json"
+    keys = addresses(args.n)
+    print(f"{args.n} addresses, quota {args.geocode_qps:g}/s, latency {args.latency:g} ms, "
+          f"fail rate {args.fail_rate:.0%} (best possible: {args.n / args.geocode_qps:.1f} s)\n")
+
+    try:
+        timed("threads + sleep(0.02)", counts, lambda: run_threaded(url, keys), args.n)
+        timed("asyncio + token bucket", counts,
+              lambda: asyncio.run(run_engine(url, keys, args.geocode_qps, args.concurrency)), args.n)
+        print()
+
+        print("Resume after an interruption halfway:")
+        checkpoint = Path(tempfile.mkdtemp(prefix="bench_enrich_")) / "checkpoint.jsonl"
+
+        async def interrupted():
+            try:
+                await asyncio.wait_for(run_engine(url, keys, args.geocode_qps, args.concurrency, checkpoint),
+                                       timeout=args.n / args.geocode_qps / 2)
+            except asyncio.TimeoutError:
+                pass
+
+        timed("interrupted run", counts, lambda: asyncio.run(interrupted()) or 0)
+        timed("resumed run", counts,
+              lambda: asyncio.run(run_engine(url, keys, args.geocode_qps, args.concurrency, checkpoint)))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# File: benchmarks/bench_fuzzy_match.py
+#
+# The zipcode fix from 02_merge_and_clean.ipynb: the notebook's original
+# find_best_match_hierarchical (fuzz.token_sort_ratio in a pandas apply over
+# every source row, per target) versus processing/fuzzy_match.py, on
+# synthetic master_address columns shaped like Google's formatted addresses.
+# Both must pick the same source row with the same score for every target.
+# At sizes where the original would take too long, it runs on a sample of
+# targets and its full time is extrapolated.
+#
+# Usage (from the project root):
+#   python benchmarks/bench_fuzzy_match.py [--rows 10000 100000] [--missing 0.2] [--sample 200]
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from thefuzz import fuzz
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from processing.fuzzy_match import match_nearest_price  # noqa: E402
+
+KECAMATAN = ["Coblong", "Sukajadi", "Buahbatu", "Antapani", "Arcamanik", "Gedebage", "Rancasari", "Cidadap",
+             "Lengkong", "Batununggal", "Bandung Kidul", "Cibeunying Kaler", "Sukasari", "Kiaracondong"]
+STREETS = ["Dago", "Setiabudi", "Soekarno Hatta", "Buah Batu", "Terusan Jakarta", "Pasteur", "Cigadung Raya",
+           "Turangga", "Ciwastra", "Riau", "Cikutra", "Gegerkalong Hilir", "Sukajadi", "Ahmad Yani"]
+
+
+def frame(n, missing, seed=0):
+    """master_address/price/zipcode rows; a few thousand distinct addresses, `missing` of them without zipcode."""
+    rng = random.Random(seed)
+    places = []
+    for i in range(max(50, n // 8)):
+        kecamatan = rng.choice(KECAMATAN)
+        zipcode = f"40{KECAMATAN.index(kecamatan):02d}{rng.randint(0, 9)}"
+        kind = rng.random()
+        if kind < 0.6:
+            address = (f"Jl. {rng.choice(STREETS)} No.{rng.randint(1, 200)}, {kecamatan}, "
+                       f"Kota Bandung, Jawa Barat {zipcode}, Indonesia")
+        elif kind < 0.9:
+            address = f"{kecamatan}, Kota Bandung, Jawa Barat, Indonesia"
+        else:
+            address = f"Perumahan {rng.choice(STREETS)} Indah Blok {chr(65 + i % 26)}{i % 40}, {kecamatan}, Bandung"
+        places.append((address, zipcode))
+    rows = []
+    for _ in range(n):
+        address, zipcode = places[min(int(rng.paretovariate(1.2)) - 1, len(places) - 1)] \
+            if rng.random() < 0.5 else rng.choice(places)
+        price = float(rng.randrange(300, 15000) * 1_000_000)
+        rows.append((address, price, None if rng.random() < missing else zipcode))
+    return pd.DataFrame(rows, columns=["master_address", "price", "zipcode"])
+
+
+def find_best_match_hierarchical(target_row, source_df):
+    """The notebook's original (unchanged apart from the docstring)."""
+    target_location = target_row['master_address']
+    target_price = target_row['price']
+    location_scores = source_df['master_address'].apply(
+        lambda source_loc: fuzz.token_sort_ratio(target_location, str(source_loc))
+    )
+    max_loc_score = location_scores.max()
+    best_location_matches = source_df[location_scores == max_loc_score]
+    if len(best_location_matches) == 1:
+        best_match = best_location_matches.iloc[0]
+    else:
+        best_location_matches['price'] = pd.to_numeric(best_location_matches['price'], errors='coerce')
+        price_differences = (best_location_matches['price'] - target_price).abs()
+        best_match = best_location_matches.loc[price_differences.idxmin()]
+    return pd.Series({'zipcode_fuzzy': best_match['zipcode'], 'zipcode_match_score': max_loc_score,
+                      'source_index': best_match.name})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zipcode fuzzy-match benchmark.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--missing", type=float, default=0.2)
+    parser.add_argument("--sample", type=int, default=200, help="targets the original runs on above 10k rows")
+    args = parser.parse_args()
+    pd.options.mode.chained_assignment = None
+
+    for n in args.rows:
+        df = frame(n, args.missing)
+        source_df = df.dropna(subset=["zipcode", "master_address", "price"])
+        target_df = df[df["zipcode"].isna()]
+        print(f"{n:,} rows: {len(target_df):,} targets, {len(source_df):,} sources, "
+              f"{source_df['master_address'].nunique():,} distinct source addresses")
+
+        started = time.perf_counter()
+        positions, scores = match_nearest_price(target_df["master_address"], target_df["price"],
+                                                source_df["master_address"], source_df["price"])
+        new = time.perf_counter() - started
+        print(f"  indexed matcher        {new:9.2f} s")
+
+        sample = target_df if n <= 10_000 else target_df.sample(min(args.sample, len(target_df)), random_state=0)
+        started = time.perf_counter()
+        old = sample.apply(lambda row: find_best_match_hierarchical(row, source_df), axis=1)
+        old_time = (time.perf_counter() - started) * len(target_df) / len(sample)
+        estimated = "" if len(sample) == len(target_df) else f"  (estimated from {len(sample)} targets)"
+        print(f"  original apply         {old_time:9.2f} s{estimated}")
+        print(f"  -> {old_time / new:,.0f}x faster")
+
+        at = target_df.index.get_indexer(sample.index)
+        same_row = (source_df.index[positions[at]] == old["source_index"].to_numpy()).all()
+        same_score = (scores[at] == old["zipcode_match_score"].astype(int).to_numpy()).all()
+        print(f"  identical matches      {bool(same_row and same_score)} ({len(sample)} targets compared)\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# File: benchmarks/bench_gazetteer.py
+#
+# Times the rule-based location extractor (processing/gazetteer.py) over the
+# Platform B slugs in data/raw/platform_b_id_only.json and reports how many
+# rows it resolves above the notebook's confidence threshold, i.e. how many
+# never need the LLM. The sample has ids only, so --with-descriptions adds a
+# ~1,000 character description per row (the slug's words inside filler text)
+# to time the full three-field scan.
+#
+# Usage (from the project root):
+#   python benchmarks/bench_gazetteer.py [--min-confidence 0.6] [--repeat 3] [--with-descriptions]
+#          [--shapefile data/raw/idn_admbnda_adm4_ID3_bps_20200401.shp]
+import argparse
+import json
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from processing.gazetteer import Gazetteer  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+FILLER = ("Dijual cepat rumah siap huni, bebas banjir, lingkungan aman dan nyaman, one gate system, "
+          "dekat sekolah, rumah sakit dan pintu tol. Sertifikat SHM, IMB lengkap. Harga nego tipis. ")
+
+
+def listings(path, with_descriptions, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for record in json.loads(Path(path).read_text(encoding="utf-8")):
+        slug = record["id"].replace("-", " ")
+        description = None
+        if with_descriptions:
+            words = slug.split()[:-1]
+            rng.shuffle(words)
+            description = FILLER * 3 + " ".join(words) + ". " + FILLER * 2
+        rows.append({"id": slug, "address": None, "description": description})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gazetteer location extraction benchmark.")
+    parser.add_argument("--input", default=str(ROOT / "data" / "raw" / "platform_b_id_only.json"))
+    parser.add_argument("--shapefile", help="the BPS ADM4 shapefile, to add the kelurahan names")
+    parser.add_argument("--min-confidence", type=float, default=0.6)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--with-descriptions", action="store_true")
+    args = parser.parse_args()
+
+    polygons = None
+    if args.shapefile:
+        from processing.admin_geocoder import load_admin_polygons
+        polygons = load_admin_polygons(args.shapefile)
+    started = time.perf_counter()
+    gazetteer = Gazetteer.bandung(polygons)
+    print(f"Compiled {len(gazetteer.entries)} places in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rows = listings(args.input, args.with_descriptions)
+    chars = sum(len(r["id"]) + len(r["description"] or "") for r in rows)
+    print(f"{len(rows)} listings, {chars / len(rows):,.0f} characters each on average\n")
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        # A fresh instance each time, so the fuzzy memo starts empty
+        gazetteer = Gazetteer.bandung(polygons)
+        started = time.perf_counter()
+        results = gazetteer.extract_all(rows)
+        best = min(best, time.perf_counter() - started)
+    print(f"  extract all            {best:8.2f} s   ({len(rows) / best:,.0f} rows/s, one core)")
+
+    confident = [r for r in results if r["confidence"] >= args.min_confidence]
+    print(f"  resolved (>= {args.min_confidence:g})       {len(confident) / len(rows):8.1%}   "
+          f"-> {len(rows) - len(confident)} rows left for the LLM")
+    for level, count in Counter(r["level"] for r in confident).most_common():
+        print(f"    {level:<20} {count:6}")
+    low = Counter(r["level"] or "no match" for r in results if r["confidence"] < args.min_confidence)
+    print("  below threshold        " + ", ".join(f"{level} {count}" for level, count in low.most_common()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# File: benchmarks/bench_geo_dedup.py
+#
+# Stage C of 03_deduplicate.ipynb: the notebook's geospatial_deduplication
+# (shapely Points, GeoPandas reprojection, DBSCAN, one frame mask per
+# cluster) versus processing/geo_dedup.py, on synthetic Bandung listings
+# with housing complexes, reposts a few metres apart and rows without
+# coordinates. Both must keep the same listings. The incremental check
+# feeds the same listings in batches through a GeoDedupIndex (saved and
+# reloaded between batches) and must end with the same survivors too.
+#
+# Usage (from the project root):
+#   python benchmarks/bench_geo_dedup.py [--rows 10000 100000] [--batches 10]
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from processing.geo_dedup import GeoDedupIndex, geospatial_deduplication  # noqa: E402
+
+
+def frame(n, seed=0):
+    """Listings around Bandung: a third in complexes (shared prices/sizes), a tenth reposted, some without coordinates."""
+    rng = random.Random(seed)
+    complexes = [(-6.95 + rng.uniform(-0.1, 0.1), 107.6 + rng.uniform(-0.1, 0.1)) for _ in range(max(1, n // 200))]
+    rows = []
+    for i in range(n):
+        if rng.random() < 0.35:
+            lat, lon = rng.choice(complexes)
+            lat, lon = lat + rng.gauss(0, 0.0005), lon + rng.gauss(0, 0.0005)
+            price = rng.choice([850, 900, 1200, 1500]) * 1_000_000
+            land, building = rng.choice([(72, 45), (90, 60), (120, 90)])
+        else:
+            lat, lon = -6.95 + rng.uniform(-0.2, 0.2), 107.6 + rng.uniform(-0.25, 0.25)
+            price = rng.randrange(300, 15000) * 1_000_000
+            land, building = rng.randint(60, 600), rng.randint(36, 500)
+        row = {'id': f"listing-{i}", 'price': float(price), 'latitude': lat, 'longitude': lon,
+               'land_size_sqm': land if rng.random() < 0.95 else None,
+               'building_size_sqm': building if rng.random() < 0.9 else None}
+        if rng.random() < 0.08:
+            row['latitude'] = row['longitude'] = None
+        rows.append(row)
+        if rng.random() < 0.1:  # the same house again, pin moved a little
+            rows.append(dict(row, id=f"listing-{i}-repost", latitude=lat + rng.gauss(0, 0.0002),
+                             longitude=lon + rng.gauss(0, 0.0002)))
+    df = pd.DataFrame(rows)
+    for column in ['land_size_sqm', 'building_size_sqm']:
+        df[column] = df[column].astype('Int64')
+    return df
+
+
+# --- The notebook's original (Step 3, Stage C), without the prints ---
+
+def notebook_geospatial_deduplication(df, cluster_radius_m=100):
+    import geopandas as gpd
+    from shapely.geometry import Point
+    from sklearn.cluster import DBSCAN
+
+    gdf = df.copy()
+    gdf['latitude'] = pd.to_numeric(gdf['latitude'], errors='coerce')
+    gdf['longitude'] = pd.to_numeric(gdf['longitude'], errors='coerce')
+    gdf['price'] = pd.to_numeric(gdf['price'], errors='coerce')
+    gdf['land_size_sqm'] = pd.to_numeric(gdf['land_size_sqm'], errors='coerce')
+    gdf['building_size_sqm'] = pd.to_numeric(gdf['building_size_sqm'], errors='coerce')
+    gdf['can_cluster'] = gdf['latitude'].notna() & gdf['longitude'].notna()
+    clusterable_gdf = gdf[gdf['can_cluster']].copy()
+    non_clusterable_df = gdf[~gdf['can_cluster']].copy()
+    if clusterable_gdf.empty:
+        return df
+    clusterable_gdf['geometry'] = [Point(xy) for xy in zip(clusterable_gdf['longitude'], clusterable_gdf['latitude'])]
+    clusterable_gdf = gpd.GeoDataFrame(clusterable_gdf, geometry='geometry', crs="EPSG:4326")
+    clusterable_gdf = clusterable_gdf.to_crs("EPSG:3857")
+    coords = np.array(list(zip(clusterable_gdf.geometry.x, clusterable_gdf.geometry.y)))
+    db = DBSCAN(eps=cluster_radius_m, min_samples=2, metric='euclidean').fit(coords)
+    clusterable_gdf['cluster'] = db.labels_
+    keep_indices = set()
+    keep_indices.update(set(clusterable_gdf[clusterable_gdf['cluster'] == -1].index))
+    for cluster_id in set(clusterable_gdf['cluster']):
+        if cluster_id == -1:
+            continue
+        cluster_listings = clusterable_gdf[clusterable_gdf['cluster'] == cluster_id]
+        survivor_listings = cluster_listings.drop_duplicates(
+            subset=['price', 'land_size_sqm', 'building_size_sqm'], keep='first')
+        keep_indices.update(survivor_listings.index)
+    final_clustered_df = df.loc[list(keep_indices)]
+    return pd.concat([final_clustered_df, non_clusterable_df], ignore_index=True)
+
+
+def incremental(df, batches):
+    """Survivor ids after feeding `df` in `batches` slices through a GeoDedupIndex saved to disk in between."""
+    kept = set()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "geo_index.arrow"
+        for i, batch in enumerate(np.array_split(np.arange(len(df)), batches)):
+            index = GeoDedupIndex.load(path) if i else GeoDedupIndex()
+            part = df.iloc[batch]
+            keep, dropped = index.add(part)
+            kept.update(part['id'][keep])
+            kept.difference_update(dropped)
+            index.save(path)
+    return kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geospatial deduplication benchmark.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--batches", type=int, default=10)
+    args = parser.parse_args()
+
+    for n in args.rows:
+        df = frame(n)
+        print(f"{len(df):,} listings ({int(df['latitude'].isna().sum()):,} without coordinates)")
+
+        started = time.perf_counter()
+        old = notebook_geospatial_deduplication(df)
+        old_seconds = time.perf_counter() - started
+        print(f"  DBSCAN + per-cluster loop {old_seconds:8.2f} s   kept {len(old):,}")
+
+        started = time.perf_counter()
+        new = geospatial_deduplication(df)
+        new_seconds = time.perf_counter() - started
+        print(f"  grid hash + components    {new_seconds:8.2f} s   -> {old_seconds / new_seconds:.0f}x faster")
+
+        started = time.perf_counter()
+        kept = incremental(df, args.batches)
+        print(f"  incremental, {args.batches} batches   {time.perf_counter() - started:8.2f} s")
+
+        print(f"  same survivors            {set(old['id']) == set(new['id'])}")
+        print(f"  incremental same          {kept == set(old['id'])}\n")
+
+
+if __name__ == "__main__":
+    main()
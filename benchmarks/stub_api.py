@@ -0,0 +1,193 @@
+# File: benchmarks/stub_api.py
+#
+# Local stand-in for the two APIs 01_geocode.ipynb pays for, so the
+# enrichment engine (processing/enrich.py) can be run and benchmarked offline:
+#   GET  /maps/api/geocode/json   Google Geocoding (address= or latlng=)
+#   POST /v1/chat/completions     OpenAI chat completions (plain, or a JSON
+#                                 array of listings -> structured `results`)
+# Each API enforces its own quota like the real ones do: Google answers
+# OVER_QUERY_LIMIT above --geocode-qps, OpenAI a 429 with Retry-After above
+# --chat-rps. Responses are deterministic in the query; a share can fail with
+# 500s, and every response waits --latency ms.
+#
+# Usage (from the project root):
+#   python benchmarks/stub_api.py --port 8901 --geocode-qps 50 --latency 80
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+DISTRICTS = ["Arcamanik", "Antapani", "Buahbatu", "Cicendo", "Coblong", "Sukajadi", "Lengkong", "Bojongsoang"]
+
+
+class QuotaWindow:
+    """Allows `rate` calls in any one-second window (0 = unlimited)."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def allow(self):
+        if not self.rate:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.calls = [t for t in self.calls if now - t < 1.0]
+            if len(self.calls) >= self.rate:
+                return False
+            self.calls.append(now)
+            return True
+
+
+def geocode_result(query):
+    digest = int(hashlib.sha256(query.encode()).hexdigest(), 16)
+    district = DISTRICTS[digest % len(DISTRICTS)]
+    return {
+        "formatted_address": f"Jl. Stub No. {digest % 200}, {district}, Bandung, Jawa Barat 40{digest % 1000:03d}, Indonesia",
+        "geometry": {
+            "location": {"lat": -6.95 + (digest % 1000) / 10000, "lng": 107.6 + (digest // 1000 % 1000) / 10000},
+            "location_type": ["ROOFTOP", "RANGE_INTERPOLATED", "GEOMETRIC_CENTER", "APPROXIMATE"][digest % 4],
+        },
+        "address_components": [
+            {"long_name": district, "short_name": district, "types": ["administrative_area_level_3", "political"]},
+            {"long_name": f"40{digest % 1000:03d}", "short_name": f"40{digest % 1000:03d}", "types": ["postal_code"]},
+        ],
+    }
+
+
+def stub_geo_string(text):
+    digest = int(hashlib.sha256(text.encode()).hexdigest(), 16)
+    return f"perumahan stub {digest % 500}, {DISTRICTS[digest % len(DISTRICTS)].lower()}, bandung"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    geocode_quota = QuotaWindow(0)
+    chat_quota = QuotaWindow(0)
+    counts = None  # {"geocode": n, "geocode_over_quota": n, ...}, shared per server
+    quiet = True
+
+    def count(self, name):
+        with self.geocode_quota.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/maps/api/geocode/json":
+            return self.send_json(404, {"error": "not found"})
+        self.count("geocode")
+        if not self.geocode_quota.allow():
+            self.count("geocode_over_quota")
+            return self.send_json(200, {"status": "OVER_QUERY_LIMIT", "results": []})
+        time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            self.count("geocode_failed")
+            return self.send_json(500, {"status": "UNKNOWN_ERROR"})
+        query = parse_qs(url.query)
+        text = (query.get("address") or query.get("latlng") or [""])[0]
+        if not text or "tidak ada" in text:
+            return self.send_json(200, {"status": "ZERO_RESULTS", "results": []})
+        self.send_json(200, {"status": "OK", "results": [geocode_result(text)]})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+        if urlparse(self.path).path != "/v1/chat/completions":
+            return self.send_json(404, {"error": {"message": "not found"}})
+        self.count("chat")
+        if not self.chat_quota.allow():
+            self.count("chat_over_quota")
+            return self.send_json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                                  {"Retry-After": "1"})
+        time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            self.count("chat_failed")
+            return self.send_json(500, {"error": {"message": "stub failure"}})
+        request = json.loads(body or b"{}")
+        messages = request.get("messages", [{}])
+        user = messages[-1].get("content", "")
+        if request.get("response_format", {}).get("type") == "json_schema":
+            # Batched listings (processing/llm_parse.py): one result per `key`
+            results = [{"key": item["key"], "geo_string": stub_geo_string(json.dumps(
+                           {k: v for k, v in item.items() if k != "key"}, sort_keys=True))}
+                       for item in json.loads(user)]
+            content = json.dumps({"results": results})
+        else:
+            content = stub_geo_string(user)
+        self.count_tokens(sum(len(m.get("content", "")) for m in messages) // 4, len(content) // 4)
+        digest = int(hashlib.sha256(user.encode()).hexdigest(), 16)
+        self.send_json(200, {
+            "id": f"chatcmpl-{digest % 10**12}", "object": "chat.completion", "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(user) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(user) + len(content)) // 4},
+        })
+
+    def count_tokens(self, prompt, completion):
+        with self.geocode_quota.lock:
+            self.counts["prompt_tokens"] = self.counts.get("prompt_tokens", 0) + prompt
+            self.counts["completion_tokens"] = self.counts.get("completion_tokens", 0) + completion
+
+    def send_json(self, status, payload, extra_headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client gave up (e.g. a cancelled benchmark run)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            print(f"[stub] {format % args}")
+
+
+def make_server(port=8901, geocode_qps=50, chat_rps=0, latency_ms=0, fail_rate=0.0, quiet=True):
+    """The server and its shared request counts."""
+    counts = {}
+    handler = type("ConfiguredStubHandler", (StubHandler,), {
+        "latency": latency_ms / 1000, "fail_rate": fail_rate, "quiet": quiet, "counts": counts,
+        "geocode_quota": QuotaWindow(geocode_qps), "chat_quota": QuotaWindow(chat_rps),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server, counts
+
+
+def add_stub_arguments(parser):
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--geocode-qps", type=float, default=50, help="Geocoding quota, requests/sec (0 = none)")
+    parser.add_argument("--chat-rps", type=float, default=0, help="chat completions quota, requests/sec (0 = none)")
+    parser.add_argument("--latency", type=float, default=80, help="added latency per response, ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of responses that are 500s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve stub Google Geocoding and OpenAI chat APIs.")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    server, _ = make_server(args.port, args.geocode_qps, args.chat_rps, args.latency, args.fail_rate, quiet=False)
+    base = f"http://127.0.0.1:{args.port}"
+    print(f"Serving stub APIs on {base} (Ctrl+C to stop)")
+    print(f"  GoogleGeocoder(..., base_url='{base}/maps/api/geocode/json')")
+    print(f"  OpenAIChat(..., base_url='{base}/v1')")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+# processing/
+#
+# Helpers shared by the data-processing notebooks in notebooks/. The notebooks
+# add the project root to sys.path and import from here.
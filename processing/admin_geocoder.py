@@ -0,0 +1,135 @@
+# processing/admin_geocoder.py
+#
+# Offline reverse geocoding against the BPS administrative boundaries
+# (idn_admbnda_adm4_ID3_bps_20200401.shp, see data/raw/DOWNLOAD_INSTRUCTIONS.txt).
+# Coordinates resolve to kelurahan (ADM4) / kecamatan (ADM3) / kota (ADM2)
+# with one vectorized STRtree query per batch, and to a zipcode through a
+# table derived from the Google responses we already paid for. Only points
+# outside the clipped area, or in a kelurahan without a known zipcode, need
+# the paid API.
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ADMIN_COLUMNS = ["ADM1_EN", "ADM2_EN", "ADM3_EN", "ADM4_EN", "ADM4_PCODE"]
+DEFAULT_CLIP = {"ADM2_EN": ["Kota Bandung"]}
+
+
+def load_admin_polygons(shapefile_path, clip=None, cache_dir=None):
+    """
+    The ADM4 polygons (EPSG:4326) whose columns match `clip`, e.g.
+    {"ADM2_EN": ["Kota Bandung"]}. Reading the full Java shapefile takes
+    seconds, so with `cache_dir` the clipped set is kept as GeoParquet,
+    keyed by the shapefile's size/mtime and the clip.
+    """
+    import geopandas as gpd
+
+    clip = DEFAULT_CLIP if clip is None else clip
+    shapefile_path = Path(shapefile_path)
+    cache_path = None
+    if cache_dir is not None:
+        stat = shapefile_path.stat()
+        tag = json.dumps([shapefile_path.name, stat.st_size, int(stat.st_mtime), clip], sort_keys=True)
+        cache_path = Path(cache_dir) / f"adm4_{hashlib.sha1(tag.encode()).hexdigest()[:12]}.parquet"
+        if cache_path.exists():
+            return gpd.read_parquet(cache_path)
+
+    gdf = gpd.read_file(shapefile_path, columns=ADMIN_COLUMNS)
+    for column, values in clip.items():
+        gdf = gdf[gdf[column].isin(values)]
+    gdf = gdf.to_crs("EPSG:4326").reset_index(drop=True)[ADMIN_COLUMNS + ["geometry"]]
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        gdf.to_parquet(cache_path)
+    return gdf
+
+
+class AdminReverseGeocoder:
+    """
+    Point-in-polygon lookups over a GeoDataFrame of ADM4 polygons (from
+    load_admin_polygons). `zipcodes` maps ADM4_PCODE to a postal code; each
+    kelurahan has its own kode pos, so one code per polygon is enough.
+    """
+
+    def __init__(self, polygons, zipcodes=None):
+        from shapely import STRtree
+
+        self.polygons = polygons.reset_index(drop=True)
+        self.tree = STRtree(self.polygons.geometry.values)
+        self.zipcodes = dict(zipcodes or {})
+
+    @classmethod
+    def from_shapefile(cls, shapefile_path, clip=None, cache_dir=None, zipcodes=None):
+        return cls(load_admin_polygons(shapefile_path, clip, cache_dir), zipcodes)
+
+    def polygon_index(self, lats, lons):
+        """Index into self.polygons for each point, -1 where no polygon contains it."""
+        import shapely
+
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        result = np.full(len(lats), -1, dtype=np.int64)
+        valid = ~(np.isnan(lats) | np.isnan(lons))
+        points = shapely.points(lons[valid], lats[valid])
+        point_idx, poly_idx = self.tree.query(points, predicate="intersects")
+        # A point on a shared border hits both polygons; the first one wins
+        order = np.lexsort((poly_idx, point_idx))
+        point_idx, poly_idx = point_idx[order], poly_idx[order]
+        first = np.r_[True, point_idx[1:] != point_idx[:-1]] if len(point_idx) else np.array([], dtype=bool)
+        result[np.flatnonzero(valid)[point_idx[first]]] = poly_idx[first]
+        return result
+
+    def resolve(self, lats, lons):
+        """
+        A DataFrame (one row per point, in order) with the ADM columns,
+        zipcode, and `resolved` (inside a polygon that has a zipcode).
+        """
+        idx = self.polygon_index(lats, lons)
+        inside = idx >= 0
+        out = pd.DataFrame(index=range(len(idx)), columns=ADMIN_COLUMNS, dtype=object)
+        out.loc[inside, ADMIN_COLUMNS] = self.polygons.loc[idx[inside], ADMIN_COLUMNS].to_numpy()
+        out["zipcode"] = out["ADM4_PCODE"].map(self.zipcodes)
+        out["resolved"] = inside & out["zipcode"].notna().to_numpy()
+        return out
+
+    def derive_zipcodes(self, lats, lons, zipcodes, min_votes=1):
+        """
+        Learns ADM4_PCODE -> zipcode from points with a known zipcode (e.g.
+        earlier Google results): the most common code per kelurahan wins.
+        Returns the number of kelurahan in the table.
+        """
+        frame = pd.DataFrame({"pcode": self.resolve(lats, lons)["ADM4_PCODE"].to_numpy(),
+                              "zipcode": pd.Series(zipcodes, dtype=object).to_numpy()})
+        frame = frame[frame["pcode"].notna() & frame["zipcode"].notna() & (frame["zipcode"] != "")]
+        counts = frame.groupby(["pcode", "zipcode"]).size().reset_index(name="votes")
+        counts = counts[counts["votes"] >= min_votes].sort_values(["pcode", "votes", "zipcode"],
+                                                                 ascending=[True, False, True])
+        self.zipcodes.update(counts.drop_duplicates("pcode").set_index("pcode")["zipcode"].to_dict())
+        return len(self.zipcodes)
+
+    def derive_zipcodes_from_cache(self, geocode_cache):
+        """derive_zipcodes() over every response in a geocache.GeocodeCache."""
+        lats, lons, zipcodes = [], [], []
+        for response in geocode_cache.responses():
+            for result in response[:1]:
+                location = result.get("geometry", {}).get("location")
+                postcode = next((c.get("short_name") for c in result.get("address_components", [])
+                                 if "postal_code" in c.get("types", [])), None)
+                if location and postcode:
+                    lats.append(location["lat"])
+                    lons.append(location["lng"])
+                    zipcodes.append(postcode)
+        return self.derive_zipcodes(lats, lons, zipcodes)
+
+    def save_zipcodes(self, path):
+        pd.Series(self.zipcodes, name="zipcode").rename_axis("ADM4_PCODE").to_csv(path)
+
+    def load_zipcodes(self, path):
+        if Path(path).exists():
+            table = pd.read_csv(path, dtype=str)
+            self.zipcodes.update(dict(zip(table["ADM4_PCODE"], table["zipcode"])))
+        return len(self.zipcodes)
@@ -0,0 +1,169 @@
+# processing/datastore.py
+#
+# Hand-off files between the notebooks. Each stage used to save a
+# "failsafe" CSV that the next one re-read with its own dtype dict to keep
+# `zipcode` and `id` from being mangled. save_stage writes an Arrow IPC
+# (Feather v2) file instead, with the types in COLUMN_TYPES enforced on every
+# write: a column that drifted (a zipcode that became a float, a fractional
+# bedroom count) is an error at save time, not a surprise two notebooks
+# later. The long text columns (TEXT_COLUMNS) go to a sidecar file next to
+# it, so stages that do not need them never read them. Files are written
+# uncompressed so load_stage can memory-map them and only the columns it is
+# asked for are ever paged in and converted.
+import json
+import os
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# Known columns and their storage type; anything else keeps the type Arrow infers for it
+COLUMN_TYPES = {
+    'id': pa.string(),
+    'url': pa.string(),
+    'source': CATEGORY,
+    'zipcode': CATEGORY,
+    'property_type': CATEGORY,
+    'geo_confidence': CATEGORY,
+    'price': pa.float64(),
+    'latitude': pa.float64(),
+    'longitude': pa.float64(),
+    'bedrooms': pa.int64(),
+    'bathrooms': pa.int64(),
+    'land_size_sqm': pa.int64(),
+    'building_size_sqm': pa.int64(),
+    'description': pa.large_string(),
+    'description_clean': pa.large_string(),
+    'specs': pa.large_string(),
+}
+
+# Stored in the sidecar, loaded only on request
+TEXT_COLUMNS = ('description', 'description_clean', 'specs')
+
+
+class SchemaError(ValueError):
+    """A column that cannot be stored as its declared type without losing data, or mismatched stage files."""
+
+
+def text_path(path):
+    """The sidecar holding the text columns of the stage file at `path`."""
+    path = Path(path)
+    return path.with_name(path.stem + '.text' + path.suffix)
+
+
+def _kind(arrow_type):
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return 'string'
+    if pa.types.is_integer(arrow_type):
+        return 'integer'
+    if pa.types.is_floating(arrow_type):
+        return 'float'
+    return str(arrow_type)
+
+
+# Conversions that cannot lose anything (float -> integer is checked value by value by Arrow's safe cast)
+LOSSLESS = {('integer', 'float'), ('float', 'integer'), ('integer', 'string')}
+
+
+def _to_arrow(name, series):
+    """`series` as an Arrow array of its declared type (SchemaError if that would change any value)."""
+    try:
+        array = pa.Array.from_pandas(series)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise SchemaError(f"column {name!r} has mixed types: {e}") from e
+    if isinstance(array, pa.ChunkedArray):
+        # Arrow-backed columns of a concatenated frame; one chunk, so a category column gets one dictionary
+        array = array.combine_chunks()
+    declared = COLUMN_TYPES.get(name)
+    if declared is None or array.type == declared:
+        return array
+    if array.null_count == len(array):
+        return pa.nulls(len(array), declared)
+    kinds = (_kind(array.type), _kind(declared))
+    if kinds[0] != kinds[1] and kinds not in LOSSLESS:
+        raise SchemaError(f"column {name!r} is {array.type}, expected {declared}")
+    if kinds == ('integer', 'string'):
+        array = array.cast(pa.string())
+    try:
+        return array.cast(declared)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise SchemaError(f"column {name!r} cannot be stored as {declared}: {e}") from e
+
+
+def _write_atomic(table, path):
+    """Writes `table` to a temp file next to `path` and renames it into place."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with pa.OSFile(str(tmp_path), 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_stage(df, path):
+    """
+    Saves `df` (without its index) as the stage file at `path`, its text
+    columns in text_path(path). Both files carry the same stage id, so a
+    sidecar left over from another run is detected on load.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    arrays = {name: _to_arrow(name, df[name]) for name in df.columns}
+    metadata = {'stage_id': uuid.uuid4().hex, 'columns': json.dumps([str(name) for name in df.columns])}
+    main = [name for name in arrays if name not in TEXT_COLUMNS]
+    text = [name for name in arrays if name in TEXT_COLUMNS]
+    _write_atomic(pa.table({name: arrays[name] for name in text}).replace_schema_metadata(metadata),
+                  text_path(path))
+    _write_atomic(pa.table({name: arrays[name] for name in main}).replace_schema_metadata(metadata), path)
+
+
+def _read(path):
+    """The table in the stage file at `path`, memory-mapped (nothing is read until a column is used)."""
+    with pa.memory_map(str(path), 'r') as source:
+        return ipc.open_file(source).read_all()
+
+
+def stage_columns(path):
+    """Every column of the stage file at `path` (text columns included), in their saved order."""
+    with pa.memory_map(str(path), 'r') as source:
+        return json.loads(ipc.open_file(source).schema.metadata[b'columns'])
+
+
+def stage_id(path):
+    """The id save_stage gave the stage file at `path` (new on every save)."""
+    with pa.memory_map(str(path), 'r') as source:
+        return ipc.open_file(source).schema.metadata[b'stage_id'].decode()
+
+
+def load_stage(path, columns=None, text=False):
+    """
+    Loads the stage file at `path` as a DataFrame: `columns` only when
+    given, otherwise every column except the text ones (all of them with
+    `text=True`). Categories come back as pandas categoricals and integer
+    columns as nullable Int64.
+    """
+    path = Path(path)
+    table = _read(path)
+    metadata = table.schema.metadata
+    saved = json.loads(metadata[b'columns'])
+    if columns is None:
+        columns = [name for name in saved if text or name not in TEXT_COLUMNS]
+    missing = [name for name in columns if name not in saved]
+    if missing:
+        raise KeyError(f"{path.name} has no column(s) {missing}")
+
+    wanted_text = [name for name in columns if name in TEXT_COLUMNS]
+    table = table.select([name for name in columns if name not in TEXT_COLUMNS])
+    if wanted_text:
+        text_table = _read(text_path(path))
+        if text_table.schema.metadata.get(b'stage_id') != metadata[b'stage_id']:
+            raise SchemaError(f"{text_path(path).name} does not belong to {path.name}")
+        for name in wanted_text:
+            table = table.append_column(name, text_table.column(name))
+    return table.select(columns).to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
@@ -0,0 +1,295 @@
+# processing/enrich.py
+#
+# Asyncio engine for the per-row API calls in 01_geocode.ipynb (Google
+# geocoding, OpenAI parsing). Throughput is set by each API's quota through a
+# shared token bucket rather than by sleeps, in-flight calls are bounded,
+# quota errors are retried with jittered exponential back-off, and finished
+# results are checkpointed to JSON lines so an interrupted run resumes.
+#
+# Both API wrappers take a base_url, so the whole thing runs against the local
+# stub in benchmarks/stub_api.py.
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from tqdm import tqdm
+
+GOOGLE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+
+class QuotaError(Exception):
+    """Rate limit or quota hit; the call can be retried after `retry_after` seconds (if known)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TransientError(Exception):
+    """Server-side or network failure worth retrying."""
+
+
+class TokenBucket:
+    """
+    `rate` calls per second with bursts of up to `capacity`. One bucket per
+    API, shared by every task calling it. pause() holds the whole bucket,
+    so one quota error slows every caller down, not just the one that hit it.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = None
+        self._loop = None
+
+    async def acquire(self):
+        # The notebook runs each batch in its own event loop (run_sync), and a lock belongs to one loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class Checkpoint:
+    """
+    Append-only JSON lines of {"key", "result"}; a crash loses at most the
+    line being written. Keys are stored and looked up by their JSON text, so
+    tuple keys come back as the same key.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = None
+
+    def load(self):
+        done = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn last line from a crash
+                    done[json.dumps(entry["key"])] = entry["result"]
+        return done
+
+    def append(self, key, result):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps({"key": key, "result": result}, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+async def enrich(keys, worker, concurrency=10, checkpoint=None, retries=5, backoff=1.0,
+                 max_backoff=60.0, default=None, limiter=None, desc="Enriching"):
+    """
+    Runs `await worker(key)` once per distinct key with at most `concurrency`
+    calls in flight, and returns {key: result}.
+
+    QuotaError and TransientError are retried up to `retries` times, waiting
+    backoff * 2**attempt (capped at max_backoff, or the server's Retry-After)
+    with full jitter; a QuotaError also pauses `limiter`. Keys that still
+    fail, or raise anything else, get `default` and are not checkpointed, so
+    the next run tries them again. Keys already in `checkpoint` are skipped.
+    Keys must be hashable and JSON-serializable (strings, number tuples).
+    """
+    checkpoint = Checkpoint(checkpoint) if isinstance(checkpoint, (str, Path)) else checkpoint
+    done = checkpoint.load() if checkpoint else {}
+    results, todo = {}, []
+    for key in dict.fromkeys(keys):
+        tag = json.dumps(key)
+        if tag in done:
+            results[key] = done[tag]
+        else:
+            todo.append(key)
+    if results:
+        print(f"{desc}: resuming, {len(results)} done, {len(todo)} to go.")
+
+    queue = asyncio.Queue()
+    for key in todo:
+        queue.put_nowait(key)
+    progress = tqdm(total=len(todo), desc=desc)
+    stats = {"ok": 0, "retries": 0, "failed": 0}
+
+    async def run_one(key):
+        for attempt in range(retries + 1):
+            try:
+                return await worker(key), True
+            except (QuotaError, TransientError) as exc:
+                if attempt == retries:
+                    print(f"{desc}: giving up on {key!r} after {retries} retries ({exc})")
+                    return default, False
+                delay = random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+                if isinstance(exc, QuotaError):
+                    if exc.retry_after:
+                        delay = max(delay, exc.retry_after)
+                    if limiter is not None:
+                        limiter.pause(delay)
+                stats["retries"] += 1
+                await asyncio.sleep(delay)
+            except Exception as exc:
+                print(f"{desc}: error on {key!r}: {exc}")
+                return default, False
+
+    async def consume():
+        while True:
+            try:
+                key = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            result, ok = await run_one(key)
+            results[key] = result
+            stats["ok" if ok else "failed"] += 1
+            if ok and checkpoint:
+                checkpoint.append(key, result)
+            progress.update()
+
+    try:
+        await asyncio.gather(*(consume() for _ in range(max(1, min(concurrency, len(todo))))))
+    finally:
+        progress.close()
+        if checkpoint:
+            checkpoint.close()
+    print(f"{desc}: {stats['ok']} done, {stats['failed']} failed, {stats['retries']} retries.")
+    return results
+
+
+def run_sync(coro):
+    """asyncio.run() that also works inside Jupyter, whose own event loop is already running."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+class GoogleGeocoder:
+    """
+    Async client for the Geocoding web service; geocode / reverse_geocode
+    return the response's `results` list. Every HTTP call takes a
+    token from `limiter`; wrap it in geocache.CachedGeocoder (and use its
+    areverse_geocode / ageocode) so cache hits skip both.
+    """
+
+    def __init__(self, key, limiter, base_url=GOOGLE_GEOCODE_URL, timeout=30.0):
+        import httpx
+        self.key = key
+        self.limiter = limiter
+        self.base_url = base_url
+        self.http = httpx.AsyncClient(timeout=timeout)
+
+    async def reverse_geocode(self, latlng, **params):
+        return await self._get({"latlng": f"{latlng[0]},{latlng[1]}", **params})
+
+    async def geocode(self, address, **params):
+        return await self._get({"address": address, **params})
+
+    async def _get(self, params):
+        import httpx
+        if isinstance(params.get("components"), dict):
+            params["components"] = "|".join(f"{k}:{v}" for k, v in params["components"].items())
+        await self.limiter.acquire()
+        try:
+            resp = await self.http.get(self.base_url, params={**params, "key": self.key})
+        except httpx.TransportError as exc:
+            raise TransientError(str(exc)) from exc
+        if resp.status_code == 429:
+            raise QuotaError("HTTP 429", _retry_after(resp))
+        if resp.status_code >= 500:
+            raise TransientError(f"HTTP {resp.status_code}")
+        resp.raise_for_status()
+        body = resp.json()
+        status = body.get("status")
+        if status == "OK":
+            return body["results"]
+        if status == "ZERO_RESULTS":
+            return []
+        if status in ("OVER_QUERY_LIMIT", "RESOURCE_EXHAUSTED"):
+            raise QuotaError(status)
+        if status == "UNKNOWN_ERROR":
+            raise TransientError(status)
+        raise ValueError(f"{status}: {body.get('error_message', '')}")
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+class OpenAIChat:
+    """
+    One-prompt chat completions through AsyncOpenAI, with the SDK's own
+    retries off so rate limits go through the shared limiter and enrich()'s
+    back-off instead.
+    """
+
+    def __init__(self, api_key, limiter, model="gpt-4o-mini", base_url=None, timeout=60.0):
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=timeout)
+        self.limiter = limiter
+        self.model = model
+
+    async def complete(self, system, user, temperature=0.0, response_format=None):
+        import openai
+        extra = {"response_format": response_format} if response_format else {}
+        await self.limiter.acquire()
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
+                temperature=temperature,
+                **extra,
+            )
+        except openai.RateLimitError as exc:
+            raise QuotaError(str(exc), _retry_after(exc.response)) from exc
+        except (openai.APIConnectionError, openai.InternalServerError) as exc:
+            raise TransientError(str(exc)) from exc
+        return response.choices[0].message.content
+
+    async def aclose(self):
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError, AttributeError):
+        return None
@@ -0,0 +1,153 @@
+# processing/fuzzy_match.py
+#
+# Blocked fuzzy matching for the zipcode fix in 02_merge_and_clean.ipynb.
+# The notebook used to score every target address against every source row
+# with fuzz.token_sort_ratio in a pandas apply. Here the addresses are
+# processed and deduplicated once, an inverted token index shortlists a few
+# likely sources per target (giving a lower bound on its best score), a
+# character-count bound rules out every source that cannot reach it, and
+# rapidfuzz scores the rest in C. Price tie-breaks are NumPy over the rows
+# behind the best addresses. The result is the same match the row-by-row
+# version picked.
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# thefuzz's force_ascii drops code points 128-255 (and only those)
+ASCII_ONLY = {i: None for i in range(128, 256)}
+
+
+def preprocess(text):
+    """What thefuzz does to both strings before scoring: full_process(force_ascii=True)."""
+    from rapidfuzz.utils import default_process
+
+    return default_process(str(text).translate(ASCII_ONLY))
+
+
+class TokenSortIndex:
+    """
+    Distinct processed source strings (`choices`) with an inverted token
+    index and per-choice character counts. best() gives, per query, the
+    rounded token_sort_ratio thefuzz would report for its best choice and
+    every choice at that score.
+
+    Tokens in more than `max_token_share` of the choices ("bandung",
+    "indonesia") are left out of the shortlist, which keeps the
+    `shortlist_size` choices sharing the most rare tokens with the query.
+    The best shortlisted score is a lower bound. The character counts give
+    an upper bound for every choice (token_sort_ratio is an Indel ratio of
+    the token-sorted strings, so their common subsequence is at most the
+    shared characters), and only choices that could reach the lower bound
+    are scored. Chunks of queries run on `workers` threads (default: one per
+    core; rapidfuzz and NumPy release the GIL).
+    """
+
+    def __init__(self, texts, max_token_share=0.05, shortlist_size=256, workers=None, chunk_size=256):
+        processed = [preprocess(text) for text in texts]
+        self.codes, uniques = pd.factorize(pd.Series(processed, dtype=object))
+        self.choices = list(uniques)
+        self.shortlist_size = shortlist_size
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+        postings = {}
+        for i, choice in enumerate(self.choices):
+            for token in set(choice.split()):
+                postings.setdefault(token, []).append(i)
+        limit = max(1, int(max_token_share * len(self.choices)))
+        self.postings = {token: np.array(ids) for token, ids in postings.items()}
+        self.rare = {token for token, ids in postings.items() if len(ids) <= limit}
+
+        joined = [" ".join(choice.split()) for choice in self.choices]
+        self.alphabet = {c: i for i, c in enumerate(sorted(set("".join(joined))))}
+        self.counts = np.zeros((len(joined), len(self.alphabet)), dtype=np.int32)
+        for i, text in enumerate(joined):
+            for c, n in Counter(text).items():
+                self.counts[i, self.alphabet[c]] = n
+        self.lengths = np.array([len(text) for text in joined])
+
+    def shortlist(self, query):
+        """Indexes of the choices sharing the most rare tokens with `query` (or its rarest token)."""
+        tokens = [t for t in set(query.split()) if t in self.postings]
+        if not tokens:
+            return np.array([], dtype=np.int64)
+        rare = [self.postings[t] for t in tokens if t in self.rare]
+        if not rare:
+            return self.postings[min(tokens, key=lambda t: len(self.postings[t]))][: self.shortlist_size]
+        ids, counts = np.unique(np.concatenate(rare), return_counts=True)
+        if len(ids) > self.shortlist_size:
+            ids = ids[np.argsort(-counts, kind="stable")[: self.shortlist_size]]
+        return ids
+
+    def upper_bounds(self, query):
+        """An upper bound on token_sort_ratio(query, choice) for every choice (100 for two empty strings)."""
+        joined = " ".join(query.split())
+        counts = np.zeros(len(self.alphabet), dtype=np.int32)
+        for c, n in Counter(joined).items():
+            if c in self.alphabet:
+                counts[self.alphabet[c]] = n
+        total = len(joined) + self.lengths
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bounds = 200.0 * np.minimum(self.counts, counts).sum(axis=1) / total
+        return np.where(total == 0, 100.0, bounds)
+
+    def _best_one(self, query):
+        from rapidfuzz import fuzz, process
+
+        def score(ids):
+            return np.rint(process.cdist([query], [self.choices[i] for i in ids], scorer=fuzz.token_sort_ratio,
+                                         dtype=np.float64)[0])
+
+        ids = self.shortlist(query)
+        bound = int(score(ids).max()) if len(ids) else 0
+        # A raw score of bound - 0.5 can still round to the bound; the epsilon absorbs float error
+        ids = np.flatnonzero(self.upper_bounds(query) >= bound - 0.5 - 1e-9)
+        scores = score(ids)
+        top = scores.max()
+        return int(top), ids[scores == top]
+
+    def best(self, queries):
+        """[(score, choice indexes)] for `queries` (already processed), in order."""
+        chunks = [queries[i:i + self.chunk_size] for i in range(0, len(queries), self.chunk_size)]
+
+        def run(chunk):
+            return [self._best_one(query) for query in chunk]
+
+        if self.workers > 1 and len(chunks) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(self.workers) as pool:
+                return [result for part in pool.map(run, chunks) for result in part]
+        return [result for chunk in chunks for result in run(chunk)]
+
+
+def match_nearest_price(target_texts, target_prices, source_texts, source_prices, **index_kwargs):
+    """
+    For each target, the position in the sources of its best
+    fuzz.token_sort_ratio match, ties broken by the smallest absolute price
+    difference (then by source order), and that score, as two arrays.
+    """
+    index = TokenSortIndex(source_texts, **index_kwargs)
+    source_prices = np.asarray(source_prices, dtype=float)
+    target_prices = np.asarray(target_prices, dtype=float)
+
+    # Source rows grouped by choice, in source order within each group
+    order = np.argsort(index.codes, kind="stable")
+    bounds = np.searchsorted(index.codes[order], np.arange(len(index.choices) + 1))
+
+    target_codes, queries = pd.factorize(pd.Series([preprocess(t) for t in target_texts], dtype=object))
+    best = index.best(list(queries))
+
+    positions = np.empty(len(target_codes), dtype=np.int64)
+    scores = np.empty(len(target_codes), dtype=np.int64)
+    for i, code in enumerate(target_codes):
+        score, choices = best[code]
+        rows = np.concatenate([order[bounds[c]:bounds[c + 1]] for c in choices])
+        if len(rows) > 1:
+            diffs = np.abs(source_prices[rows] - target_prices[i])
+            rows = rows[diffs == diffs.min()]
+        positions[i] = rows.min()
+        scores[i] = score
+    return positions, scores
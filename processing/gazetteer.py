@@ -0,0 +1,299 @@
+# processing/gazetteer.py
+#
+# Rule-based location extraction for Platform B listings. Most slugs and
+# descriptions already name a kecamatan, kelurahan or well-known complex
+# ("bojongsoang", "gedebage", "podomoro park"), so those rows do not need the
+# LLM. Names (the kecamatan below, the BPS ADM3/ADM4 names when the shapefile
+# is there, and a curated list of complexes and neighbourhoods) are compiled
+# into a token trie; each field is scanned once, longest match first, with a
+# fuzzy fallback for misspelled slug/address tokens. Matches vote for a
+# kecamatan, and the result carries a confidence so that only uncertain rows
+# go to the LLM (llm_parse.py).
+import difflib
+import re
+from collections import defaultdict
+
+KOTA_BANDUNG = "Kota Bandung"
+KAB_BANDUNG = "Kabupaten Bandung"
+KAB_BANDUNG_BARAT = "Kabupaten Bandung Barat"
+KOTA_CIMAHI = "Kota Cimahi"
+KAB_SUMEDANG = "Kabupaten Sumedang"
+
+# How a city appears at the end of a geocoding string
+CITY_LABELS = {
+    KOTA_BANDUNG: "bandung",
+    KAB_BANDUNG: "kabupaten bandung",
+    KAB_BANDUNG_BARAT: "bandung barat",
+    KOTA_CIMAHI: "cimahi",
+    KAB_SUMEDANG: "sumedang",
+}
+
+# (name, city, other spellings); every multi-word name also matches written as one word
+KECAMATAN = [
+    ("Andir", KOTA_BANDUNG, ()),
+    ("Antapani", KOTA_BANDUNG, ()),
+    ("Arcamanik", KOTA_BANDUNG, ()),
+    ("Astanaanyar", KOTA_BANDUNG, ("Astana Anyar",)),
+    ("Babakan Ciparay", KOTA_BANDUNG, ()),
+    ("Bandung Kidul", KOTA_BANDUNG, ()),
+    ("Bandung Kulon", KOTA_BANDUNG, ()),
+    ("Bandung Wetan", KOTA_BANDUNG, ()),
+    ("Batununggal", KOTA_BANDUNG, ()),
+    ("Bojongloa Kaler", KOTA_BANDUNG, ()),
+    ("Bojongloa Kidul", KOTA_BANDUNG, ()),
+    ("Buahbatu", KOTA_BANDUNG, ("Buah Batu",)),
+    ("Cibeunying Kaler", KOTA_BANDUNG, ()),
+    ("Cibeunying Kidul", KOTA_BANDUNG, ()),
+    ("Cibiru", KOTA_BANDUNG, ()),
+    ("Cicendo", KOTA_BANDUNG, ()),
+    ("Cidadap", KOTA_BANDUNG, ()),
+    ("Cinambo", KOTA_BANDUNG, ()),
+    ("Coblong", KOTA_BANDUNG, ()),
+    ("Gedebage", KOTA_BANDUNG, ("Gede Bage",)),
+    ("Kiaracondong", KOTA_BANDUNG, ("Kiara Condong",)),
+    ("Lengkong", KOTA_BANDUNG, ()),
+    ("Mandalajati", KOTA_BANDUNG, ("Mandala Jati",)),
+    ("Panyileukan", KOTA_BANDUNG, ()),
+    ("Rancasari", KOTA_BANDUNG, ("Ranca Sari",)),
+    ("Regol", KOTA_BANDUNG, ()),
+    ("Sukajadi", KOTA_BANDUNG, ()),
+    ("Sukasari", KOTA_BANDUNG, ()),
+    ("Sumur Bandung", KOTA_BANDUNG, ()),
+    ("Ujungberung", KOTA_BANDUNG, ("Ujung Berung",)),
+    # Outside the city, but common in Bandung listings
+    ("Baleendah", KAB_BANDUNG, ("Bale Endah",)),
+    ("Bojongsoang", KAB_BANDUNG, ("Bojong Soang",)),
+    ("Cileunyi", KAB_BANDUNG, ()),
+    ("Cilengkrang", KAB_BANDUNG, ()),
+    ("Cimenyan", KAB_BANDUNG, ()),
+    ("Dayeuhkolot", KAB_BANDUNG, ("Dayeuh Kolot",)),
+    ("Katapang", KAB_BANDUNG, ()),
+    ("Margaasih", KAB_BANDUNG, ("Marga Asih",)),
+    ("Margahayu", KAB_BANDUNG, ()),
+    ("Rancaekek", KAB_BANDUNG, ()),
+    ("Soreang", KAB_BANDUNG, ()),
+    ("Lembang", KAB_BANDUNG_BARAT, ()),
+    ("Ngamprah", KAB_BANDUNG_BARAT, ()),
+    ("Padalarang", KAB_BANDUNG_BARAT, ()),
+    ("Parongpong", KAB_BANDUNG_BARAT, ()),
+    ("Cimahi Selatan", KOTA_CIMAHI, ()),
+    ("Cimahi Tengah", KOTA_CIMAHI, ()),
+    ("Cimahi Utara", KOTA_CIMAHI, ()),
+    ("Jatinangor", KAB_SUMEDANG, ()),
+]
+
+# Curated complexes and neighbourhood names: (name, level, kecamatan, other spellings).
+# Extend as new names show up among the rows that fall through to the LLM.
+PLACES = [
+    ("Podomoro Park", "complex", "Bojongsoang", ()),
+    ("Summarecon Bandung", "complex", "Gedebage", ("Summarecon",)),
+    ("Kota Baru Parahyangan", "complex", "Padalarang", ("Kotabaru Parahyangan", "KBP")),
+    ("Taman Kopo Indah", "complex", "Margahayu", ("TKI",)),
+    ("Batununggal Indah", "complex", "Bandung Kidul", ("Komplek Batununggal", "Komp Batununggal")),
+    ("Setra Duta", "complex", "Cidadap", ()),
+    ("Singgasana Pradana", "complex", "Bojongloa Kidul", ("Singgasana",)),
+    ("Arcamanik Endah", "complex", "Arcamanik", ()),
+    ("Bumi Adipura", "complex", "Gedebage", ()),
+    ("Grand Sharon", "complex", "Rancasari", ()),
+    ("Margahayu Raya", "complex", "Buahbatu", ()),
+    ("Resort Dago Pakar", "complex", "Cimenyan", ("Dago Pakar",)),
+    ("Dago", "area", "Coblong", ()),
+    ("Pasteur", "area", "Sukajadi", ()),
+    ("Setiabudi", "area", "Sukasari", ("Setiabudhi",)),
+    ("Gegerkalong", "area", "Sukasari", ("Geger Kalong",)),
+    ("Ciumbuleuit", "area", "Cidadap", ()),
+    ("Cigadung", "area", "Cibeunying Kaler", ()),
+    ("Cikutra", "area", "Cibeunying Kidul", ()),
+    ("Turangga", "area", "Lengkong", ()),
+    ("Ciwastra", "area", "Buahbatu", ()),
+    ("Kopo", "area", "Bojongloa Kaler", ()),
+    ("Cisaranten", "area", "Arcamanik", ()),
+    ("Mekarwangi", "area", "Bojongloa Kidul", ("Mekar Wangi",)),
+]
+
+LEVEL_SCORES = {"complex": 1.0, "kelurahan": 0.85, "area": 0.75, "kecamatan": 0.6}
+# Slugs and addresses name the listing's own location; descriptions also name what is nearby
+FIELD_WEIGHTS = {"id": 1.0, "address": 1.0, "description": 0.7}
+# A name right after one of these ("dekat summarecon", "5 menit ke dago") is a landmark
+PROXIMITY_WORDS = {"dekat", "dkt", "dekt", "near", "akses", "menuju", "ke", "sebelah", "samping", "belakang",
+                   "depan", "seberang", "menit"}
+PROXIMITY_PENALTY = 0.5
+# Common listing words, never fuzzy-matched to a place name
+STOPWORDS = {"rumah", "dijual", "bandung", "strategis", "minimalis", "lantai", "furnished", "unfurnished",
+             "mainroad", "terawat", "perumahan", "komplek", "cluster", "kavling", "apartemen", "residence",
+             "regency", "lokasi", "nyaman", "bangunan", "lingkungan", "kabupaten", "selatan", "tengah"}
+STREET_WORDS = {"jl", "jln", "jalan"}
+# "akses jalan besar", "pinggir jalan raya": not a street name on their own
+STREET_GENERIC = {"raya", "utama", "besar", "lebar", "masuk", "tol", "mobil", "kaki", "lingkungan", "dan"}
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    if text is None or text != text:  # None or NaN
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def alias_tokens(name):
+    """Token sequences `name` is matched by: as written, and (multi-word names) as one word."""
+    tokens = tuple(tokenize(name))
+    return {tokens, ("".join(tokens),)} if len(tokens) > 1 else {tokens}
+
+
+class Gazetteer:
+    """
+    Place names compiled into a token trie. extract() turns a listing
+    ({"id", "address", "description"}) into a geocoding string and a
+    confidence in [0, 1]; rows below the notebook's threshold go to the LLM.
+
+    Unmatched slug/address tokens of `min_fuzzy_length`+ characters are
+    compared to the one-word names with difflib (ratio >= `fuzzy_cutoff`,
+    scaled into the score); results are memoized per token.
+    """
+
+    def __init__(self, fuzzy_cutoff=0.88, min_fuzzy_length=6):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.min_fuzzy_length = min_fuzzy_length
+        self.entries = []
+        self.trie = {}
+        self._known = {}
+        self._fuzzy_names = defaultdict(set)
+        self._fuzzy_cache = {}
+
+    @classmethod
+    def bandung(cls, polygons=None, **kwargs):
+        """
+        The built-in kecamatan and curated places, plus every ADM3/ADM4 name
+        in `polygons` (admin_geocoder.load_admin_polygons) when given.
+        """
+        gazetteer = cls(**kwargs)
+        cities = {}
+        for name, city, aliases in KECAMATAN:
+            gazetteer.add(name, "kecamatan", name, city, aliases)
+            cities[name] = city
+        for name, level, kecamatan, aliases in PLACES:
+            gazetteer.add(name, level, kecamatan, cities[kecamatan], aliases)
+        if polygons is not None:
+            names = polygons[["ADM2_EN", "ADM3_EN", "ADM4_EN"]].drop_duplicates()
+            for city, kecamatan, kelurahan in names.itertuples(index=False):
+                gazetteer.add(kecamatan, "kecamatan", kecamatan, city)
+                gazetteer.add(kelurahan, "kelurahan", kecamatan, city)
+        return gazetteer
+
+    def add(self, name, level, kecamatan, city, aliases=()):
+        """Adds a place (once per name, level and kecamatan). Returns its index in self.entries."""
+        ident = (name.lower(), level, kecamatan.lower())
+        if ident in self._known:
+            return self._known[ident]
+        index = len(self.entries)
+        self.entries.append({"name": name, "level": level, "kecamatan": kecamatan, "city": city})
+        self._known[ident] = index
+        for alias in (name,) + tuple(aliases):
+            for tokens in alias_tokens(alias):
+                node = self.trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                targets = node.setdefault(None, [])
+                if index not in targets:
+                    targets.append(index)
+                if len(tokens) == 1 and len(tokens[0]) >= self.min_fuzzy_length:
+                    self._fuzzy_names[tokens[0][0]].add(tokens[0])
+        self._fuzzy_cache.clear()
+        return index
+
+    def _fuzzy(self, token):
+        """(entry indexes, similarity) for the closest one-word name, or None."""
+        if token not in self._fuzzy_cache:
+            match = difflib.get_close_matches(token, self._fuzzy_names.get(token[0], ()), n=1,
+                                              cutoff=self.fuzzy_cutoff)
+            self._fuzzy_cache[token] = None
+            if match:
+                ratio = difflib.SequenceMatcher(None, token, match[0]).ratio()
+                self._fuzzy_cache[token] = (self.trie[match[0]][None], ratio)
+        return self._fuzzy_cache[token]
+
+    def matches(self, tokens, field):
+        """(entry indexes, score) for each name found in `tokens`, scanning left to right, longest match first."""
+        weight = FIELD_WEIGHTS[field]
+        fuzzy = field != "description"
+        found = []
+        i = 0
+        while i < len(tokens):
+            node, end, targets = self.trie, i, None
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if None in node:
+                    end, targets = j + 1, node[None]
+            score = weight
+            if targets is None and fuzzy and len(tokens[i]) >= self.min_fuzzy_length \
+                    and tokens[i] not in STOPWORDS and not tokens[i].isdigit():
+                hit = self._fuzzy(tokens[i])
+                if hit:
+                    targets, ratio = hit
+                    end, score = i + 1, weight * ratio
+            if targets is None:
+                i += 1
+                continue
+            if PROXIMITY_WORDS.intersection(tokens[max(0, i - 2):i]):
+                score *= PROXIMITY_PENALTY
+            found.append((targets, score))
+            i = end
+        return found
+
+    def extract(self, listing):
+        """
+        {"geo_string", "confidence", "level", "kecamatan"} for one listing.
+        Each match votes for its kecamatan; the best-scoring place there
+        names the result, and confidence is its score times the kecamatan's
+        share of all votes (+0.1 when two or more fields agree).
+        """
+        votes = defaultdict(float)
+        fields = defaultdict(set)
+        best = {}
+        street = None
+        for field in ("id", "address", "description"):
+            tokens = tokenize(listing.get(field))
+            if street is None and field != "description":
+                street = self._street(tokens)
+            for targets, score in self.matches(tokens, field):
+                for index in targets:
+                    entry = self.entries[index]
+                    share = score * LEVEL_SCORES[entry["level"]] / len(targets)
+                    district = (entry["kecamatan"], entry["city"])
+                    votes[district] += share
+                    fields[district].add(field)
+                    if share > best.get(district, (0, None))[0]:
+                        best[district] = (share, entry)
+        if not votes:
+            return {"geo_string": None, "confidence": 0.0, "level": None, "kecamatan": None}
+
+        district = max(votes, key=votes.get)
+        score, entry = best[district]
+        confidence = score * votes[district] / sum(votes.values())
+        if len(fields[district]) > 1:
+            confidence += 0.1
+        kecamatan, city = district
+        parts = [street, entry["name"] if entry["level"] != "kecamatan" else None, kecamatan,
+                 CITY_LABELS.get(city, city)]
+        geo_string = ", ".join(dict.fromkeys(p.lower() for p in parts if p))
+        return {"geo_string": geo_string, "confidence": round(min(confidence, 1.0), 3),
+                "level": entry["level"], "kecamatan": kecamatan}
+
+    def extract_all(self, listings):
+        return [self.extract(listing) for listing in listings]
+
+    @staticmethod
+    def _street(tokens):
+        """'jl. <name>' from a slug or address: up to three words after jl/jln/jalan, stopping at a number."""
+        for i, token in enumerate(tokens):
+            if token in STREET_WORDS:
+                name = []
+                for word in tokens[i + 1:i + 4]:
+                    if word.isdigit() or word in STREET_WORDS or word in STOPWORDS or word in PROXIMITY_WORDS:
+                        break
+                    name.append(word)
+                if set(name) - STREET_GENERIC:
+                    return "jl. " + " ".join(name)
+        return None
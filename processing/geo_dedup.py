@@ -0,0 +1,204 @@
+# processing/geo_dedup.py
+#
+# Stage C of 03_deduplicate.ipynb: listings chained together within a radius
+# (the clusters DBSCAN finds with min_samples=2) that have the same price,
+# land size and building size are one property; the first is kept. The
+# notebook built a shapely Point per row, reprojected through GeoPandas,
+# ran DBSCAN and then masked the whole frame once per cluster.
+#
+# With min_samples=2 every point that has a neighbour is a core point, so
+# DBSCAN's clusters are exactly the connected components of the "within
+# radius" graph and its noise points are the isolated ones. Here the pairs
+# come from a grid hash (radius-sized cells, each point compared only with
+# the 3x3 cells around it), components from scipy's connected_components,
+# and survivors from one duplicated() over (cluster, price, land, building).
+# Distances are Euclidean in EPSG:3857 metres, as the notebook measured
+# them (not great-circle metres), so the survivors are the same.
+#
+# GeoDedupIndex keeps every listing seen so far in that grid, so a new
+# batch is checked against the history without clustering it again.
+import numpy as np
+import pandas as pd
+
+from .datastore import load_stage, save_stage
+
+EARTH_RADIUS_M = 6378137.0   # EPSG:3857's sphere
+KEY_COLUMNS = ['price', 'land_size_sqm', 'building_size_sqm']
+CELL_SPAN = 1 << 32          # cell key = column * CELL_SPAN + row
+MAX_PAIRS = 1 << 22          # candidate pairs compared at once
+
+
+def web_mercator(lats, lons):
+    """EPSG:3857 x and y (metres) of WGS84 coordinates."""
+    lats = np.radians(np.asarray(lats, dtype=float))
+    lons = np.radians(np.asarray(lons, dtype=float))
+    return EARTH_RADIUS_M * lons, EARTH_RADIUS_M * np.log(np.tan(np.pi / 4 + lats / 2))
+
+
+def cell_keys(x, y, size):
+    return np.floor(x / size).astype(np.int64) * CELL_SPAN + np.floor(y / size).astype(np.int64)
+
+
+class PointGrid:
+    """Points bucketed into `size`-metre cells, sorted by cell for searchsorted lookups."""
+
+    def __init__(self, x, y, size):
+        self.size = size
+        keys = cell_keys(x, y, size)
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+        self.x = np.asarray(x, dtype=float)[self.order]
+        self.y = np.asarray(y, dtype=float)[self.order]
+
+    def pairs(self, x, y, radius):
+        """(query, point) index arrays for every grid point within `radius` of a query point."""
+        query_keys = cell_keys(x, y, self.size)
+        found_query, found_point = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                target = query_keys + dx * CELL_SPAN + dy
+                lo = np.searchsorted(self.keys, target, 'left')
+                counts = np.searchsorted(self.keys, target, 'right') - lo
+                hit = np.flatnonzero(counts)
+                ends = np.cumsum(counts[hit])
+                start = 0
+                while start < len(hit):
+                    # As many queries as fit in MAX_PAIRS candidates (at least one)
+                    done = ends[start - 1] if start else 0
+                    stop = max(start + 1, int(np.searchsorted(ends, done + MAX_PAIRS, 'right')))
+                    chunk = hit[start:stop]
+                    query = np.repeat(chunk, counts[chunk])
+                    # Each candidate's position within its query's run of points in the target cell
+                    within = np.arange(len(query)) - np.repeat(ends[start:stop] - done - counts[chunk], counts[chunk])
+                    point = lo[query] + within
+                    close = (x[query] - self.x[point]) ** 2 + (y[query] - self.y[point]) ** 2 <= radius * radius
+                    found_query.append(query[close])
+                    found_point.append(self.order[point[close]])
+                    start = stop
+        if not found_query:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        return np.concatenate(found_query), np.concatenate(found_point)
+
+
+def _keys_frame(df):
+    """The numeric price/land/building key of each row (NaN equal to NaN, as in drop_duplicates)."""
+    return pd.DataFrame({column: pd.to_numeric(df[column], errors='coerce').astype(float).to_numpy()
+                         for column in KEY_COLUMNS})
+
+
+class GeoDedupIndex:
+    """
+    Every listing with coordinates seen so far, kept or not (a dropped
+    listing still chains its neighbours into one cluster), with its cluster
+    label and price/size key. add() checks a new batch against it: the
+    result is what geospatial_deduplication gives on all batches so far,
+    concatenated in order, without clustering the history again. Save it
+    with save() and reopen it with load() and the same radius.
+    """
+
+    def __init__(self, radius_m=100):
+        self.radius = radius_m
+        self.ids = np.array([], dtype=object)
+        self.x = np.array([], dtype=float)
+        self.y = np.array([], dtype=float)
+        self.labels = np.array([], dtype=np.int64)
+        self.keys = _keys_frame(pd.DataFrame({column: [] for column in KEY_COLUMNS}))
+        self.kept = np.array([], dtype=bool)
+        self.grid = PointGrid(self.x, self.y, radius_m)
+
+    def __len__(self):
+        return len(self.x)
+
+    def add(self, df):
+        """
+        Adds the listings of `df` (in order, after everything already in the
+        index). Returns (keep, dropped): a boolean array over `df`, True for
+        the listings to keep (always for rows without coordinates), and the
+        ids of earlier listings that are now duplicates because the batch
+        joined their cluster to one with an earlier identical listing.
+        """
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        lats = pd.to_numeric(df['latitude'], errors='coerce').astype(float).to_numpy()
+        lons = pd.to_numeric(df['longitude'], errors='coerce').astype(float).to_numpy()
+        rows = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+        keep = np.ones(len(df), dtype=bool)
+        if not len(rows):
+            return keep, []
+        x, y = web_mercator(lats[rows], lons[rows])
+
+        # Graph nodes: the clusters already in the index, then the batch's distinct coordinates
+        coords, first = np.unique(np.column_stack([x, y]), axis=0, return_inverse=True)
+        first = first.ravel()
+        n_labels = int(self.labels.max()) + 1 if len(self.labels) else 0
+        to_old, old = self.grid.pairs(coords[:, 0], coords[:, 1], self.radius)
+        batch_grid = PointGrid(coords[:, 0], coords[:, 1], self.radius)
+        a, b = batch_grid.pairs(coords[:, 0], coords[:, 1], self.radius)
+        heads = np.concatenate([self.labels[old], n_labels + a[a < b]])
+        tails = np.concatenate([n_labels + to_old, n_labels + b[a < b]])
+        size = n_labels + len(coords)
+        graph = coo_matrix((np.ones(len(heads), dtype=np.int8), (heads, tails)), shape=(size, size))
+        _, component = connected_components(graph, directed=False)
+
+        labels = component[n_labels + first]
+        self.labels = component[self.labels]
+        # Only clusters the batch touches can change; re-check them in insertion order
+        touched = np.flatnonzero(np.isin(self.labels, labels))
+        check = pd.concat([self.keys.iloc[touched], _keys_frame(df.iloc[rows])], ignore_index=True)
+        check.insert(0, 'cluster', np.concatenate([self.labels[touched], labels]))
+        kept = ~check.duplicated(keep='first').to_numpy()
+        was_kept = self.kept[touched]
+        dropped = list(self.ids[touched[was_kept & ~kept[:len(touched)]]])
+        self.kept[touched] = kept[:len(touched)]
+        keep[rows] = kept[len(touched):]
+
+        ids = df['id'].to_numpy(dtype=object)[rows] if 'id' in df.columns else np.full(len(rows), None, dtype=object)
+        self.ids = np.concatenate([self.ids, ids])
+        self.x, self.y = np.concatenate([self.x, x]), np.concatenate([self.y, y])
+        self.labels = np.concatenate([self.labels, labels])
+        self.keys = pd.concat([self.keys, _keys_frame(df.iloc[rows])], ignore_index=True)
+        self.kept = np.concatenate([self.kept, keep[rows]])
+        self.grid = PointGrid(self.x, self.y, self.radius)
+        return keep, dropped
+
+    def save(self, path):
+        save_stage(pd.DataFrame({
+            'id': pd.Series(self.ids, dtype=object), 'x': self.x, 'y': self.y, 'cluster': self.labels,
+            'key_price': self.keys['price'].to_numpy(), 'key_land': self.keys['land_size_sqm'].to_numpy(),
+            'key_building': self.keys['building_size_sqm'].to_numpy(), 'kept': self.kept,
+        }), path)
+
+    @classmethod
+    def load(cls, path, radius_m=100):
+        saved = load_stage(path)  # memory-mapped: copy what add() updates in place
+        index = cls(radius_m)
+        index.ids = saved['id'].to_numpy(dtype=object)
+        index.x = saved['x'].to_numpy(dtype=float)
+        index.y = saved['y'].to_numpy(dtype=float)
+        index.labels = saved['cluster'].to_numpy(dtype=np.int64, copy=True)
+        index.keys = pd.DataFrame({'price': saved['key_price'].to_numpy(dtype=float),
+                                   'land_size_sqm': saved['key_land'].to_numpy(dtype=float),
+                                   'building_size_sqm': saved['key_building'].to_numpy(dtype=float)})
+        index.kept = saved['kept'].to_numpy(dtype=bool, copy=True)
+        index.grid = PointGrid(index.x, index.y, radius_m)
+        return index
+
+
+def geospatial_deduplication(df, cluster_radius_m=100):
+    """
+    Drops listings that have the same price, land and building size as an
+    earlier listing in their cluster (listings chained within
+    `cluster_radius_m` metres); listings without coordinates are kept. Like
+    the notebook's DBSCAN version, the survivors come first and the rows
+    without coordinates (numeric columns coerced) are appended; survivors
+    keep their input order rather than the order of a Python set.
+    """
+    gdf = df.copy()
+    for column in ['latitude', 'longitude'] + KEY_COLUMNS:
+        gdf[column] = pd.to_numeric(gdf[column], errors='coerce')
+    can_cluster = (gdf['latitude'].notna() & gdf['longitude'].notna()).to_numpy()
+    if not can_cluster.any():
+        return df
+    keep, _ = GeoDedupIndex(cluster_radius_m).add(gdf)
+    return pd.concat([df[can_cluster & keep], gdf[~can_cluster]], ignore_index=True)
@@ -0,0 +1,196 @@
+# processing/geocache.py
+#
+# On-disk cache of Google Maps geocoding responses, so re-running
+# 01_geocode.ipynb on a refreshed crawl only pays for locations it has not
+# looked up before. Reverse lookups are keyed by coordinates rounded to a
+# fixed precision, forward lookups by the normalized query string (plus the
+# request parameters). The full response is stored, so cached entries can be
+# exported as fixtures and replayed without an API key.
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+def normalize_query(query):
+    """Lowercase, single spaces, no space before commas: 'Jl. Dago ,  Bandung' -> 'jl. dago, bandung'."""
+    query = re.sub(r"\s+", " ", str(query).strip().lower())
+    return re.sub(r"\s*,\s*", ", ", query)
+
+
+def round_coordinates(lat, lon, precision):
+    return round(float(lat), precision), round(float(lon), precision)
+
+
+class GeocodeCache:
+    """
+    SQLite table responses(kind, key, response, fetched_at), kind being
+    'reverse' or 'forward' (llm_parse.py keeps its results here too, as
+    'llm:<model>'). Entries older than `ttl_days` count as misses (and are
+    overwritten by the next put). Safe to share between the notebook's
+    worker threads; hit/miss counts are kept in `self.stats`.
+    """
+
+    def __init__(self, path, ttl_days=180):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stored": 0}
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, response TEXT NOT NULL, fetched_at REAL NOT NULL, "
+            "PRIMARY KEY (kind, key))"
+        )
+        self.conn.commit()
+
+    def get(self, kind, key):
+        """The cached response, or None on a miss or an expired entry."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, fetched_at FROM responses WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            if self.ttl is not None and time.time() - row[1] > self.ttl:
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, kind, key, response, fetched_at=None):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (kind, key, response, fetched_at) VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(response, ensure_ascii=False), time.time() if fetched_at is None else fetched_at),
+            )
+            self.conn.commit()
+            self.stats["stored"] += 1
+
+    def responses(self, kind=None):
+        """Every cached response (expired ones included), without touching the hit/miss counts."""
+        query = "SELECT response FROM responses" + (" WHERE kind = ?" if kind else "")
+        with self._lock:
+            rows = self.conn.execute(query, (kind,) if kind else ()).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def report(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        rate = self.stats["hits"] / lookups if lookups else 0.0
+        return (f"Geocode cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+                f"({self.stats['expired']} expired), {rate:.0%} hit rate, {len(self)} entries in {self.path}")
+
+    def export_fixtures(self, path, kind=None):
+        """Writes the cached entries as JSON lines ({kind, key, response, fetched_at}). Returns the count."""
+        query = "SELECT kind, key, response, fetched_at FROM responses"
+        params = ()
+        if kind:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        count = 0
+        with self._lock, open(path, "w", encoding="utf-8") as f:
+            for kind_, key, response, fetched_at in self.conn.execute(query + " ORDER BY kind, key", params):
+                f.write(json.dumps({"kind": kind_, "key": key, "response": json.loads(response),
+                                    "fetched_at": fetched_at}, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+    def import_fixtures(self, path):
+        """Loads entries written by export_fixtures (keeping their fetch times). Returns the count."""
+        count = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.put(entry["kind"], entry["key"], entry["response"], entry.get("fetched_at"))
+                    count += 1
+        return count
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class CachedGeocoder:
+    """
+    Cache in front of a geocoding client with reverse_geocode(latlng, **params)
+    and geocode(address, **params) methods that return the Geocoding API's
+    `results` list. The notebooks and stages use enrich.GoogleGeocoder, whose
+    methods are coroutines, through areverse_geocode and ageocode; it does its
+    own rate limiting. reverse_geocode and geocode are the same for a
+    synchronous client, sleeping `rate_limit` seconds before each real API
+    call only, so cache hits cost nothing.
+
+    With client=None it replays the cache only (e.g. from imported fixtures)
+    and raises LookupError for anything not cached.
+    """
+
+    def __init__(self, client, cache, precision=5, rate_limit=0.0):
+        self.client = client
+        self.cache = cache
+        self.precision = precision
+        self.rate_limit = rate_limit
+
+    def reverse_key(self, lat, lon):
+        lat, lon = round_coordinates(lat, lon, self.precision)
+        return f"{lat:.{self.precision}f},{lon:.{self.precision}f}"
+
+    @staticmethod
+    def forward_key(address, params):
+        return normalize_query(address) + ("|" + json.dumps(params, sort_keys=True) if params else "")
+
+    def _reverse_request(self, latlng, params):
+        # The rounded point is what gets sent, so the cached answer is exactly the one for the key
+        point = round_coordinates(latlng[0], latlng[1], self.precision)
+        key = self.reverse_key(*point) + ("|" + json.dumps(params, sort_keys=True) if params else "")
+        return key, point
+
+    def reverse_geocode(self, latlng, **params):
+        key, point = self._reverse_request(latlng, params)
+        return self._lookup("reverse", key, lambda: self.client.reverse_geocode(point, **params))
+
+    def geocode(self, address, **params):
+        key = self.forward_key(address, params)
+        return self._lookup("forward", key, lambda: self.client.geocode(address, **params))
+
+    async def areverse_geocode(self, latlng, **params):
+        key, point = self._reverse_request(latlng, params)
+        return await self._alookup("reverse", key, lambda: self.client.reverse_geocode(point, **params))
+
+    async def ageocode(self, address, **params):
+        key = self.forward_key(address, params)
+        return await self._alookup("forward", key, lambda: self.client.geocode(address, **params))
+
+    def _cached(self, kind, key):
+        response = self.cache.get(kind, key)
+        if response is None and self.client is None:
+            raise LookupError(f"No cached {kind} geocode for {key!r}")
+        return response
+
+    def _lookup(self, kind, key, fetch):
+        response = self._cached(kind, key)
+        if response is not None:
+            return response
+        if self.rate_limit:
+            time.sleep(self.rate_limit)
+        # Errors propagate uncached; empty results ([]) are real answers and are cached
+        response = fetch()
+        self.cache.put(kind, key, response)
+        return response
+
+    async def _alookup(self, kind, key, fetch):
+        response = self._cached(kind, key)
+        if response is not None:
+            return response
+        response = await fetch()
+        self.cache.put(kind, key, response)
+        return response
@@ -0,0 +1,153 @@
+# processing/llm_parse.py
+#
+# Batched LLM parsing of Platform B listings into geocoding strings. Inputs
+# are normalized and hashed, so reposted ads (same text, different phone
+# number or spacing) are parsed once; many listings go into one
+# structured-output request, each tagged with its position in the batch
+# (a few tokens, where echoing the hash back would cost ~10 completion
+# tokens per listing); results are cached on disk by hash, so only new
+# inputs ever reach the model.
+import hashlib
+import json
+import re
+
+from .enrich import QuotaError, TransientError, enrich
+
+# Appended to the single-listing prompt when listings are sent in batches
+BATCH_INSTRUCTIONS = """
+You will receive a JSON array of listings, each with a numeric `key`. Apply the rules above
+to every listing separately and return one entry per listing in `results`, with the same
+`key` and the final string in `geo_string`.
+"""
+
+RESULT_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "geocoding_strings",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"key": {"type": "integer"}, "geo_string": {"type": "string"}},
+                        "required": ["key", "geo_string"],
+                        "additionalProperties": False,
+                    },
+                }
+            },
+            "required": ["results"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+PHONE_RE = re.compile(r"(\+62|\b0)8[\d\s\-.]{7,14}\d")
+URL_RE = re.compile(r"https?://\S+|www\.\S+")
+# Listing numbers (e.g. the tail of a Platform B id) differ between reposts of one ad
+LONG_NUMBER_RE = re.compile(r"\b\d{7,}\b")
+SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(value, max_chars=None):
+    """Lowercase, no phone numbers, URLs or listing numbers, single spaces; '' for missing values."""
+    if value is None or value != value:  # None or NaN
+        return ""
+    text = LONG_NUMBER_RE.sub(" ", URL_RE.sub(" ", PHONE_RE.sub(" ", str(value).lower())))
+    text = SPACE_RE.sub(" ", text).strip()
+    return text[:max_chars] if max_chars else text
+
+
+def listing_key(listing, salt=""):
+    """Hash of the normalized listing; `salt` (from the prompt) keeps results of other prompts apart."""
+    payload = json.dumps([salt, listing["id"], listing["address"], listing["description"]], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+
+class ListingParser:
+    """
+    Turns listings ({"id", "address", "description"}) into geocoding strings
+    with `chat` (an enrich.OpenAIChat), `batch_size` listings per request.
+
+    Results are cached in `cache` (a geocache.GeocodeCache, kind "llm:<model>")
+    by listing_key. Listings the model skips or a batch that fails come back
+    as `default` and are not cached, so the next run retries them.
+    """
+
+    def __init__(self, chat, cache, system_prompt, batch_size=25, concurrency=8, limiter=None,
+                 max_description_chars=1500, default="api_error"):
+        self.chat = chat
+        self.cache = cache
+        self.system_prompt = system_prompt.rstrip() + "\n" + BATCH_INSTRUCTIONS
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.limiter = limiter
+        self.max_description_chars = max_description_chars
+        self.default = default
+        self.kind = f"llm:{chat.model}"
+        self.salt = hashlib.sha256(self.system_prompt.encode("utf-8")).hexdigest()[:12]
+        self.stats = {"rows": 0, "unique": 0, "cached": 0, "requests": 0, "parsed": 0, "missing": 0}
+
+    def normalize(self, listing):
+        return {
+            "id": normalize_text(listing.get("id")),
+            "address": normalize_text(listing.get("address")),
+            "description": normalize_text(listing.get("description"), self.max_description_chars),
+        }
+
+    async def parse(self, listings):
+        """Geocoding strings for `listings`, in order."""
+        normalized = [self.normalize(listing) for listing in listings]
+        keys = [listing_key(listing, self.salt) for listing in normalized]
+        unique = dict(zip(keys, normalized))
+        self.stats["rows"] += len(listings)
+        self.stats["unique"] += len(unique)
+
+        results = {}
+        for key in unique:
+            cached = self.cache.get(self.kind, key)
+            if cached is not None:
+                results[key] = cached
+        self.stats["cached"] += len(results)
+
+        todo = [key for key in unique if key not in results]
+        batches = [tuple(todo[i:i + self.batch_size]) for i in range(0, len(todo), self.batch_size)]
+        if batches:
+            batch_results = await enrich(batches, lambda batch: self._parse_batch(batch, unique),
+                                         concurrency=self.concurrency, limiter=self.limiter,
+                                         default={}, desc="AI Parse (batches)")
+            for parsed in batch_results.values():
+                results.update(parsed)
+        return [results.get(key, self.default) for key in keys]
+
+    async def _parse_batch(self, batch, listings):
+        # The model sees each listing's index in the batch; it is mapped back to the hash here
+        payload = json.dumps([{"key": i, **listings[key]} for i, key in enumerate(batch)], ensure_ascii=False)
+        self.stats["requests"] += 1
+        try:
+            content = await self.chat.complete(self.system_prompt, payload, response_format=RESULT_SCHEMA)
+            entries = json.loads(content)["results"]
+        except (QuotaError, TransientError):
+            raise
+        except (ValueError, KeyError, TypeError) as exc:
+            print(f"AI Parse Error: unusable batch response ({exc})")
+            return {}
+
+        parsed = {}
+        for entry in entries:
+            index, geo_string = entry.get("key"), entry.get("geo_string")
+            if (isinstance(index, int) and not isinstance(index, bool) and 0 <= index < len(batch)
+                    and isinstance(geo_string, str) and geo_string.strip()):
+                key = batch[index]
+                parsed[key] = geo_string.strip().lower()
+                self.cache.put(self.kind, key, parsed[key])
+        self.stats["parsed"] += len(parsed)
+        self.stats["missing"] += len(batch) - len(parsed)
+        return parsed
+
+    def report(self):
+        s = self.stats
+        return (f"AI Parse: {s['rows']} rows, {s['unique']} distinct inputs, {s['cached']} cached, "
+                f"{s['parsed']} parsed in {s['requests']} requests, {s['missing']} missing")
@@ -0,0 +1,302 @@
+# processing/near_dup.py
+#
+# Stage D of 03_deduplicate.ipynb: the same house posted by different
+# agents. Stages A-C only catch exact ids, exact price + address and
+# identical price/sizes within 100 m; a repost usually has its own id, a
+# slightly different price, a rewritten address or no coordinates at all,
+# but the same description text (give or take a phone number and a line).
+#
+# Descriptions are tokenized with pyarrow (lowercase, no phone numbers,
+# URLs or listing numbers) into word 3-gram shingles, slugs into their place
+# words, both hashed to stable 64-bit values and MinHashed with NumPy.
+# LSH banding of the description signatures gives the candidate pairs in
+# one sort per band; a pair is a duplicate when its estimated text
+# similarity is high enough and its numbers agree (NUMERIC_RULES). Groups
+# are the connected components of those pairs and the first listing of each
+# group is kept. Signatures are kept in NearDupIndex, so a new batch only
+# hashes its own listings.
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from .datastore import load_stage, save_stage
+from .gazetteer import STOPWORDS
+from .llm_parse import LONG_NUMBER_RE, PHONE_RE, URL_RE
+
+NUM_PERM = 72                    # description signature length
+BANDS, ROWS = 24, 3              # LSH banding of it (candidates from ~0.35 similarity, 96% of pairs at 0.5)
+SLUG_PERM = 32
+SHINGLE_SIZE = 3                 # words per description shingle
+MAX_BUCKET = 50                  # larger LSH buckets (boilerplate) only pair each listing with...
+WINDOW = 10                      # ...its next WINDOW listings by price
+# Duplicate text: estimated Jaccard of the descriptions, or a weaker one backed by the slug or by
+# both listings having the same SAME_HOUSE_COLUMNS
+DESC_THRESHOLD = 0.8
+WEAK_DESC_THRESHOLD, SLUG_THRESHOLD = 0.5, 0.6
+SAME_HOUSE_COLUMNS = ['land_size_sqm', 'building_size_sqm', 'bedrooms']
+# column: relative tolerance; a pair must agree on each column both listings have
+NUMERIC_RULES = {'price': 0.10, 'land_size_sqm': 0.05, 'building_size_sqm': 0.05, 'bedrooms': 0.0, 'bathrooms': 0.0}
+MAX_DISTANCE_M = 1000            # when both listings have coordinates
+SLUG_MIN_LENGTH = 3
+CHUNK_PAIRS = 1 << 19
+
+MASK64 = (1 << 64) - 1
+MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _stable_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _splitmix(seed, n):
+    """`n` 64-bit constants from `seed`; fixed forever, so saved signatures stay comparable."""
+    values, state = [], seed
+    for _ in range(n):
+        state = (state + 0x9E3779B97F4A7C15) & MASK64
+        z = state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        values.append(z ^ (z >> 31))
+    return np.array(values, dtype=np.uint64)
+
+
+def tokenize(texts, keep=None):
+    """
+    Words of each text as (owner, stable hash) arrays in text order:
+    lowercase, split on anything but letters and digits, with phone numbers,
+    URLs and listing numbers removed. `keep(word)` filters the vocabulary.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    array = pc.utf8_lower(pa.array(texts, type=pa.large_string(), from_pandas=True))
+    for pattern in (PHONE_RE, URL_RE, LONG_NUMBER_RE):
+        array = pc.replace_substring_regex(array, pattern.pattern, ' ')
+    words = pc.utf8_split_whitespace(pc.replace_substring_regex(array, r'[^\p{L}\p{N}]+', ' '))
+    owner = pc.list_parent_indices(words).to_numpy()
+    encoded = pc.dictionary_encode(pc.list_flatten(words))
+    vocabulary = encoded.dictionary.to_pylist()
+    hashes = np.array([_stable_hash(word) for word in vocabulary], dtype=np.uint64)
+    codes = encoded.indices.to_numpy()
+    if keep is not None:
+        kept = np.array([bool(keep(word)) for word in vocabulary], dtype=bool)
+        owner, codes = owner[kept[codes]], codes[kept[codes]]
+    return owner, hashes[codes]
+
+
+def shingles(owner, hashes, n_texts, size):
+    """(owner, hash) of every run of `size` consecutive words; a text with fewer words gives each word."""
+    counts = np.bincount(owner, minlength=n_texts)
+    short = counts[owner] < size
+    if len(hashes) < size:
+        return owner[short], hashes[short]
+    last = len(hashes) - size + 1
+    combined = hashes[:last].copy()
+    for k in range(1, size):
+        combined = combined * MIX + hashes[k:last + k]
+    whole = owner[size - 1:] == owner[:last]
+    return np.concatenate([owner[:last][whole], owner[short]]), np.concatenate([combined[whole], hashes[short]])
+
+
+def minhash(owner, values, n_texts, num_perm, seed):
+    """(n_texts, num_perm) uint32 MinHash signatures; texts with nothing to hash are all 0xFFFFFFFF."""
+    signatures = np.full((n_texts, num_perm), 0xFFFFFFFF, dtype=np.uint32)
+    if not len(values):
+        return signatures
+    order = np.lexsort((values, owner))
+    owner, values = owner[order], values[order]
+    distinct = np.r_[True, (owner[1:] != owner[:-1]) | (values[1:] != values[:-1])]
+    owner, values = owner[distinct], values[distinct]
+    starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+    multipliers, offsets = _splitmix(seed, num_perm) | np.uint64(1), _splitmix(seed + 1, num_perm)
+    for k in range(num_perm):
+        hashed = ((values * multipliers[k] + offsets[k]) >> np.uint64(32)).astype(np.uint32)
+        signatures[owner[starts], k] = np.minimum.reduceat(hashed, starts)
+    return signatures
+
+
+def _slug_word(word):
+    return len(word) >= SLUG_MIN_LENGTH and not word.isdigit() and word not in STOPWORDS
+
+
+def signatures(df):
+    """Description and slug signatures of each row, and whether it has description words."""
+    codes, texts = pd.factorize(df['description'].astype(object).where(df['description'].notna(), None))
+    owner, hashes = tokenize(list(texts))
+    desc = minhash(*shingles(owner, hashes, len(texts), SHINGLE_SIZE), len(texts), NUM_PERM, seed=1)
+    has_text = np.r_[np.bincount(owner, minlength=len(texts)) > 0, False][codes]
+    desc = np.vstack([desc, np.full((1, NUM_PERM), 0xFFFFFFFF, dtype=np.uint32)])[codes]
+
+    slugs = df['id'].astype(object).where(df['id'].notna(), None).tolist() if 'id' in df.columns else [None] * len(df)
+    owner, hashes = tokenize(slugs, keep=_slug_word)
+    slug = minhash(owner, hashes, len(df), SLUG_PERM, seed=2)
+    return desc, slug, has_text
+
+
+def band_keys(signatures):
+    """(rows, BANDS) uint64: rows with equal keys in a band share that band's ROWS signature values."""
+    blocks = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    keys = blocks[:, :, 0].copy()
+    for r in range(1, ROWS):
+        keys = keys * MIX + blocks[:, :, r]
+    return keys
+
+
+def candidate_pairs(keys, has_text, prices, new=None):
+    """
+    Row pairs (i < j) that share a band: every pair in a bucket of up to
+    MAX_BUCKET rows, in larger ones each row and its next WINDOW rows by
+    price. With `new`, only buckets holding a new row and pairs with one.
+    """
+    rows = np.flatnonzero(has_text)
+    prices = np.nan_to_num(np.asarray(prices, dtype=float), nan=-1.0)
+    found = []
+    for band in range(keys.shape[1]):
+        order = rows[np.lexsort((prices[rows], keys[rows, band]))]
+        if not len(order):
+            break
+        key = keys[order, band]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        sizes = np.diff(np.r_[starts, len(key)])
+        run = np.repeat(np.arange(len(starts)), sizes)
+        live = sizes > 1
+        if new is not None and len(starts):
+            live &= np.maximum.reduceat(new[order], starts)
+        position = np.arange(len(key))
+        partners = np.minimum(starts[run] + sizes[run] - position - 1,
+                              np.where(sizes[run] > MAX_BUCKET, WINDOW, sizes[run]))
+        partners[~live[run]] = 0
+        first = np.repeat(position, partners)
+        second = first + 1 + np.arange(len(first)) - np.repeat(np.cumsum(partners) - partners, partners)
+        a, b = order[first], order[second]
+        found.append(np.minimum(a, b) * len(keys) + np.maximum(a, b))
+    pairs = np.unique(np.concatenate(found)) if found else np.array([], dtype=np.int64)
+    a, b = pairs // len(keys), pairs % len(keys)
+    if new is not None:
+        a, b = a[new[a] | new[b]], b[new[a] | new[b]]
+    return a, b
+
+
+def _agree(x, y, tolerance):
+    both = ~(np.isnan(x) | np.isnan(y))
+    return ~both | (np.abs(x - y) <= tolerance * np.maximum(np.abs(x), np.abs(y)))
+
+
+def _numbers(df):
+    """The columns NUMERIC_RULES and the distance check use, as float arrays (NaN where missing)."""
+    columns = list(NUMERIC_RULES) + ['latitude', 'longitude']
+    return {column: (pd.to_numeric(df[column], errors='coerce').astype(float).to_numpy()
+                     if column in df.columns else np.full(len(df), np.nan)) for column in columns}
+
+
+def duplicate_pairs(a, b, desc, slug, numbers):
+    """The candidate pairs that are duplicates: similar text (see the thresholds above) and agreeing numbers."""
+    keep = np.zeros(len(a), dtype=bool)
+    for start in range(0, len(a), CHUNK_PAIRS):
+        i, j = a[start:start + CHUNK_PAIRS], b[start:start + CHUNK_PAIRS]
+        desc_sim = (desc[i] == desc[j]).mean(axis=1)
+        slug_sim = (slug[i] == slug[j]).mean(axis=1)
+        same_house = np.ones(len(i), dtype=bool)
+        for column in SAME_HOUSE_COLUMNS:
+            same_house &= numbers[column][i] == numbers[column][j]  # False when either is missing
+        ok = (desc_sim >= DESC_THRESHOLD) | ((desc_sim >= WEAK_DESC_THRESHOLD) & ((slug_sim >= SLUG_THRESHOLD) | same_house))
+        for column, tolerance in NUMERIC_RULES.items():
+            ok &= _agree(numbers[column][i], numbers[column][j], tolerance)
+        lat, lon = numbers['latitude'], numbers['longitude']
+        dy = np.radians(lat[i] - lat[j]) * 6371000.0
+        dx = np.radians(lon[i] - lon[j]) * 6371000.0 * np.cos(np.radians((lat[i] + lat[j]) / 2))
+        ok &= ~(np.hypot(dx, dy) > MAX_DISTANCE_M)  # NaN (a side without coordinates) passes
+        keep[start:start + CHUNK_PAIRS] = ok
+    return a[keep], b[keep]
+
+
+class NearDupIndex:
+    """
+    Signatures, numbers, group label and kept flag of every listing seen
+    so far. add() checks a new batch against it: pairs are only looked for
+    in LSH buckets the batch lands in, and only the groups it joins are
+    re-checked. save()/load() persist it as a stage file.
+    """
+
+    def __init__(self):
+        self.ids = np.array([], dtype=object)
+        self.desc = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self.slug = np.zeros((0, SLUG_PERM), dtype=np.uint32)
+        self.has_text = np.array([], dtype=bool)
+        self.numbers = {column: np.array([], dtype=float) for column in list(NUMERIC_RULES) + ['latitude', 'longitude']}
+        self.labels = np.array([], dtype=np.int64)
+        self.kept = np.array([], dtype=bool)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, df):
+        """
+        Adds the listings of `df` after those already in the index. Returns
+        (keep, dropped): True over `df` for the first listing of each
+        duplicate group (and every listing without one), and the ids of
+        earlier listings whose group the batch joined to an earlier one.
+        """
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        n, m = len(self), len(df)
+        desc, slug, has_text = signatures(df)
+        desc, slug = np.vstack([self.desc, desc]), np.vstack([self.slug, slug])
+        has_text = np.concatenate([self.has_text, has_text])
+        numbers = {column: np.concatenate([self.numbers[column], values]) for column, values in _numbers(df).items()}
+        new = np.r_[np.zeros(n, dtype=bool), np.ones(m, dtype=bool)]
+
+        a, b = candidate_pairs(band_keys(desc), has_text, numbers['price'], new if n else None)
+        a, b = duplicate_pairs(a, b, desc, slug, numbers)
+
+        # Graph nodes: the groups already in the index, then the batch's rows
+        n_labels = int(self.labels.max()) + 1 if n else 0
+        node = np.r_[self.labels, n_labels + np.arange(m)]
+        size = n_labels + m
+        graph = coo_matrix((np.ones(len(a), dtype=np.int8), (node[a], node[b])), shape=(size, size))
+        _, component = connected_components(graph, directed=False)
+        labels = component[node]
+
+        # Only groups the batch joins can change; the first listing of each (in insertion order) is kept
+        touched = np.flatnonzero(np.isin(labels[:n], labels[n:]))
+        check = np.r_[touched, np.arange(n, n + m)]
+        kept = ~pd.Series(labels[check]).duplicated(keep='first').to_numpy()
+        old_kept = self.kept.copy()
+        old_kept[touched] = kept[:len(touched)]
+        dropped = list(self.ids[touched[self.kept[touched] & ~kept[:len(touched)]]])
+
+        ids = df['id'].to_numpy(dtype=object) if 'id' in df.columns else np.full(m, None, dtype=object)
+        self.ids = np.concatenate([self.ids, ids])
+        self.desc, self.slug, self.has_text, self.numbers = desc, slug, has_text, numbers
+        self.labels = labels
+        self.kept = np.concatenate([old_kept, kept[len(touched):]])
+        return kept[len(touched):], dropped
+
+    def save(self, path):
+        columns = {'id': pd.Series(self.ids, dtype=object),
+                   'desc_signature': pd.Series(list(map(bytes, self.desc)), dtype=object),
+                   'slug_signature': pd.Series(list(map(bytes, self.slug)), dtype=object),
+                   'has_text': self.has_text, 'group': self.labels, 'kept': self.kept}
+        columns.update({f"key_{column}": values for column, values in self.numbers.items()})
+        save_stage(pd.DataFrame(columns), path)
+
+    @classmethod
+    def load(cls, path):
+        saved = load_stage(path)
+        index = cls()
+        index.ids = saved['id'].to_numpy(dtype=object)
+        index.desc = np.frombuffer(b"".join(saved['desc_signature']), dtype=np.uint32).reshape(-1, NUM_PERM)
+        index.slug = np.frombuffer(b"".join(saved['slug_signature']), dtype=np.uint32).reshape(-1, SLUG_PERM)
+        index.has_text = saved['has_text'].to_numpy(dtype=bool)
+        index.labels = saved['group'].to_numpy(dtype=np.int64)
+        index.kept = saved['kept'].to_numpy(dtype=bool)
+        index.numbers = {column: saved[f"key_{column}"].to_numpy(dtype=float) for column in index.numbers}
+        return index
+
+
+def text_deduplication(df):
+    """The rows of `df` that are not a near-duplicate repost of an earlier row (see NearDupIndex)."""
+    keep, _ = NearDupIndex().add(df)
+    return df[keep]
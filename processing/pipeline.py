@@ -0,0 +1,264 @@
+# processing/pipeline.py
+#
+# Incremental runner for the 01-05 processing chain (the stages themselves
+# are in processing/stages.py). Every stage's output is a stage file
+# (datastore.save_stage) and a manifest in data/processed/.pipeline/ with the
+# key it was built from: a hash of the stage's code (its source, the
+# same-module functions and constants it uses, and any modules it lists) and
+# of its inputs' contents. A stage whose key has not changed is loaded
+# instead of run, and so is everything below it.
+#
+# Stages marked row_local handle each listing on its own. When only their
+# input changed, the runner also keeps a hash per listing `id` and sends
+# only new or changed listings through the stage; the rest of the output is
+# taken from the previous run and listings that disappeared are dropped.
+# A stage's `failed` check marks output rows whose API calls failed (enrich
+# and ListingParser don't cache failures); their listings are not recorded
+# as done, so the next run sends them again even if nothing else changed.
+# Global stages (merge, the zipcode fix, deduplication) always rerun on the
+# whole frame when any input changed.
+#
+# Usage (from the project root):
+#   python -m processing.pipeline [STAGE ...] [--force] [--root .]
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .datastore import load_stage, save_stage, stage_id
+
+SIMPLE_TYPES = (str, bytes, int, float, bool, tuple, list, dict, set, frozenset, type(None))
+
+
+class Stage:
+    """
+    One step of the chain: `func(ctx, *input_frames)` returns its output
+    frame. `inputs` are upstream stage names; a stage without inputs is a
+    source and runs every time (its output is hashed, not saved). `output`
+    names the stage file in data/processed (default: .pipeline/<name>),
+    `code` lists extra modules whose source is part of the key and, for a
+    row-local stage, `failed(output)` returns a boolean mask of the rows to
+    retry on the next run.
+    """
+
+    def __init__(self, name, func, inputs=(), row_local=False, output=None, code=(), failed=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.row_local = row_local
+        self.output = output
+        self.code = list(code)
+        self.failed = failed
+        if row_local and len(self.inputs) != 1:
+            raise ValueError(f"row-local stage {name!r} needs exactly one input")
+
+
+def _names(code):
+    """Global names used by a code object and the functions/comprehensions nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _names(const)
+    return names
+
+
+def code_fingerprint(func, modules=()):
+    """
+    sha256 of the source of `func`, of the functions and classes from its own
+    module it refers to (recursively), of the simple constants it reads, and
+    of `modules`. Editing any of them changes the fingerprint.
+    """
+    parts, seen = [], set()
+
+    def visit(obj):
+        if id(obj) in seen:
+            return
+        seen.add(id(obj))
+        parts.append(inspect.getsource(obj))
+        module = sys.modules[obj.__module__]
+        if inspect.isclass(obj):
+            codes = [v.__code__ for v in vars(obj).values() if inspect.isfunction(v)]
+        else:
+            codes = [obj.__code__]
+        for name in sorted(set().union(*map(_names, codes))):
+            value = vars(module).get(name)
+            if (inspect.isfunction(value) or inspect.isclass(value)) and value.__module__ == obj.__module__:
+                visit(value)
+            elif isinstance(value, SIMPLE_TYPES):
+                parts.append(f"{name} = {value!r}")
+
+    visit(func)
+    parts.extend(inspect.getsource(module) for module in modules)
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def row_hashes(df):
+    """One uint64 per row of `df` (index ignored); lists and dicts are hashed by their repr."""
+    columns = {}
+    for name in df.columns:
+        column = df[name]
+        if column.dtype == object and column.map(lambda v: isinstance(v, (list, dict))).any():
+            column = column.map(lambda v: repr(v) if isinstance(v, (list, dict)) else v)
+        columns[name] = column
+    return pd.util.hash_pandas_object(pd.DataFrame(columns, index=df.index), index=False).to_numpy()
+
+
+def content_hash(df):
+    """sha256 of the column names and every row of `df`."""
+    digest = hashlib.sha256(json.dumps([str(name) for name in df.columns]).encode())
+    digest.update(row_hashes(df).tobytes())
+    return digest.hexdigest()
+
+
+def id_hashes(df, hashes):
+    """{id: sum of its rows' hashes} (rows without an id are left out)."""
+    codes, ids = pd.factorize(df['id'])
+    valid = codes >= 0
+    sums = np.zeros(len(ids), dtype=np.uint64)
+    np.add.at(sums, codes[valid], hashes[valid])
+    return dict(zip(ids, sums))
+
+
+class Pipeline:
+    """Runs `stages` (in dependency order) with `ctx`, storing outputs and manifests under ctx.processed_dir."""
+
+    def __init__(self, stages, ctx):
+        self.stages = {stage.name: stage for stage in stages}
+        self.ctx = ctx
+        self.state_dir = Path(ctx.processed_dir) / ".pipeline"
+
+    def output_path(self, stage):
+        if stage.output is None:
+            return self.state_dir / f"{stage.name}.arrow"
+        return Path(self.ctx.processed_dir) / f"{stage.output}.arrow"
+
+    def order(self, targets=None):
+        """The stages needed for `targets` (default: all), each after its inputs."""
+        ordered, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            if name not in self.stages:
+                raise KeyError(f"no stage named {name!r}")
+            seen.add(name)
+            for upstream in self.stages[name].inputs:
+                visit(upstream)
+            ordered.append(self.stages[name])
+
+        for name in targets or self.stages:
+            visit(name)
+        return ordered
+
+    def _manifest(self, stage):
+        path = self.state_dir / f"{stage.name}.json"
+        if not path.exists():
+            return None
+        manifest = json.loads(path.read_text())
+        # The notebooks write the same stage files; one saved after our run is not ours to reuse
+        output = self.output_path(stage)
+        if not output.exists() or stage_id(output) != manifest.get('stage_id'):
+            return None
+        return manifest
+
+    def _save_manifest(self, stage, manifest):
+        path = self.state_dir / f"{stage.name}.json"
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=1))
+        os.replace(tmp_path, path)
+
+    def run(self, targets=None, force=False):
+        """Runs (or loads) every stage needed for `targets`; returns {name: output frame}."""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        frames, hashes = {}, {}
+        print(f"{'stage':<22}{'status':<30}{'rows':>9}{'time':>9}")
+        for stage in self.order(targets):
+            started = time.perf_counter()
+            inputs = [frames[name] for name in stage.inputs]
+            if not stage.inputs:
+                df = stage.func(self.ctx)
+                status = "source"
+            else:
+                code = code_fingerprint(stage.func, stage.code)
+                key = hashlib.sha256("\n".join([code] + [hashes[name] for name in stage.inputs]).encode()).hexdigest()
+                manifest = None if force else self._manifest(stage)
+                if manifest is not None and manifest['key'] == key and not manifest.get('failed'):
+                    df = load_stage(self.output_path(stage), text=True)
+                    status = "cached"
+                else:
+                    df, status = self._build(stage, inputs, code, manifest)
+                    df = self._save(stage, df, code, key, inputs)
+            frames[stage.name] = df
+            hashes[stage.name] = content_hash(df)
+            print(f"{stage.name:<22}{status:<30}{len(df):>9,}{time.perf_counter() - started:>8.1f}s")
+        return frames
+
+    def _build(self, stage, inputs, code, manifest):
+        """The stage's new output, only recomputing changed listings when it can."""
+        rows_path = self.state_dir / f"{stage.name}.rows.arrow"
+        if not (stage.row_local and manifest is not None and manifest['code'] == code
+                and manifest.get('input_columns') == [str(c) for c in inputs[0].columns] and rows_path.exists()):
+            return stage.func(self.ctx, *inputs), "full"
+
+        df = inputs[0]
+        current = id_hashes(df, row_hashes(df))
+        saved = load_stage(rows_path)
+        previous = dict(zip(saved['id'], saved['hash'].to_numpy(dtype=np.uint64)))
+        unchanged = {i for i, h in current.items() if previous.get(i) == h}
+        todo = ~df['id'].isin(unchanged).to_numpy()
+        old = load_stage(self.output_path(stage), text=True)
+        parts = [old[old['id'].isin(unchanged).to_numpy()]]
+        if todo.any():
+            parts.append(stage.func(self.ctx, df[todo].reset_index(drop=True)))
+        out = pd.concat(parts, ignore_index=True)
+
+        # Back into input order: each listing where its id first appears, listings without an id last
+        first = pd.Series(np.arange(len(df)), index=df['id']).groupby(level=0).min()
+        position = out['id'].map(first).fillna(len(df)).to_numpy()
+        out = out.iloc[np.argsort(position, kind='stable')].reset_index(drop=True)
+        return out, f"incremental {int(todo.sum()):,} of {len(df):,}"
+
+    def _save(self, stage, df, code, key, inputs):
+        """Saves the output (and, for row-local stages, the per-id hashes); returns it as reloaded."""
+        path = self.output_path(stage)
+        save_stage(df, path)
+        manifest = {'key': key, 'code': code, 'stage_id': stage_id(path)}
+        if stage.row_local:
+            current = id_hashes(inputs[0], row_hashes(inputs[0]))
+            if stage.failed is not None:
+                # Left out of the row hashes, so the next run treats them as new
+                failed = set(df['id'][np.asarray(stage.failed(df), dtype=bool)].dropna())
+                current = {i: h for i, h in current.items() if i not in failed}
+                manifest['failed'] = len(failed)
+            rows = pd.DataFrame({'id': pd.Series(list(current), dtype=object),
+                                 'hash': np.array(list(current.values()), dtype=np.uint64)})
+            save_stage(rows, self.state_dir / f"{stage.name}.rows.arrow")
+            manifest['input_columns'] = [str(c) for c in inputs[0].columns]
+        self._save_manifest(stage, manifest)
+        # Downstream stages see exactly what a cached run would load
+        return load_stage(path, text=True)
+
+
+def main():
+    from .stages import STAGES, StageContext
+
+    parser = argparse.ArgumentParser(description="Run the 01-05 processing chain incrementally.")
+    parser.add_argument("stages", nargs="*", help="stages to bring up to date (default: all)")
+    parser.add_argument("--force", action="store_true", help="rebuild every stage, ignoring the manifests")
+    parser.add_argument("--root", default=".", help="project root (holds data/ and .env)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    Pipeline(STAGES, StageContext(args.root)).run(args.stages or None, force=args.force)
+    print(f"Done in {time.perf_counter() - started:.1f} s.")
+
+
+if __name__ == "__main__":
+    main()
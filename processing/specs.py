@@ -0,0 +1,112 @@
+# processing/specs.py
+#
+# Columnar "waterfall" feature engineering for 02_merge_and_clean.ipynb. The
+# notebook used to fill each feature with a row-wise apply that re-parsed the
+# `specs` JSON and re-ran the description regexes per row and per feature.
+# Here each distinct `specs` blob is parsed once for all features, the
+# description patterns are compiled once and run once per distinct
+# description that still needs them, and clean_value runs once per distinct
+# raw value. The filled values are the same as the row-wise version's.
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+# feature: (specs keys, description patterns), both in priority order
+FEATURE_ALIASES = {
+    'bedrooms': (['kamar tidur', 'kt', 'bedrooms'], [r'(\d+)\s*kt', r'(\d+)\s*kamar tidur']),
+    'bathrooms': (['kamar mandi', 'km', 'bathrooms'], [r'(\d+)\s*km', r'(\d+)\s*kamar mandi']),
+    'land_size_sqm': (['luas tanah', 'lt', 'land size', 'luas lahan'], [r'lt\s*(\d+)', r'luas tanah\s*(\d+)']),
+    'building_size_sqm': (['luas bangunan', 'lb', 'building size'], [r'lb\s*(\d+)', r'luas bangunan\s*(\d+)']),
+}
+
+NUMBER_RE = re.compile(r'([\d\.]+)')
+
+
+def clean_value(value_str):
+    """'120 m²' -> 120, '1.5' -> 1; NaN when there is no usable number."""
+    try:
+        # Hapus 'm²' atau 'm' lalu ambil angkanya
+        value_str = str(value_str).lower().replace('m²', '').replace('m', '').strip()
+        match = NUMBER_RE.search(value_str)
+        if match:
+            return int(float(match.group(0)))
+    except (TypeError, ValueError, AttributeError):
+        pass
+    return np.nan
+
+
+def parse_specs(blob):
+    """A `specs` blob read the notebook's way (lowercased, ' -> ", JSON) as a dict with lowercase keys; {} if it is not one."""
+    text = str(blob).lower().replace("'", '"')
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    # Keys of lowercased text are already lowercase unless spelled as \u escapes
+    return {k.lower(): v for k, v in parsed.items()} if '\\' in text else parsed
+
+
+def first_group(patterns, text):
+    """The first non-empty group of the first pattern found in `text`, or None."""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return next((group for group in match.groups() if group), None)
+    return None
+
+
+def fill_waterfall(df, features=None, specs_column='specs', description_column='description'):
+    """
+    Fills the missing values of each feature column: first from `specs`
+    (first alias present wins, even if its value is unusable), then from the
+    description patterns. Existing values are kept. Returns {column: number filled}.
+    """
+    features = FEATURE_ALIASES if features is None else features
+    spec_codes, blobs = pd.factorize(df[specs_column].astype(str), use_na_sentinel=False)
+    desc_codes, descriptions = pd.factorize(df[description_column].to_numpy(), use_na_sentinel=False)
+    parsed, texts, cleaned = None, {}, {}
+
+    def clean(value):
+        key = str(value)
+        if key not in cleaned:
+            cleaned[key] = clean_value(value)
+        return cleaned[key]
+
+    filled = {}
+    for column, (aliases, patterns) in features.items():
+        if column not in df.columns:
+            df[column] = np.nan
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+        values = df[column].to_numpy(dtype=float, copy=True)
+        missing = np.isnan(values)
+        if not missing.any():
+            filled[column] = 0
+            continue
+
+        if parsed is None:
+            parsed = [parse_specs(blob) for blob in blobs]
+        per_blob = np.full(len(blobs), np.nan)
+        for i, entries in enumerate(parsed):
+            alias = next((a for a in aliases if a in entries), None)
+            if alias is not None:
+                per_blob[i] = clean(entries[alias])
+        values[missing] = per_blob[spec_codes[missing]]
+
+        # Rows the specs did not fill (no alias, or an unusable value) fall back to the description
+        compiled = [re.compile(p) for p in patterns]
+        fallback = np.flatnonzero(np.isnan(values))
+        per_description = {}
+        for code in np.unique(desc_codes[fallback]):
+            if code not in texts:
+                texts[code] = str(descriptions[code]).lower()
+            group = first_group(compiled, texts[code])
+            per_description[code] = np.nan if group is None else clean(group)
+        values[fallback] = [per_description[code] for code in desc_codes[fallback]]
+
+        df[column] = values
+        filled[column] = int(missing.sum() - np.isnan(values).sum())
+    return filled
@@ -0,0 +1,496 @@
+# processing/stages.py
+#
+# The 01-05 notebooks' processing steps as plain functions, wired into the
+# DAG that processing/pipeline.py runs:
+#
+#   raw_platform_a -> geocode_platform_a --\
+#                                           merge -> zipcode_fix -> deduplicate -> classify -> remove_outliers
+#   raw_platform_b -> geocode_platform_b --/
+#
+# Each function takes the StageContext and its input frames and returns its
+# output frame; none of them prints charts or asks for input. The notebooks
+# stay the place to explore a step (and write the same stage files); these
+# are what the daily refresh runs. Stages marked row_local only look at one
+# listing at a time, so the runner can feed them only new or changed ids.
+import json
+import os
+import re
+import sys
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import admin_geocoder, enrich, fuzzy_match, gazetteer, geo_dedup, geocache, llm_parse, near_dup, specs
+from .pipeline import Stage
+
+# --- Settings (the notebooks' values) ---
+GOOGLE_GEOCODE_QPS = 40    # Geocoding API allows 50/s per project
+OPENAI_RPM = 450           # gpt-4o-mini requests/minute on our tier
+ENRICH_CONCURRENCY = 16
+GEOCODE_CACHE_TTL_DAYS = 180
+GEOCODE_CACHE_PRECISION = 5
+GAZETTEER_MIN_CONFIDENCE = 0.6
+LLM_BATCH_SIZE = 25
+
+RAW_BASE_COLUMNS = ['id', 'url', 'scraped_at', 'price', 'address', 'description',
+                    'bedrooms', 'bathrooms', 'land_size_sqm', 'building_size_sqm', 'specs']
+RAW_COLUMNS = {
+    'Platform A': RAW_BASE_COLUMNS + ['address_locality', 'latitude', 'longitude'],
+    'Platform B': RAW_BASE_COLUMNS,
+}
+
+AI_PROMPT_PLATFORM_B_PARSE = """
+You are an expert Indonesian real estate data analyst. Your task is to synthesize the best possible geocoding string from the provided data.
+1.  Analyze the `id`, `address`, and `description`.
+2.  Prioritize specific housing complexes (e.g., "Podomoro Park") or street names.
+3.  Include the main sub-district (kecamatan) and city (Bandung).
+4.  Remove junk like "rumah dijual", "harga", etc.
+5.  **Output *only* the final, clean, comma-separated string.**
+"""
+
+FINAL_COLUMNS = ['id', 'source', 'price', 'master_address', 'latitude', 'longitude', 'zipcode',
+                 'bedrooms', 'bathrooms', 'land_size_sqm', 'building_size_sqm',
+                 'description', 'specs', 'url', 'scraped_at', 'geo_confidence']
+
+# 05_outlier_removal.ipynb's thresholds
+BANDUNG_BOUNDS = {'latitude': (-7.3, -6.5), 'longitude': (107.0, 107.9)}
+SIZE_RANGE = (20, 2000)             # land and building, m²
+MIN_BEDROOMS, MIN_BATHROOMS = 1, 1
+MAX_ROOMS = 20
+PRICE_RANGE = (150_000_000, 100_000_000_000)
+
+
+class StageContext:
+    """
+    Paths, API keys and the clients the stages share. Clients are built on
+    first use, so a run that only touches offline stages never needs keys.
+    API endpoints can be pointed at benchmarks/stub_api.py through the same
+    GOOGLE_GEOCODE_URL / OPENAI_BASE_URL variables the notebook reads.
+    """
+
+    def __init__(self, project_root=".", raw_paths=None):
+        self.root = Path(project_root)
+        self.data_dir = self.root / "data"
+        self.processed_dir = self.data_dir / "processed"
+        self.cache_dir = self.data_dir / "cache"
+        self.raw_paths = raw_paths or {
+            'Platform A': self.data_dir / "raw" / "platform_a_raw.json",
+            'Platform B': self.data_dir / "raw" / "platform_b_raw.json",
+        }
+        self.shapefile_path = self.data_dir / "raw" / "idn_admbnda_adm4_ID3_bps_20200401.shp"
+        self.zipcodes_path = self.cache_dir / "adm4_zipcodes.csv"
+        try:
+            from dotenv import load_dotenv
+            load_dotenv(dotenv_path=self.root / ".env")
+        except ImportError:
+            pass
+        self.google_api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+        self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        self.google_geocode_url = os.getenv("GOOGLE_GEOCODE_URL", enrich.GOOGLE_GEOCODE_URL)
+        self.openai_base_url = os.getenv("OPENAI_BASE_URL")
+
+    @cached_property
+    def google_limiter(self):
+        return enrich.TokenBucket(GOOGLE_GEOCODE_QPS, capacity=1)
+
+    @cached_property
+    def openai_limiter(self):
+        return enrich.TokenBucket(OPENAI_RPM / 60, capacity=1)
+
+    @cached_property
+    def geocode_cache(self):
+        return geocache.GeocodeCache(self.cache_dir / "geocode.db", ttl_days=GEOCODE_CACHE_TTL_DAYS)
+
+    @cached_property
+    def llm_cache(self):
+        return geocache.GeocodeCache(self.cache_dir / "llm_parse.db", ttl_days=None)
+
+    @cached_property
+    def admin_geocoder(self):
+        """The ADM4 polygons (Kota Bandung) with the known zipcodes; None without the shapefile."""
+        if not self.shapefile_path.exists():
+            print(f"Warning: {self.shapefile_path.name} not found (see data/raw/DOWNLOAD_INSTRUCTIONS.txt).")
+            return None
+        geocoder = admin_geocoder.AdminReverseGeocoder.from_shapefile(self.shapefile_path, cache_dir=self.cache_dir)
+        geocoder.load_zipcodes(self.zipcodes_path)
+        geocoder.derive_zipcodes_from_cache(self.geocode_cache)
+        return geocoder
+
+    @cached_property
+    def gazetteer(self):
+        polygons = self.admin_geocoder.polygons if self.admin_geocoder is not None else None
+        return gazetteer.Gazetteer.bandung(polygons)
+
+
+# --- Helpers (01_geocode.ipynb) ---
+
+def clean_r123_description(desc):
+    """Fixes spacing issues for Platform A descriptions."""
+    if desc is None: return np.nan
+    return re.sub(r'\s+', ' ', str(desc)).strip()
+
+
+def clean_platform_b_description(desc):
+    """Fixes spacing issues for Platform B descriptions."""
+    if desc == "" or desc is None: return np.nan
+    if isinstance(desc, list): desc = ' '.join(map(str, desc))
+    return str(desc).replace('²', '').replace('\n', ' ').replace('\t', ' ').strip()
+
+
+def join_description(desc):
+    """Platform B sometimes scrapes the description as a list of paragraphs; stage files store it as one string."""
+    return ' '.join(map(str, desc)) if isinstance(desc, list) else desc
+
+
+def clean_platform_b_id(id_str):
+    """Cleans the Platform B ID for keyword extraction."""
+    return str(id_str).replace('-', ' ').strip()
+
+
+def stringify_specs(specs_dict):
+    """Converts a specs dictionary to a clean JSON string."""
+    if isinstance(specs_dict, dict):
+        return json.dumps(specs_dict)
+    return str(specs_dict)
+
+
+def load_listings(path, columns):
+    """
+    Scraped listings from a JSON-lines file (malformed lines skipped) or a
+    directory of Parquet shards from the scraper's ColumnarExportPipeline
+    (only `columns` read). `specs` comes back as a JSON string.
+    """
+    path = Path(path)
+    if path.is_dir() or path.suffix == '.parquet':
+        sys.path.append(str(Path(__file__).resolve().parents[1] / "property_scraper"))
+        from property_scraper.columnar import read_listings
+        df = read_listings(path, columns=columns)
+    else:
+        rows = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass
+        df = pd.DataFrame(rows)
+    if 'specs' in df.columns:
+        df['specs'] = df['specs'].apply(stringify_specs)
+    return df
+
+
+def _first_result(resp):
+    """geo_address/zipcode/geo_confidence (and the location) of the first Google result."""
+    result = resp[0]
+    postcode = ""
+    for comp in result.get("address_components", []):
+        if "postal_code" in comp.get("types", []):
+            postcode = comp.get("short_name", "")
+            break
+    return {
+        "location": result["geometry"].get("location"),
+        "geo_address": result.get("formatted_address", ""),
+        "zipcode": postcode,
+        "geo_confidence": result["geometry"].get("location_type", "UNKNOWN"),
+    }
+
+
+async def _reverse_geocode_google(ctx, coords):
+    async with enrich.GoogleGeocoder(ctx.google_api_key, ctx.google_limiter, base_url=ctx.google_geocode_url) as client:
+        geocoder = geocache.CachedGeocoder(client, ctx.geocode_cache, precision=GEOCODE_CACHE_PRECISION)
+
+        async def one(coord):
+            try:
+                resp = await geocoder.areverse_geocode(coord)
+            except (enrich.QuotaError, enrich.TransientError):
+                raise
+            except Exception as exc:
+                print(f"Google API Error (Reverse): {exc}", file=sys.stderr)
+                return {}
+            if not resp: return {}
+            result = _first_result(resp)
+            del result["location"]
+            return result
+
+        return await enrich.enrich(coords, one, concurrency=ENRICH_CONCURRENCY, limiter=ctx.google_limiter,
+                                   default={}, desc="Reverse Geocoding")
+
+
+async def _forward_geocode_google(ctx, addresses):
+    async with enrich.GoogleGeocoder(ctx.google_api_key, ctx.google_limiter, base_url=ctx.google_geocode_url) as client:
+        geocoder = geocache.CachedGeocoder(client, ctx.geocode_cache, precision=GEOCODE_CACHE_PRECISION)
+
+        async def one(address):
+            try:
+                resp = await geocoder.ageocode(str(address) + ", Bandung, Jawa Barat, Indonesia",
+                                               language="en", components={'country': 'ID'})
+            except (enrich.QuotaError, enrich.TransientError):
+                raise
+            except Exception as exc:
+                print(f"Google API Error (Forward): {exc}", file=sys.stderr)
+                return {}
+            if not resp: return {}
+            result = _first_result(resp)
+            location = result.pop("location")
+            return {"latitude": location["lat"], "longitude": location["lng"], **result}
+
+        return await enrich.enrich(addresses, one, concurrency=ENRICH_CONCURRENCY, limiter=ctx.google_limiter,
+                                   default={}, desc="Forward Geocoding")
+
+
+async def _ai_parse(ctx, listings):
+    async with enrich.OpenAIChat(ctx.openai_api_key, ctx.openai_limiter, base_url=ctx.openai_base_url) as chat:
+        parser = llm_parse.ListingParser(chat, ctx.llm_cache, AI_PROMPT_PLATFORM_B_PARSE, batch_size=LLM_BATCH_SIZE,
+                                         concurrency=ENRICH_CONCURRENCY, limiter=ctx.openai_limiter)
+        results = await parser.parse(listings)
+    print(parser.report())
+    return results
+
+
+def _results_frame(results, key_columns, value_columns):
+    """{key: result dict} -> a frame with the key column(s) and `value_columns` (NaN where a lookup failed)."""
+    keys = list(results)
+    frame = pd.DataFrame([results[k] for k in keys], columns=value_columns)
+    if len(key_columns) == 1:
+        frame.insert(0, key_columns[0], pd.Series(keys, dtype=object))
+    else:
+        for i, column in enumerate(key_columns):
+            frame.insert(i, column, [k[i] for k in keys])
+    return frame
+
+
+# --- Stages ---
+
+def geocode_failed(df):
+    """Rows with something to geocode but no result: a failed API call (or AI parse), retried next run."""
+    if 'master_geo_string' in df.columns:
+        wanted = df['master_geo_string'].notna()
+        parse_failed = (df['master_geo_string'] == "api_error").fillna(False)  # ListingParser's default
+    else:
+        wanted = df['latitude'].notna() & df['longitude'].notna()
+        parse_failed = False
+    return ((wanted & df['geo_confidence'].isna()) | parse_failed).to_numpy(dtype=bool)
+
+
+def raw_platform_a(ctx):
+    return load_listings(ctx.raw_paths['Platform A'], RAW_COLUMNS['Platform A'])
+
+
+def raw_platform_b(ctx):
+    return load_listings(ctx.raw_paths['Platform B'], RAW_COLUMNS['Platform B'])
+
+
+def geocode_platform_a(ctx, df):
+    """01 Path 1: clean descriptions, reverse geocode the coordinates (ADM4 polygons first, then Google)."""
+    df = df.copy()
+    df['description'] = df['description'].apply(clean_r123_description)
+    df['price'] = pd.to_numeric(df['price'], errors='coerce')
+    df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
+    df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
+
+    coords = list(df.dropna(subset=['latitude', 'longitude'])
+                  .drop_duplicates(subset=['latitude', 'longitude'])[['latitude', 'longitude']]
+                  .itertuples(index=False, name=None))
+    results = {}
+    geocoder = ctx.admin_geocoder
+    if geocoder is not None and coords:
+        lats, lons = zip(*coords)
+        for coord, adm in zip(coords, geocoder.resolve(lats, lons).itertuples(index=False)):
+            if adm.resolved:
+                # Zipcode only: a kelurahan-level geo_address would become the master_address
+                # of every listing in the kelurahan and Stage B would merge equal prices.
+                # Left empty, master_address falls back to the listing's own street address.
+                results[coord] = {
+                    "geo_address": None,
+                    "zipcode": adm.zipcode,
+                    "geo_confidence": "ADM4_POLYGON",
+                }
+        print(f"Resolved {len(results)} of {len(coords)} coordinates offline.")
+    todo = [coord for coord in coords if coord not in results]
+    if todo:
+        results.update(enrich.run_sync(_reverse_geocode_google(ctx, todo)))
+        if geocoder is not None:
+            geocoder.derive_zipcodes_from_cache(ctx.geocode_cache)
+            geocoder.save_zipcodes(ctx.zipcodes_path)
+
+    geo = _results_frame(results, ['latitude', 'longitude'], ['geo_address', 'zipcode', 'geo_confidence'])
+    geo[['latitude', 'longitude']] = geo[['latitude', 'longitude']].astype(float)
+    df = df.merge(geo, on=['latitude', 'longitude'], how='left')
+    df['source'] = 'Platform A'
+    return df
+
+
+def geocode_platform_b(ctx, df):
+    """01 Path 2: clean text, gazetteer (AI parse below its confidence), then forward geocode."""
+    df = df.copy()
+    df['description_clean'] = df['description'].apply(clean_platform_b_description)
+    df['id_clean'] = df['id'].apply(clean_platform_b_id)
+    df['description'] = df['description'].apply(join_description)
+    df['price'] = pd.to_numeric(df['price'], errors='coerce')
+
+    listings = df[['id_clean', 'address', 'description_clean']].rename(
+        columns={'id_clean': 'id', 'description_clean': 'description'}).to_dict('records')
+    extracted = ctx.gazetteer.extract_all(listings)
+    confident = np.array([r['confidence'] >= GAZETTEER_MIN_CONFIDENCE for r in extracted], dtype=bool)
+    print(f"Gazetteer resolved {confident.sum()} of {len(listings)} rows (confidence >= {GAZETTEER_MIN_CONFIDENCE}).")
+    uncertain = [listing for listing, ok in zip(listings, confident) if not ok]
+    parsed = iter(enrich.run_sync(_ai_parse(ctx, uncertain)) if uncertain else [])
+    df['master_geo_string'] = [r['geo_string'] if ok else next(parsed) for r, ok in zip(extracted, confident)]
+    df['geo_parse_source'] = np.where(confident, 'GAZETTEER', 'AI')
+    df['geo_parse_confidence'] = [r['confidence'] for r in extracted]
+
+    addresses = list(df['master_geo_string'].dropna().unique())
+    results = enrich.run_sync(_forward_geocode_google(ctx, addresses)) if addresses else {}
+    geo = _results_frame(results, ['master_geo_string'],
+                         ['latitude', 'longitude', 'geo_address', 'zipcode', 'geo_confidence'])
+    df = df.merge(geo, on='master_geo_string', how='left')
+    df['source'] = 'Platform B'
+    return df
+
+
+def merge(ctx, platform_a, platform_b):
+    """02 Steps 2, 4 and 5: Platform B's description fix, concat, master_address, waterfall features, types."""
+    if 'description' in platform_b.columns and 'description_clean' in platform_b.columns:
+        platform_b = platform_b.drop(columns=['description']).rename(columns={'description_clean': 'description'})
+    df = pd.concat([platform_b, platform_a], ignore_index=True)
+    # Last resort for listings with neither: their rounded coordinates, so Stage B never merges
+    # houses just because both lack an address and share a price
+    lat = pd.to_numeric(df['latitude'], errors='coerce').round(5)
+    lon = pd.to_numeric(df['longitude'], errors='coerce').round(5)
+    coords = (lat.astype(str) + ', ' + lon.astype(str)).where(lat.notna() & lon.notna())
+    df['master_address'] = df['geo_address'].fillna(df['address']).fillna(coords).astype(str)
+
+    filled = specs.fill_waterfall(df)
+    print("Waterfall fills: " + ", ".join(f"{column} {count}" for column, count in filled.items()))
+    for column in ['price', 'bedrooms', 'bathrooms', 'land_size_sqm', 'building_size_sqm', 'latitude', 'longitude']:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df
+
+
+def zipcode_fix(ctx, df):
+    """02 Step 3: missing zipcodes from the best fuzzy master_address match (nearest price on ties)."""
+    df = df.copy()
+    df['price'] = pd.to_numeric(df['price'], errors='coerce')
+    df['zipcode'] = df['zipcode'].astype(str).replace('nan', np.nan)
+
+    source_df = df.dropna(subset=['zipcode', 'master_address', 'price'])
+    target_df = df[df['zipcode'].isna() & df['master_address'].notna() & df['price'].notna()]
+    if target_df.empty:
+        return df
+    positions, scores = fuzzy_match.match_nearest_price(target_df['master_address'], target_df['price'],
+                                                        source_df['master_address'], source_df['price'])
+    match_results = pd.DataFrame({
+        'zipcode_fuzzy': source_df['zipcode'].to_numpy()[positions],
+        'zipcode_match_score': scores
+    }, index=target_df.index)
+    df = df.join(match_results)
+    df['zipcode'] = df['zipcode'].fillna(df['zipcode_fuzzy'])
+    print(f"Fuzzy-matched {len(target_df)} missing zipcodes.")
+    return df
+
+
+def deduplicate(ctx, df):
+    """03: by id, by price + master_address, geospatially, then near-duplicate text; keeps FINAL_COLUMNS."""
+    before = len(df)
+    df = df.drop_duplicates(subset=['id'], keep='first')
+    df = df.drop_duplicates(subset=['price', 'master_address'], keep='first')
+    df = geo_dedup.geospatial_deduplication(df, cluster_radius_m=100)
+    df = near_dup.text_deduplication(df)
+    print(f"Deduplication removed {before - len(df)} of {before} listings.")
+    return df[[column for column in FINAL_COLUMNS if column in df.columns]]
+
+
+def get_initial_type(row):
+    """04 Stages 1 and 2: 'Tipe Properti' from the specs JSON, else a keyword search."""
+    try:
+        spec_data = json.loads(row['specs'])
+        if 'Tipe Properti' in spec_data:
+            tipe = spec_data['Tipe Properti'].lower()
+            if 'rumah' in tipe: return "Rumah"
+            if 'tanah' in tipe: return "Tanah"
+            if 'apartemen' in tipe: return "Apartemen"
+            if 'ruko' in tipe: return "Ruko"
+            if 'villa' in tipe: return "Villa"
+            if any(k in tipe for k in ['kantor', 'gudang']): return "Ruko"
+    except Exception:
+        pass
+
+    search_string = ""
+    for col in ['id', 'description', 'master_address', 'specs']:
+        if col in row.index and isinstance(row[col], str):
+            search_string += " " + row[col].lower()
+    if any(s in search_string for s in ['jual kavling', 'rumah hitung tanah', 'dijual tanah', 'tanah dijual']):
+        return "Tanah"
+    if 'kavling' in search_string:
+        return "Tanah"
+    if any(s in search_string for s in ['apartemen', 'apartment', 'apartement']):
+        return "Apartemen"
+    if any(s in search_string for s in ['ruko', 'rukan', 'kantor', 'office', 'gudang', 'warehouse']):
+        return "Ruko"
+    if 'villa' in search_string:
+        return "Villa"
+    if any(s in search_string for s in ['rumah', 'house', 'hunian', 'cluster', 'residence']):
+        return "Rumah"
+    return "Lainnya"
+
+
+def classify(ctx, df):
+    """04: property_type from specs/keywords, then the 'symptom' fixes for 'Rumah' without sizes or rooms."""
+    df = df.copy()
+    df['property_type'] = df.apply(get_initial_type, axis=1) if len(df) else pd.Series(dtype=object)
+    for column, fallback in [('building_size_sqm', 'Tanah'), ('bedrooms', 'Ruko'), ('bathrooms', 'Tanah')]:
+        df.loc[(df['property_type'] == 'Rumah') & df[column].isna(), 'property_type'] = fallback
+    return df
+
+
+def remove_outliers(ctx, df):
+    """
+    05: 'Rumah' listings with coordinates inside the Bandung box and Kota
+    Bandung's kelurahan (ADM4_EN added), sensible sizes, rooms and price.
+    """
+    df = df[df['property_type'] == 'Rumah']
+    df = df.dropna(subset=['latitude'])
+    (lat_min, lat_max), (lon_min, lon_max) = BANDUNG_BOUNDS['latitude'], BANDUNG_BOUNDS['longitude']
+    df = df[df['latitude'].between(lat_min, lat_max) & df['longitude'].between(lon_min, lon_max)]
+
+    geocoder = ctx.admin_geocoder
+    if geocoder is None:
+        # As notebook 05 does: without the polygons there is no Kota Bandung filter or ADM4_EN,
+        # and an unfiltered MODEL_READY would stay cached once the shapefile is added
+        raise FileNotFoundError(f"{ctx.shapefile_path} is needed to remove listings outside Kota Bandung "
+                                "(see data/raw/DOWNLOAD_INSTRUCTIONS.txt).")
+    idx = geocoder.polygon_index(df['latitude'], df['longitude'])
+    df = df[idx >= 0].copy()
+    df['ADM4_EN'] = geocoder.polygons['ADM4_EN'].to_numpy()[idx[idx >= 0]]
+
+    def values(column):
+        return pd.to_numeric(df[column], errors='coerce').astype(float).to_numpy()
+
+    land, building = values('land_size_sqm'), values('building_size_sqm')
+    bedrooms, bathrooms, price = values('bedrooms'), values('bathrooms'), values('price')
+    keep = ~((bedrooms == 0) & (bathrooms == 0))
+    keep &= (land >= SIZE_RANGE[0]) & (building >= SIZE_RANGE[0]) & (land <= SIZE_RANGE[1]) & (building <= SIZE_RANGE[1])
+    keep &= bedrooms >= MIN_BEDROOMS
+    keep &= (bathrooms >= MIN_BATHROOMS) & (bedrooms <= MAX_ROOMS) & (bathrooms <= MAX_ROOMS)
+    keep &= (price >= PRICE_RANGE[0]) & (price <= PRICE_RANGE[1])
+    return df[keep]
+
+
+STAGES = [
+    Stage('raw_platform_a', raw_platform_a),
+    Stage('raw_platform_b', raw_platform_b),
+    Stage('geocode_platform_a', geocode_platform_a, ['raw_platform_a'], row_local=True,
+          output='platform_a_geocoded', code=[enrich, geocache, admin_geocoder], failed=geocode_failed),
+    Stage('geocode_platform_b', geocode_platform_b, ['raw_platform_b'], row_local=True,
+          output='platform_b_geocoded', code=[enrich, geocache, gazetteer, llm_parse], failed=geocode_failed),
+    Stage('merge', merge, ['geocode_platform_a', 'geocode_platform_b'], code=[specs]),
+    Stage('zipcode_fix', zipcode_fix, ['merge'], output='master_cleaned_features', code=[fuzzy_match]),
+    Stage('deduplicate', deduplicate, ['zipcode_fix'], output='bandung_housing_FINAL',
+          code=[geo_dedup, near_dup]),
+    Stage('classify', classify, ['deduplicate'], row_local=True, output='bandung_housing_CLASSIFIED'),
+    Stage('remove_outliers', remove_outliers, ['classify'], row_local=True, output='bandung_housing_MODEL_READY',
+          code=[admin_geocoder]),
+]
@@ -0,0 +1,84 @@
+# File: api_standin.py
+#
+# Local stand-in for the Platform B JSON API, replaying responses recorded by
+#   python run.py platform_b_api -a record_dir=recordings
+# so the API spider can be run and tested without touching the real site:
+#   python api_standin.py recordings --port 8800 --token-ttl 60
+#   PLATFORM_B_API_URL="http://127.0.0.1:8800/api/search" \
+#   PLATFORM_B_TOKEN_URL="http://127.0.0.1:8800/api/auth/token" \
+#   PLATFORM_B_DOMAIN=127.0.0.1 python run.py platform_b_api
+import argparse
+import json
+import secrets
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    recordings_dir = Path("recordings")
+    token_ttl = 3600
+    tokens = {}  # token -> expiry timestamp
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith("/auth/token"):
+            return self.issue_token()
+        if url.path.endswith("/search"):
+            return self.search(parse_qs(url.query))
+        self.send_json(404, {"error": "not found"})
+
+    def issue_token(self):
+        token = secrets.token_hex(16)
+        self.tokens[token] = time.time() + self.token_ttl
+        self.send_json(200, {"access_token": token, "token_type": "Bearer", "expires_in": self.token_ttl})
+
+    def search(self, query):
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if self.tokens.get(token, 0) <= time.time():
+            return self.send_json(401, {"error": "invalid or expired token"})
+
+        page = int(query.get("page", ["1"])[0])
+        recording = self.recordings_dir / f"search_page_{page}.json"
+        if not recording.exists():
+            # Past the last recorded page: an empty page ends the crawl
+            return self.send_json(200, {"data": [], "meta": {"page": page}})
+        self.send_body(200, recording.read_bytes())
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload).encode("utf-8"))
+
+    def send_body(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        print(f"[stand-in] {self.address_string()} {format % args}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Platform B API responses locally.")
+    parser.add_argument("recordings_dir", help="directory with search_page_<n>.json files")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--token-ttl", type=int, default=3600,
+                        help="token lifetime in seconds (set it low to exercise the 401 refresh)")
+    args = parser.parse_args()
+
+    StandInHandler.recordings_dir = Path(args.recordings_dir)
+    StandInHandler.token_ttl = args.token_ttl
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StandInHandler)
+    print(f"Serving {args.recordings_dir} on http://127.0.0.1:{args.port}/api/search (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
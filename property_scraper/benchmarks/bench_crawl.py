@@ -0,0 +1,144 @@
+# File: benchmarks/bench_crawl.py
+#
+# End-to-end crawl throughput benchmark against the offline fixture site
+# (fixture_site.py). Each spider runs through run.py in its own process, the
+# way it does in production, and is measured for items/sec, wall time, CPU
+# time and peak RSS (of the crawl process and the browsers it waited for),
+# and checked to fetch exactly pages * (per_page + 1) pages.
+#
+# Usage (from the property_scraper/ directory):
+#   python benchmarks/bench_crawl.py [--spiders platform_a_listings platform_b_listings]
+#                                    [--pages 10] [--latency 50] [--fail-rate 0.02] [--json out.json]
+# Platform B renders every page with Playwright, so it needs `playwright install chromium`.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_site import add_site_arguments, make_server  # noqa: E402
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+
+# Settings that make a benchmark run measure the crawler, not our politeness or caches
+BENCH_SETTINGS = {
+    "ROBOTSTXT_OBEY": "False",
+    "DOWNLOAD_DELAY": "0",
+    "ADAPTIVE_THROTTLE_START_DELAY": "0",
+    "ADAPTIVE_THROTTLE_MIN_DELAY": "0",
+    "SEEN_INDEX_ENABLED": "False",
+    "SNAPSHOT_ENABLED": "False",
+    "COLUMNAR_EXPORT_ENABLED": "False",
+    "METRICS_ENABLED": "True",
+    "LOG_LEVEL": "INFO",
+}
+
+
+def spider_env(spider_name, base):
+    env = {**os.environ, "PLATFORM_A_DOMAIN": "127.0.0.1", "PLATFORM_B_DOMAIN": "127.0.0.1", "HEADLESS_MODE": "True"}
+    env["PLATFORM_A_BASE_URL"] = f"{base}/a/search"
+    env["PLATFORM_B_SEARCH_URL"] = f"{base}/b/search"
+    return env
+
+
+def pages_fetched(metrics_dir, spider_name):
+    """Final responses (after retries) in the crawl's metrics report: one per page fetched."""
+    reports = sorted(Path(metrics_dir).glob(f"{spider_name}_*.json"))
+    if not reports:
+        return None
+    with open(reports[-1], encoding="utf-8") as f:
+        sections = json.load(f)["metrics"].get(spider_name, {})
+    return sum(section.get("retries", {}).get("count", 0) for section in sections.values())
+
+
+def run_spider(spider_name, base, out_dir, pages, extra_settings):
+    feed = out_dir / f"{spider_name}.jsonl"
+    log = out_dir / f"{spider_name}.log"
+    settings = {
+        **BENCH_SETTINGS,
+        **extra_settings,
+        "FEEDS": json.dumps({str(feed): {"format": "jsonlines", "overwrite": True}}),
+        "LOG_FILE": str(log),
+        "METRICS_REPORT_DIR": str(out_dir / "metrics"),
+    }
+    cmd = [sys.executable, "run.py", spider_name, "-a", "start_page=1", "-a", f"end_page={pages}"]
+    for name, value in settings.items():
+        cmd += ["-s", f"{name}={value}"]
+
+    started = time.monotonic()
+    proc = subprocess.Popen(cmd, cwd=PROJECT_DIR, env=spider_env(spider_name, base))
+    # wait4 gives the rusage of this crawl alone (and of the browser processes it reaped)
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.monotonic() - started
+
+    items = sum(1 for line in open(feed, encoding="utf-8") if line.strip()) if feed.exists() else 0
+    return {
+        "spider": spider_name,
+        "exit_code": proc.returncode,
+        "items": items,
+        "pages_fetched": pages_fetched(out_dir / "metrics", spider_name),
+        "wall_s": round(wall, 2),
+        "items_per_s": round(items / wall, 2) if wall else None,
+        "cpu_s": round(usage.ru_utime + usage.ru_stime, 2),
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),  # ru_maxrss is in KiB on Linux
+        "log": str(log),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl throughput benchmark against the offline fixture site.")
+    add_site_arguments(parser)
+    parser.add_argument("--spiders", nargs="+", default=["platform_a_listings", "platform_b_listings"])
+    parser.add_argument("-s", dest="settings", action="append", default=[], metavar="NAME=VALUE",
+                        help="extra setting override for the crawls (may be repeated)")
+    parser.add_argument("--out-dir", help="where feeds, logs and metrics go (default: a temp dir)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.pages, args.per_page, args.latency, args.jitter,
+                         args.fail_rate, args.block_rate, args.js_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{args.port}"
+    out_dir = Path(args.out_dir or tempfile.mkdtemp(prefix="bench_crawl_"))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    extra = dict(pair.split("=", 1) for pair in args.settings)
+
+    print(f"Fixture site: {base} ({args.pages} pages x {args.per_page} listings, latency {args.latency} ms, "
+          f"fail {args.fail_rate:.0%}, block {args.block_rate:.0%}, js {args.js_rate:.0%})")
+    print(f"Output: {out_dir}\n")
+    results = []
+    try:
+        for spider_name in args.spiders:
+            print(f"Running {spider_name}...")
+            result = run_spider(spider_name, base, out_dir, args.pages, extra)
+            results.append(result)
+            if result["exit_code"] != 0:
+                print(f"  ⚠️ exited with code {result['exit_code']}, see {result['log']}")
+    finally:
+        server.shutdown()
+
+    expected = args.pages * args.per_page
+    expected_pages = args.pages * (args.per_page + 1)  # each search page plus its listings
+    print(f"\n{'spider':<22} {'items':>7} {'wall s':>8} {'items/s':>8} {'cpu s':>7} {'peak MB':>8}")
+    for r in results:
+        print(f"{r['spider']:<22} {r['items']:>7} {r['wall_s']:>8} {r['items_per_s']:>8} {r['cpu_s']:>7} {r['peak_rss_mb']:>8}")
+        if r["items"] < expected:
+            print(f"  ⚠️ expected {expected} items")
+        if r["pages_fetched"] is not None and r["pages_fetched"] != expected_pages:
+            print(f"  ⚠️ fetched {r['pages_fetched']} pages, expected {expected_pages}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"site": vars(args), "results": results}, f, indent=2)
+    return 0 if all(r["exit_code"] == 0 for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
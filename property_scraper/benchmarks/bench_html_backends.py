@@ -0,0 +1,118 @@
+# File: benchmarks/bench_html_backends.py
+#
+# Compares the HTML backends in property_scraper.html_backends on the two
+# offline extraction jobs: listing cards from a saved search-results page
+# (manual_scraper.py) and specs from a listing detail page (test_profile.py).
+# Checks that every backend extracts the same items, then reports pages/sec
+# on one core.
+#
+# Pages come from --html-dir (saved *.html search pages) or are generated to
+# look like the saved Platform B pages: 20 cards in a page padded with the
+# navigation, scripts and footer markup a real page carries.
+#
+# Usage (from the property_scraper/ directory):
+#   python benchmarks/bench_html_backends.py [--pages 200] [--html-dir saved_pages/]
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from property_scraper.extraction import extract_cards, extract_detail  # noqa: E402
+from property_scraper.html_backends import available_backends  # noqa: E402
+
+BASE_URL = "https://www.platform-b.com"
+# Roughly what surrounds the listings on a real page
+PADDING = "".join(
+    f"<li class='nav-item'><a href='/cat/{i}'>Kategori {i}</a><span class='badge'>{i * 7}</span></li>" for i in range(150)
+) + "<script>" + "var x=1;" * 3000 + "</script>"
+
+
+def search_page(seed, cards=20):
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(cards):
+        n = seed * cards + i
+        specs = "".join(
+            f"<div title='{title}'><span class='icon'></span><span>{value}</span></div>"
+            for title, value in [("Kamar Tidur", rng.randint(1, 6)), ("Kamar Mandi", rng.randint(1, 4)),
+                                 ("Luas Tanah", f"{rng.randint(60, 600)} m²"), ("Luas Bangunan", f"{rng.randint(40, 500)} m²")]
+        )
+        price = f"Rp {rng.randint(3, 150) / 10:.1f}".replace(".", ",") + " Miliar"
+        blocks.append(
+            f"<div class='listing-card-container'><div class='card-media'><img src='/img/{n}.jpg'></div>"
+            f"<a href='/id/properti/rumah-dijual-{1011000000 + n}'><h2>Rumah {n}</h2></a>"
+            f"<div class='price-label'><strong>{price}</strong></div><address>Buahbatu, Bandung</address>"
+            f"<div class='attribute-list'><div>{specs}</div></div>"
+            f"<div class='card-details'><p>Rumah siap huni<br>dekat tol {n}</p></div></div>"
+        )
+    return f"<html><head><title>Search</title></head><body><ul>{PADDING}</ul>{''.join(blocks)}</body></html>"
+
+
+def detail_page(seed):
+    rng = random.Random(seed)
+    overview = "".join(f"<div><span>{v}</span><span>{k}</span></div>"
+                       for k, v in [("Kamar Tidur", rng.randint(1, 6)), ("Kamar Mandi", rng.randint(1, 4))])
+    rows = "".join(f"<tr><td class='header'><p>{k}</p></td><td class='description'><p>{v}</p></td></tr>"
+                   for k, v in [("Luas Tanah", f"{rng.randint(60, 600)} m²"), ("Luas Bangunan", f"{rng.randint(40, 500)} m²"),
+                                ("Sertifikat", "SHM"), ("Daya Listrik", "2200 mAh")])
+    return (f"<html><body><ul>{PADDING}</ul><div class='price-tag'><strong>Rp {rng.randint(300, 9000)} Juta</strong></div>"
+            f"<address class='location-text'>Jl. Dago {seed}, Bandung</address>"
+            f"<div class='generic-listing-overview'>{overview}</div>"
+            f"<div class='generic-detail-table'><table>{rows}</table></div></body></html>")
+
+
+def without_timestamps(items):
+    return [{k: v for k, v in item.items() if k != "scraped_at"} for item in items]
+
+
+def bench(label, func, pages, repeat):
+    best = min(timeit_once(func) for _ in range(repeat))
+    print(f"  {label:<12} {best * 1000:9.1f} ms   {len(pages) / best:9.0f} pages/s")
+    return best
+
+
+def timeit_once(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML parsing backends on saved listing pages.")
+    parser.add_argument("--pages", type=int, default=200, help="generated pages per job")
+    parser.add_argument("--html-dir", help="use saved search-result pages (*.html) instead of generated ones")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per case (best is reported)")
+    parser.add_argument("--backends", nargs="+", help="default: every installed backend")
+    args = parser.parse_args()
+
+    if args.html_dir:
+        search_pages = [p.read_text(encoding="utf-8", errors="replace") for p in sorted(Path(args.html_dir).glob("*.html"))]
+    else:
+        search_pages = [search_page(i) for i in range(args.pages)]
+    detail_pages = [detail_page(i) for i in range(args.pages)]
+    backends = args.backends or available_backends()
+    print(f"{len(search_pages)} search pages (~{sum(map(len, search_pages)) // len(search_pages) // 1024} KB), "
+          f"{len(detail_pages)} detail pages; backends: {', '.join(backends)}\n")
+
+    jobs = [
+        ("search-page cards", search_pages, lambda html, b: extract_cards(html, BASE_URL, backend=b)),
+        ("detail-page specs", detail_pages, lambda html, b: [extract_detail(html, "https://x/1", backend=b)]),
+    ]
+    for label, pages, extract in jobs:
+        print(f"{label}:")
+        # Every backend must extract exactly what bs4 (the old parser) does
+        reference = without_timestamps(extract(pages[0], "bs4"))
+        for backend in backends:
+            if without_timestamps(extract(pages[0], backend)) != reference:
+                print(f"  ⚠️ {backend} extracts different items than bs4 on the first page")
+        timings = {b: bench(b, lambda b=b: [extract(html, b) for html in pages], pages, args.repeat) for b in backends}
+        if "bs4" in timings:
+            fastest = min(timings, key=timings.get)
+            print(f"  {fastest} is {timings['bs4'] / timings[fastest]:.1f}x faster than bs4\n")
+
+
+if __name__ == "__main__":
+    main()
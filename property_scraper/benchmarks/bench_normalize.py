@@ -0,0 +1,105 @@
+# File: benchmarks/bench_normalize.py
+#
+# Micro-benchmarks for property_scraper.normalize over the checked-in
+# scraped_listings_detailed.jsonl. Compares the old per-scraper helpers
+# (uncompiled regex on every call) with the shared scalar and batch APIs.
+# Prices and sizes are shifted per listing so every string is distinct and
+# the batch API's memo only helps where real data repeats itself (room
+# counts, which are a handful of distinct strings).
+#
+# Usage (from the property_scraper/ directory):
+#   python benchmarks/bench_normalize.py [--scale 50] [--repeat 5]
+import argparse
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from property_scraper.normalize import (  # noqa: E402
+    parse_price, parse_size_sqm, parse_count, parse_prices, parse_sizes, parse_counts,
+)
+
+DATA_PATH = Path(__file__).resolve().parents[1] / "scraped_listings_detailed.jsonl"
+SIZE_NUMBER_RE = re.compile(r"\d+(?:\.\d{3})*")
+
+
+# --- The helpers as they were copy-pasted across the scrapers (baseline) ---
+def legacy_parse_full_price(s):
+    if s: numbers = re.findall(r"\d+", s); return int("".join(numbers)) if numbers else None
+    return None
+
+
+def legacy_parse_size_sqm(s):
+    if s and isinstance(s, str): numbers = re.findall(r"\d+", s); return int(numbers[0]) if numbers else None
+    return None
+
+
+def legacy_parse_count(s):
+    return re.search(r'\d+', s).group() if s and re.search(r'\d+', s) else None
+
+
+def price_strings(price):
+    """The ways the platforms display a price: full amount, Miliar/Juta and the 'M' shorthand."""
+    if price >= 1_000_000_000:
+        short = f"{price / 1_000_000_000:.2f}".rstrip("0").rstrip(".").replace(".", ",")
+        return [f"Rp {price:,}".replace(",", "."), f"Rp {short} Miliar", f"Rp {short} M"]
+    short = f"{price / 1_000_000:.0f}"
+    return [f"Rp {price:,}".replace(",", "."), f"Rp {short} Juta"]
+
+
+def load_raw_strings(scale):
+    listings = []
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            listing = json.loads(line)
+            listings.append((listing.get("price"), listing.get("specs") or {}))
+
+    # Listing n of the scaled set gets n x 10 juta and n m² more, so strings (nearly) never repeat
+    prices, sizes, counts = [], [], []
+    for n, (price, specs) in enumerate(listings * scale):
+        if isinstance(price, int):
+            prices.extend(price_strings(price + n * 10_000_000))
+        for key, value in specs.items():
+            if key in ("Luas Tanah", "Luas Bangunan"):
+                number = SIZE_NUMBER_RE.search(value)
+                sizes.append(value if not number else
+                             f"{int(number.group(0).replace('.', '')) + n:,} m²".replace(",", "."))
+            elif key in ("Kamar Tidur", "Kamar Mandi"):
+                counts.append(value)
+    return prices, sizes, counts
+
+
+def bench(label, func, n_values, repeat):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"  {label:<28} {best * 1000:9.2f} ms   {n_values / best / 1e6:7.2f} M values/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=50, help="repeat the dataset this many times")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per case (best is reported)")
+    args = parser.parse_args()
+
+    prices, sizes, counts = load_raw_strings(args.scale)
+    print(f"Loaded {len(prices)} price, {len(sizes)} size and {len(counts)} count strings "
+          f"from {DATA_PATH.name} (x{args.scale}).\n")
+
+    cases = [
+        ("prices", prices, legacy_parse_full_price, parse_price, parse_prices),
+        ("sizes", sizes, legacy_parse_size_sqm, parse_size_sqm, parse_sizes),
+        ("counts", counts, legacy_parse_count, parse_count, parse_counts),
+    ]
+    for name, values, legacy, scalar, batch in cases:
+        print(f"{name} ({len(set(values)):,} distinct):")
+        t_legacy = bench("legacy helper (per call)", lambda: [legacy(v) for v in values], len(values), args.repeat)
+        t_scalar = bench("normalize scalar", lambda: [scalar(v) for v in values], len(values), args.repeat)
+        t_batch = bench("normalize batch", lambda: batch(values), len(values), args.repeat)
+        print(f"  vs legacy: scalar {t_legacy / t_scalar:.2f}x, batch {t_legacy / t_batch:.2f}x\n")
+
+
+if __name__ == "__main__":
+    main()
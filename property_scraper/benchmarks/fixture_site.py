@@ -0,0 +1,242 @@
+# File: benchmarks/fixture_site.py
+#
+# Offline mock of Platform A and Platform B for benchmarking the spiders
+# without touching the live sites. Pages are generated deterministically from
+# the listing number and carry the markup the spiders select on:
+#   Platform A  /a/search?page=N   div.property-card a[title]
+#               /a/property/<id>   JSON-LD Product @graph + "Kamar Tidur" spec rows
+#   Platform B  /b/search?page=N   h2 inside a, a.pagination-next
+#               /b/id/properti/<id> div.price-tag, div.listing-overview, listing-details table
+# A share of pages can be served as JS-rendered shells (content decoded by a
+# script, so the plain-HTTP body lacks the markers), slowed down, failed with
+# 500s or blocked with 429s.
+#
+# Usage (from the property_scraper/ directory):
+#   python benchmarks/fixture_site.py --port 8900 --pages 20 --latency 50 --fail-rate 0.02
+import argparse
+import base64
+import html
+import json
+import random
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+DISTRICTS = ["Arcamanik", "Antapani", "Buahbatu", "Cicendo", "Coblong", "Sukajadi", "Lengkong", "Bojongsoang"]
+STREETS = ["Jl. Soekarno Hatta", "Jl. Dago", "Jl. Setiabudi", "Jl. Buah Batu", "Jl. Pasteur", "Jl. Riau"]
+
+
+def listing(n):
+    """The synthetic listing number n; the same n always gives the same listing."""
+    rng = random.Random(n)
+    district = rng.choice(DISTRICTS)
+    land = rng.randrange(60, 600, 6)
+    price = rng.randrange(300, 15000) * 1_000_000
+    return {
+        "slug": f"rumah-dijual-{district.lower()}-{1010000000 + n}",
+        "title": f"Rumah {rng.choice(['Minimalis', 'Asri', 'Strategis', 'Baru'])} di {district}",
+        "price": price,
+        "street": f"{rng.choice(STREETS)} No. {rng.randint(1, 200)}",
+        "district": district,
+        "lat": round(-6.95 + rng.uniform(-0.05, 0.05), 6),
+        "lng": round(107.62 + rng.uniform(-0.08, 0.08), 6),
+        "bedrooms": rng.randint(1, 6),
+        "bathrooms": rng.randint(1, 4),
+        "land": land,
+        "building": int(land * rng.uniform(0.5, 1.5)),
+        "description": " ".join(
+            [f"Dijual rumah di {district}, Bandung.", f"Luas tanah {land} m2."]
+            + [rng.choice(["Dekat tol.", "Bebas banjir.", "SHM.", "Siap huni.", "Carport 2 mobil."]) for _ in range(40)]
+        ),
+    }
+
+
+def price_text(price):
+    if price >= 1_000_000_000:
+        return f"Rp {price / 1_000_000_000:.2f}".rstrip("0").rstrip(".").replace(".", ",") + " Miliar"
+    return f"Rp {price // 1_000_000} Juta"
+
+
+def page(title, body):
+    return f"<!DOCTYPE html><html><head><title>{html.escape(title)}</title></head><body>{body}</body></html>"
+
+
+def js_shell(title, body):
+    """Same page, but the content only exists after a script runs (forces a Playwright render)."""
+    encoded = base64.b64encode(body.encode("utf-8")).decode()
+    script = f"document.getElementById('app').innerHTML = new TextDecoder().decode(Uint8Array.from(atob('{encoded}'), c => c.charCodeAt(0)));"
+    return page(title, f"<div id='app'>Loading...</div><script>{script}</script>")
+
+
+def platform_a_search(page_no, pages, per_page):
+    cards = []
+    if page_no <= pages:
+        for n in range((page_no - 1) * per_page, page_no * per_page):
+            item = listing(n)
+            cards.append(
+                f"<div class='property-card'><a title='{html.escape(item['title'])}' "
+                f"href='/a/property/{item['slug']}'>{html.escape(item['title'])}</a>"
+                f"<p>{price_text(item['price'])}</p></div>"
+            )
+    # The list container is there even when a page has no results
+    return page(f"Rumah dijual - halaman {page_no}", f"<div class='property-card-list'>{''.join(cards)}</div>")
+
+
+def platform_a_detail(n):
+    item = listing(n)
+    ld = {
+        "@context": "https://schema.org",
+        "@graph": [
+            {"@type": "Product", "sku": item["slug"], "name": item["title"], "description": item["description"],
+             "offers": {"@type": "Offer", "price": item["price"], "priceCurrency": "IDR"}},
+            {"@type": "Place", "address": {"streetAddress": item["street"], "addressLocality": item["district"]},
+             "geo": {"latitude": item["lat"], "longitude": item["lng"]}},
+        ],
+    }
+    specs = [("Kamar Tidur", item["bedrooms"]), ("Kamar Mandi", item["bathrooms"]),
+             ("Luas Tanah", f"{item['land']} m²"), ("Luas Bangunan", f"{item['building']} m²")]
+    rows = "".join(f"<div><p>{k}</p><p>{v}</p></div>" for k, v in specs)
+    return page(item["title"], (
+        f"<script type='application/ld+json'>{json.dumps(ld)}</script>"
+        f"<h1>{html.escape(item['title'])}</h1><p class='price-label'>{price_text(item['price'])}</p>"
+        f"<p class='property-address'>{html.escape(item['street'])}, {item['district']}</p>"
+        f"<div class='specs'>{rows}</div>"
+        f"<div class='property-description-text'><p>{html.escape(item['description'])}</p></div>"
+    ))
+
+
+def platform_b_search(page_no, pages, per_page):
+    links = []
+    if page_no <= pages:
+        for n in range((page_no - 1) * per_page, page_no * per_page):
+            item = listing(n)
+            links.append(f"<article><a href='/b/id/properti/{item['slug']}'><h2>{html.escape(item['title'])}</h2></a>"
+                         f"<p>{price_text(item['price'])}</p></article>")
+    pager = f"<a class='pagination-next' href='/b/search?page={page_no + 1}'>Next</a>" if page_no < pages else ""
+    return page(f"Rumah dijual Bandung - {page_no}", f"<main>{''.join(links)}</main><nav>{pager}</nav>")
+
+
+def platform_b_detail(n):
+    item = listing(n)
+    overview = "".join(f"<div><span>{v}</span><span>{k}</span></div>" for k, v in
+                       [("Kamar Tidur", item["bedrooms"]), ("Kamar Mandi", item["bathrooms"])])
+    table = (f"<tr><td class='table-header'><p>Luas Tanah</p></td><td class='table-value'><p>{item['land']} m²</p></td></tr>"
+             f"<tr><td class='table-header'><p>Luas Bangunan</p></td><td class='table-value'><p>{item['building']} m²</p></td></tr>")
+    return page(item["title"], (
+        f"<h1>{html.escape(item['title'])}</h1>"
+        f"<div class='price-tag'><strong>{price_text(item['price'])}</strong></div>"
+        f"<address class='location-address'>{html.escape(item['street'])}, {item['district']}, Bandung, Jawa Barat</address>"
+        f"<div class='listing-overview'>{overview}</div>"
+        f"<div class='listing-details'><table>{table}</table></div>"
+        f"<div class='listing-description'><p>{html.escape(item['description'])}</p></div>"
+    ))
+
+
+def listing_number(slug):
+    return int(slug.rsplit("-", 1)[-1]) - 1010000000
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    pages = 20
+    per_page = 20
+    latency = 0.0      # seconds, added to every page
+    jitter = 0.0       # seconds, uniform extra on top
+    fail_rate = 0.0    # share of page requests answered with a 500
+    block_rate = 0.0   # share answered with a 429 + Retry-After
+    js_rate = 0.0      # share of pages served as JS-rendered shells
+    quiet = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/robots.txt":
+            return self.send_page(200, "User-agent: *\nAllow: /\n", "text/plain")
+
+        # Decisions are keyed on the URL (and attempt time for failures) so retries can succeed
+        rng = random.Random(f"{self.path}-{time.time()}")
+        time.sleep(self.latency + rng.uniform(0, self.jitter))
+        if rng.random() < self.block_rate:
+            return self.send_page(429, page("Too Many Requests", "<h1>429</h1>"), extra_headers={"Retry-After": "1"})
+        if rng.random() < self.fail_rate:
+            return self.send_page(500, page("Server Error", "<h1>500</h1>"))
+
+        page_no = int(parse_qs(url.query).get("page", ["1"])[0])
+        parts = url.path.strip("/").split("/")
+        try:
+            if url.path == "/a/search":
+                title, body = "search", platform_a_search(page_no, self.pages, self.per_page)
+            elif url.path == "/b/search":
+                title, body = "search", platform_b_search(page_no, self.pages, self.per_page)
+            elif parts[:2] == ["a", "property"]:
+                title, body = "detail", platform_a_detail(listing_number(parts[2]))
+            elif parts[:3] == ["b", "id", "properti"]:
+                title, body = "detail", platform_b_detail(listing_number(parts[3]))
+            else:
+                return self.send_page(404, page("Not Found", "<h1>404</h1>"))
+        except (IndexError, ValueError):
+            return self.send_page(404, page("Not Found", "<h1>404</h1>"))
+
+        # Decide per URL (not per attempt), so a JS page stays a JS page
+        if random.Random(zlib.crc32(self.path.encode())).random() < self.js_rate:
+            start, end = body.index("<body>") + 6, body.index("</body>")
+            body = js_shell(title, body[start:end])
+        self.send_page(200, body)
+
+    def send_page(self, status, text, content_type="text/html; charset=utf-8", extra_headers=None):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            print(f"[fixture] {self.address_string()} {format % args}")
+
+
+def make_server(port=8900, pages=20, per_page=20, latency_ms=0, jitter_ms=0,
+                fail_rate=0.0, block_rate=0.0, js_rate=0.0, quiet=True):
+    # A subclass per server, so several fixture sites can run side by side
+    handler = type("ConfiguredFixtureHandler", (FixtureHandler,), {
+        "pages": pages, "per_page": per_page, "latency": latency_ms / 1000, "jitter": jitter_ms / 1000,
+        "fail_rate": fail_rate, "block_rate": block_rate, "js_rate": js_rate, "quiet": quiet,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def add_site_arguments(parser):
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--pages", type=int, default=20, help="search pages per platform")
+    parser.add_argument("--per-page", type=int, default=20, help="listings per search page")
+    parser.add_argument("--latency", type=float, default=0, help="added latency per page, ms")
+    parser.add_argument("--jitter", type=float, default=0, help="extra random latency, ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of pages answered with 500")
+    parser.add_argument("--block-rate", type=float, default=0.0, help="share of pages answered with 429")
+    parser.add_argument("--js-rate", type=float, default=0.0, help="share of pages served as JS-rendered shells")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic Platform A/B pages for offline crawls.")
+    add_site_arguments(parser)
+    args = parser.parse_args()
+    server = make_server(args.port, args.pages, args.per_page, args.latency, args.jitter,
+                         args.fail_rate, args.block_rate, args.js_rate, quiet=False)
+    base = f"http://127.0.0.1:{args.port}"
+    print(f"Serving fixtures on {base} (Ctrl+C to stop)")
+    print(f"  PLATFORM_A_BASE_URL={base}/a/search PLATFORM_A_DOMAIN=127.0.0.1")
+    print(f"  PLATFORM_B_SEARCH_URL={base}/b/search PLATFORM_B_DOMAIN=127.0.0.1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import asyncio
 import os
 from playwright.async_api import async_playwright
 from dotenv import load_dotenv
+from scrapy.utils.project import get_project_settings
+from property_scraper.route_filter import RouteFilter
 
 # Load environment variables
 load_dotenv()
@@ -46,6 +48,9 @@ async def main():
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=False) # headless=False lets you see the browser
         page = await browser.new_page()
+        # XHR/fetch calls are never blocked, so the API traffic shows up as before
+        route_filter = RouteFilter.from_settings(get_project_settings())
+        await route_filter.install(page)
 
         # Register our logging function to listen to network responses
         page.on("response", log_response)
@@ -78,7 +83,7 @@ async def main():
             print("❌ Could not find the 'Next' button on the page.")
 
         await browser.close()
-        print("\nDiagnostic script finished.")
+        print(f"\nDiagnostic script finished ({route_filter.summary()}).")
 
 if __name__ == "__main__":
     # Ensure Playwright browsers are installed
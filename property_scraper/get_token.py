@@ -1,17 +1,18 @@
 # File: get_token.py
 import asyncio
 import os
-from playwright.async_api import async_playwright
-# This import will work with the specific version (1.0.6) we just installed.
-from playwright_stealth import stealth_async
 from dotenv import load_dotenv
+# Stealth patches (playwright_stealth 1.0.6) are applied inside capture_token_headless
+from scrapy.utils.project import get_project_settings
+from property_scraper.auth import TokenCache, capture_token_headless
+from property_scraper.route_filter import RouteFilter
 
 load_dotenv()
 
 async def main():
     """
-    Launches a stealthy browser to intercept the authorization token
-    and prints it to the console.
+    Launches a stealthy browser to intercept the authorization token,
+    caches it for the platform_b_api spider and prints it to the console.
     """
     # Load targets from environment to hide specific URLs
     target_url = os.getenv("TARGET_PLATFORM_B_URL", "https://www.platform-b.com/listings")
@@ -19,36 +20,24 @@ async def main():
     # Generic API pattern (In reality, this matches the specific site's auth endpoint)
     target_api_pattern = "**/api/auth/token" 
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+    print(f"Navigating to {target_url} with a stealth browser...")
 
-        # Apply the stealth patches
-        await stealth_async(page)
+    try:
+        route_filter = RouteFilter.from_settings(get_project_settings())
+        token_data = await capture_token_headless(target_url, target_api_pattern, route_filter=route_filter)
+        print(f"Page weight: {route_filter.summary()}")
 
-        print(f"Navigating to {target_url} with a stealth browser...")
+        # Assuming standard OAuth structure
+        cache = TokenCache(os.getenv("PLATFORM_B_TOKEN_CACHE", ".platform_b_token.json"))
+        access_token = cache.save(token_data)
 
-        try:
-            # Listen for the token response while navigating
-            async with page.expect_response(target_api_pattern, timeout=30000) as response_info:
-                await page.goto(target_url)
-            
-            token_response = await response_info.value
-            token_data = await token_response.json()
-            
-            # Assuming standard OAuth structure
-            access_token = token_data.get('access_token')
-
-            print("\n✅ SUCCESS! Here is your token:\n")
-            print(access_token)
-            print("\nCopy this token and paste it into your Scrapy spider.")
-        
-        except Exception as e:
-            print(f"\n❌ ERROR: Failed to get token. The site's security may have changed, or a CAPTCHA appeared.")
-            print(f"   Details: {e}")
-        
-        finally:
-            await browser.close()
+        print("\n✅ SUCCESS! Here is your token:\n")
+        print(access_token)
+        print(f"\nIt has been cached in '{cache.path}', where the platform_b_api spider picks it up.")
+    
+    except Exception as e:
+        print(f"\n❌ ERROR: Failed to get token. The site's security may have changed, or a CAPTCHA appeared.")
+        print(f"   Details: {e}")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,90 @@
+# property_scraper/auth.py
+#
+# Bearer-token handling for the Platform B JSON API: headless capture of the
+# token the site fetches from **/api/auth/token (see get_token.py) plus a small
+# on-disk cache so it is reused until it expires.
+import base64
+import json
+import os
+import time
+
+# Fallback lifetime when neither the token response nor the JWT says when it expires
+DEFAULT_TOKEN_TTL = 30 * 60
+# Refresh a little early so requests in flight don't race the expiry
+EXPIRY_MARGIN = 60
+
+
+def token_expiry(token_data, now=None):
+    """Works out when a token expires from the token response or its JWT 'exp' claim."""
+    now = time.time() if now is None else now
+    if token_data.get("expires_at"):
+        return float(token_data["expires_at"])
+    if token_data.get("expires_in"):
+        return now + float(token_data["expires_in"])
+    try:
+        payload = token_data["access_token"].split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (KeyError, IndexError, ValueError, TypeError):
+        return now + DEFAULT_TOKEN_TTL
+
+
+class TokenCache:
+    """Keeps the current access token in a small JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self, now=None):
+        """Returns the cached token, or None if there is none or it has (nearly) expired."""
+        now = time.time() if now is None else now
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if cached.get("expires_at", 0) - EXPIRY_MARGIN <= now:
+            return None
+        return cached.get("access_token")
+
+    def save(self, token_data, now=None):
+        cached = {"access_token": token_data["access_token"], "expires_at": token_expiry(token_data, now)}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cached, f)
+        os.replace(tmp_path, self.path)
+        return cached["access_token"]
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+async def capture_token_headless(target_url, token_pattern="**/api/auth/token", timeout=30000, route_filter=None):
+    """
+    Opens the site in a headless (stealth, if available) browser and returns the
+    JSON body of the token response it requests while loading. A RouteFilter, if
+    given, keeps images, fonts and trackers from loading meanwhile.
+    """
+    from playwright.async_api import async_playwright
+    try:
+        from playwright_stealth import stealth_async
+    except ImportError:
+        stealth_async = None
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            page = await browser.new_page()
+            if stealth_async:
+                await stealth_async(page)
+            if route_filter is not None:
+                await route_filter.install(page)
+            async with page.expect_response(token_pattern, timeout=timeout) as response_info:
+                await page.goto(target_url)
+            token_response = await response_info.value
+            return await token_response.json()
+        finally:
+            await browser.close()
@@ -0,0 +1,175 @@
+# property_scraper/columnar.py
+#
+# Fixed Arrow schema for scraped listings, plus the helpers to write and read
+# the Parquet shards produced by ColumnarExportPipeline. The nested `specs`
+# dict is flattened into one string column per known spec (SPEC_COLUMNS);
+# anything else goes to `specs_extra` as JSON, so every shard has the same
+# columns no matter which specs a page happened to show.
+import json
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Spec label on the listing page -> column name
+SPEC_COLUMNS = {
+    'Kamar Tidur': 'spec_kamar_tidur',
+    'Kamar Mandi': 'spec_kamar_mandi',
+    'Luas Tanah': 'spec_luas_tanah',
+    'Luas Bangunan': 'spec_luas_bangunan',
+    'Tipe Properti': 'spec_tipe_properti',
+    'Sertifikat': 'spec_sertifikat',
+    'Daya Listrik': 'spec_daya_listrik',
+    'Jumlah Lantai': 'spec_jumlah_lantai',
+    'Carport': 'spec_carport',
+    'Garasi': 'spec_garasi',
+    'Kondisi Properti': 'spec_kondisi_properti',
+    'Hadap': 'spec_hadap',
+}
+
+LISTING_SCHEMA = pa.schema(
+    [
+        ('id', pa.string()),
+        ('url', pa.string()),
+        ('scraped_at', pa.timestamp('us')),
+        ('price', pa.int64()),
+        ('address', pa.string()),
+        ('address_locality', pa.string()),
+        ('latitude', pa.float64()),
+        ('longitude', pa.float64()),
+        ('description', pa.large_string()),
+        ('bedrooms', pa.int16()),
+        ('bathrooms', pa.int16()),
+        ('land_size_sqm', pa.float64()),
+        ('building_size_sqm', pa.float64()),
+    ]
+    + [(column, pa.string()) for column in SPEC_COLUMNS.values()]
+    + [('specs_extra', pa.string())]
+)
+
+
+def _as_int(value, bits=64):
+    """Whole number, or None if it is not one or does not fit in a signed `bits`-bit column."""
+    if value is None or value == '' or isinstance(value, bool):
+        return None
+    try:
+        number = int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+    limit = 1 << (bits - 1)
+    return number if -limit <= number < limit else None
+
+
+def _as_float(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_str(value):
+    if value is None:
+        return None
+    if isinstance(value, list):  # some selectors hand back several text nodes
+        return "\n".join(str(part) for part in value)
+    return str(value)
+
+
+COERCE = {
+    pa.int64(): _as_int,
+    pa.int16(): lambda value: _as_int(value, bits=16),  # 40000 bedrooms is a parsing slip, not a row to fail on
+    pa.float64(): _as_float,
+    pa.string(): _as_str,
+    pa.large_string(): _as_str,
+    pa.timestamp('us'): lambda value: value or None,  # ISO strings are cast by Arrow below
+}
+
+
+def flatten_item(item):
+    """One scraped item (dict or scrapy Item) -> a flat row matching LISTING_SCHEMA."""
+    item = dict(item)
+    specs = item.pop('specs', None) or {}
+    row = {}
+    for field in LISTING_SCHEMA:
+        if field.name in item:
+            row[field.name] = COERCE[field.type](item[field.name])
+
+    extra = {}
+    for key, value in specs.items():
+        column = SPEC_COLUMNS.get(key)
+        if column:
+            row[column] = _as_str(value)
+        else:
+            extra[key] = value
+    row['specs_extra'] = json.dumps(extra, ensure_ascii=False) if extra else None
+    return row
+
+
+def rows_to_table(rows):
+    """Flat rows -> an Arrow table with exactly LISTING_SCHEMA (missing columns are null)."""
+    columns = {}
+    for field in LISTING_SCHEMA:
+        values = [row.get(field.name) for row in rows]
+        if field.type == pa.timestamp('us'):
+            columns[field.name] = pa.array(values, pa.string()).cast(field.type, safe=False)
+        else:
+            columns[field.name] = pa.array(values, field.type)
+    return pa.table(columns, schema=LISTING_SCHEMA)
+
+
+def write_table_atomic(table, path, compression='zstd'):
+    """
+    Writes `table` to a hidden temp file next to `path` and renames it into
+    place, so readers (and a crash) never see a half-written shard.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    pq.write_table(table, tmp_path, compression=compression, use_dictionary=True)
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def specs_from_row(row):
+    """Rebuilds the original specs dict from the flattened spec columns of one row."""
+    specs = {}
+    for key, column in SPEC_COLUMNS.items():
+        value = row.get(column)
+        if isinstance(value, str):
+            specs[key] = value
+    extra = row.get('specs_extra')
+    if isinstance(extra, str):
+        specs.update(json.loads(extra))
+    return specs
+
+
+def read_listings(path, columns=None):
+    """
+    Loads a directory of listing shards (or one .parquet file) as a DataFrame,
+    reading only `columns` from disk when given. Asking for 'specs' rebuilds the
+    original dict column from the flattened spec columns.
+    """
+    wants_specs = columns is not None and 'specs' in columns
+    read_columns = columns
+    if wants_specs:
+        read_columns = [c for c in columns if c != 'specs']
+        read_columns += [c for c in list(SPEC_COLUMNS.values()) + ['specs_extra'] if c not in read_columns]
+
+    paths = sorted(Path(path).glob('*.parquet')) if Path(path).is_dir() else [Path(path)]
+    if not paths:
+        table = LISTING_SCHEMA.empty_table()
+        table = table.select(read_columns) if read_columns else table
+    else:
+        table = pq.ParquetDataset([str(p) for p in paths]).read(columns=read_columns)
+    df = table.to_pandas()
+
+    if columns is None or wants_specs:
+        spec_columns = list(SPEC_COLUMNS.values()) + ['specs_extra']
+        df['specs'] = [specs_from_row(row) for row in df[spec_columns].to_dict('records')]
+        if columns is not None:
+            df = df[columns]
+    return df
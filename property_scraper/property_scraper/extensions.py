@@ -0,0 +1,221 @@
+# property_scraper/extensions.py
+#
+# Crawl-wide extensions. Enable them in the EXTENSIONS setting.
+import re
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import TextResponse
+
+from . import metrics
+
+# Status codes that mean "slow down" rather than "this page is broken"
+BACKOFF_STATUSES = {403, 429, 503}
+
+
+class SlotState:
+    """What AdaptiveThrottle knows about one download slot (normally one domain)."""
+
+    def __init__(self, delay, concurrency):
+        self.delay = delay
+        self.concurrency = concurrency
+        self.latency = None       # EWMA of download + render time, seconds
+        self.base_latency = None  # Fastest EWMA seen: what the site does when it is not under load
+        self.responses = 0
+        self.errors = 0
+        self.soft_blocks = 0
+        self.window_events = 0
+        self.window_errors = 0
+        self.window_started = time.monotonic()
+        self.cooldown_until = 0.0
+
+
+class AdaptiveThrottle:
+    """
+    Replaces AutoThrottle with an AIMD controller per download slot, driven by
+    what a Playwright crawl actually experiences:
+
+      - latency: download *plus* render time (HybridDownloadHandler copies the
+        render latency back onto the request), smoothed as an EWMA;
+      - errors: downloads that failed with an exception (timeouts, crashes);
+      - hard blocks: 403/429/503, honouring Retry-After;
+      - soft blocks: 200 pages matching ADAPTIVE_THROTTLE_BLOCK_PATTERNS
+        (CAPTCHA/challenge pages), and search pages missing their
+        meta['playwright_markers'] (e.g. an empty property-card list). A
+        detail page without its markers is not one: without JSON-LD it is
+        still parsed by the spider's HTML fallback.
+
+    Any block, or an error rate above ADAPTIVE_THROTTLE_MAX_ERROR_RATE, halves
+    the slot's concurrency and doubles its delay, then holds for a cooldown.
+    Every ADAPTIVE_THROTTLE_WINDOW responses (or a cooldown's worth of time),
+    while latency stays within ADAPTIVE_THROTTLE_LATENCY_TOLERANCE x the
+    site's base latency, one more concurrent request is allowed and the delay
+    shrinks; if latency inflates past it, both step back. Delay and
+    concurrency stay within the configured floors and ceilings.
+
+    The current state of each slot is kept in the crawl stats under
+    adaptive_throttle/<slot>/...
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool("ADAPTIVE_THROTTLE_ENABLED"):
+            raise NotConfigured
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.start_delay = settings.getfloat("ADAPTIVE_THROTTLE_START_DELAY", 3.0)
+        self.min_delay = settings.getfloat("ADAPTIVE_THROTTLE_MIN_DELAY", 0.25)
+        self.max_delay = settings.getfloat("ADAPTIVE_THROTTLE_MAX_DELAY", 60.0)
+        self.start_concurrency = settings.getint("ADAPTIVE_THROTTLE_START_CONCURRENCY", 1)
+        self.max_concurrency = settings.getint("ADAPTIVE_THROTTLE_MAX_CONCURRENCY", 8)
+        self.window = settings.getint("ADAPTIVE_THROTTLE_WINDOW", 20)
+        self.latency_tolerance = settings.getfloat("ADAPTIVE_THROTTLE_LATENCY_TOLERANCE", 2.0)
+        self.max_error_rate = settings.getfloat("ADAPTIVE_THROTTLE_MAX_ERROR_RATE", 0.1)
+        self.cooldown = settings.getfloat("ADAPTIVE_THROTTLE_COOLDOWN", 30.0)
+        self.debug = settings.getbool("ADAPTIVE_THROTTLE_DEBUG")
+        patterns = settings.getlist("ADAPTIVE_THROTTLE_BLOCK_PATTERNS")
+        self.block_re = re.compile("|".join(patterns).encode(), re.IGNORECASE) if patterns else None
+        self.slots = {}
+
+        crawler.signals.connect(self.response_downloaded, signal=signals.response_downloaded)
+        crawler.signals.connect(self.request_left_downloader, signal=signals.request_left_downloader)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    # --- Signals ---
+
+    def response_downloaded(self, response, request, spider):
+        key, state = self._state(request)
+        if state is None:
+            return
+        request.meta["_throttle_seen"] = True
+        state.responses += 1
+        state.window_events += 1
+
+        if response.status in BACKOFF_STATUSES:
+            self.stats.inc_value(f"adaptive_throttle/{key}/hard_blocks")
+            self._back_off(key, state, spider, f"HTTP {response.status}", self._retry_after(response))
+        elif self._soft_blocked(response, request, spider):
+            state.soft_blocks += 1
+            self.stats.inc_value(f"adaptive_throttle/{key}/soft_blocks")
+            self._back_off(key, state, spider, "soft block")
+        else:
+            latency = request.meta.get("download_latency")
+            if latency is not None and response.status == 200:
+                self._observe_latency(state, latency)
+            if self._window_full(state):
+                self._end_window(key, state, spider)
+        self._apply(key, state)
+
+    def request_left_downloader(self, request, spider):
+        # Fires for successes and failures alike; a failure never reached response_downloaded
+        if request.meta.pop("_throttle_seen", False):
+            return
+        key, state = self._state(request)
+        if state is None:
+            return
+        state.errors += 1
+        state.window_errors += 1
+        state.window_events += 1
+        self.stats.inc_value(f"adaptive_throttle/{key}/errors")
+        if self._window_full(state):
+            self._end_window(key, state, spider)
+        self._apply(key, state)
+
+    # --- Policy ---
+
+    def _soft_blocked(self, response, request, spider):
+        if not isinstance(response, TextResponse) or response.status != 200:
+            return False
+        markers = request.meta.get("playwright_markers")
+        if markers and metrics.page_type(request, spider) == "search":
+            # A results page with no property cards is the site hiding them, not an empty search
+            if any(m.encode() not in response.body for m in markers):
+                return True
+        return bool(self.block_re and self.block_re.search(response.body))
+
+    def _observe_latency(self, state, latency):
+        state.latency = latency if state.latency is None else 0.7 * state.latency + 0.3 * latency
+        if state.base_latency is None or state.latency < state.base_latency:
+            state.base_latency = state.latency
+
+    def _window_full(self, state):
+        # At long delays a full window takes minutes, so a cooldown's worth of time also closes it
+        return state.window_events >= self.window or (
+            state.window_events >= 3 and time.monotonic() - state.window_started >= self.cooldown
+        )
+
+    def _end_window(self, key, state, spider):
+        error_rate = state.window_errors / state.window_events
+        state.window_events = state.window_errors = 0
+        state.window_started = time.monotonic()
+        if error_rate > self.max_error_rate:
+            self._back_off(key, state, spider, f"error rate {error_rate:.0%}")
+        elif time.monotonic() < state.cooldown_until or state.latency is None:
+            return
+        elif state.latency > state.base_latency * self.latency_tolerance:
+            # The site is queueing our requests: step back one notch
+            state.concurrency = max(1, state.concurrency - 1)
+            state.delay = min(self.max_delay, state.delay * 1.25)
+            self._log(spider, key, state, "latency inflated")
+        else:
+            state.concurrency = min(self.max_concurrency, state.concurrency + 1)
+            state.delay = max(self.min_delay, state.delay * 0.75)
+            self._log(spider, key, state, "speeding up")
+
+    def _back_off(self, key, state, spider, reason, retry_after=None):
+        now = time.monotonic()
+        if now < state.cooldown_until:
+            # Already backed off for this burst (other in-flight requests hit it too);
+            # only honour a longer Retry-After
+            if retry_after:
+                state.delay = min(self.max_delay, max(state.delay, retry_after))
+                state.cooldown_until = max(state.cooldown_until, now + retry_after)
+            return
+        state.concurrency = max(1, state.concurrency // 2)
+        state.delay = min(self.max_delay, max(state.delay * 2, self.start_delay, retry_after or 0))
+        state.cooldown_until = now + max(self.cooldown, retry_after or 0)
+        self.stats.inc_value(f"adaptive_throttle/{key}/backoffs")
+        spider.logger.info(
+            f"Throttle [{key}]: backing off ({reason}) to {state.concurrency} concurrent, {state.delay:.2f}s delay"
+        )
+
+    @staticmethod
+    def _retry_after(response):
+        value = response.headers.get(b"Retry-After")
+        try:
+            return float(value) if value else None
+        except ValueError:  # An HTTP date; treat it as "no hint"
+            return None
+
+    # --- Slot bookkeeping ---
+
+    def _state(self, request):
+        key = request.meta.get("download_slot")
+        if key is None:
+            return None, None
+        if key not in self.slots:
+            self.slots[key] = SlotState(self.start_delay, self.start_concurrency)
+        return key, self.slots[key]
+
+    def _apply(self, key, state):
+        # Idle slots are garbage-collected and recreated by the downloader, so re-apply every time
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is not None:
+            slot.delay = state.delay
+            slot.concurrency = state.concurrency
+        prefix = f"adaptive_throttle/{key}"
+        self.stats.set_value(f"{prefix}/delay", round(state.delay, 3))
+        self.stats.set_value(f"{prefix}/concurrency", state.concurrency)
+        if state.latency is not None:
+            self.stats.set_value(f"{prefix}/latency_ms", round(state.latency * 1000))
+
+    def _log(self, spider, key, state, reason):
+        if self.debug:
+            spider.logger.info(
+                f"Throttle [{key}]: {reason}, latency {state.latency * 1000:.0f} ms "
+                f"(base {state.base_latency * 1000:.0f} ms) -> {state.concurrency} concurrent, {state.delay:.2f}s delay"
+            )
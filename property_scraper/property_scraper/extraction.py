@@ -0,0 +1,109 @@
+# property_scraper/extraction.py
+#
+# Listing extraction from saved or browser-captured HTML, on any backend in
+# html_backends.py. Used by manual_scraper.py (search-result cards) and
+# test_profile.py (detail pages), and by benchmarks/bench_html_backends.py.
+import datetime
+import os
+from urllib.parse import urljoin
+
+from .html_backends import get_backend, text
+from .normalize import parse_price, parse_size_sqm, parse_count
+
+# Card layout of a saved Platform B search-results page
+CARD_CSS = "div.listing-card-container"
+CARD_FALLBACK_CSS = "div.cardSecondary"
+CARD_SPEC_CSS = ".attribute-list > div > div"
+
+
+def extract_cards(html, base_url, backend=None):
+    """Items from every listing card on a search-results page."""
+    backend = get_backend(backend)
+    root = backend.parse(html)
+    # Fallback if generic selector fails (simulated logic)
+    cards = backend.select(root, CARD_CSS) or backend.select(root, CARD_FALLBACK_CSS)
+
+    listings = []
+    for card in cards:
+        url_tag = backend.select_one(card, "a[href*='/properti/']")
+        href = backend.attr(url_tag, "href") if url_tag is not None else None
+        if not href:
+            continue
+        url = urljoin(base_url, href)
+
+        price_tag = backend.select_one(card, ".price-label strong")
+        if price_tag is None:  # (lxml elements without children are falsy, so no `or` here)
+            price_tag = backend.select_one(card, ".price__tag strong")
+        specs_dict = {}
+        bedrooms, bathrooms, land_size, building_size = None, None, None, None
+        for spec in backend.select(card, CARD_SPEC_CSS):
+            title = backend.attr(spec, "title", "") or ""
+            value = text(backend, spec)
+            if 'Kamar Tidur' in title:
+                bedrooms = parse_count(value)
+                specs_dict['Kamar Tidur'] = str(bedrooms) if bedrooms is not None else None
+            elif 'Kamar Mandi' in title:
+                bathrooms = parse_count(value)
+                specs_dict['Kamar Mandi'] = str(bathrooms) if bathrooms is not None else None
+            elif 'Luas Tanah' in title:
+                land_size = parse_size_sqm(value)
+                specs_dict['Luas Tanah'] = f"{land_size} m²" if land_size else None
+            elif 'Luas Bangunan' in title:
+                building_size = parse_size_sqm(value)
+                specs_dict['Luas Bangunan'] = f"{building_size} m²" if building_size else None
+
+        listings.append({
+            "id": os.path.basename(os.path.normpath(url)),
+            "price": parse_price(text(backend, price_tag)),
+            "address": text(backend, backend.select_one(card, "address")),
+            "description": text(backend, backend.select_one(card, "div.card-details > p"), separator="\n") or "",
+            "url": url,
+            "scraped_at": datetime.datetime.now().isoformat(),
+            "bedrooms": bedrooms,
+            "bathrooms": bathrooms,
+            "land_size_sqm": land_size,
+            "building_size_sqm": building_size,
+            "specs": specs_dict,
+        })
+    return listings
+
+
+def extract_detail_specs(backend, root, overview_css="div.generic-listing-overview > div",
+                         table_row_css="div.generic-detail-table table tr",
+                         key_css="td.header p", value_css="td.description p"):
+    """
+    Same rules as normalize.extract_specs (which works on parsel selectors):
+    "value key" overview tiles, then the key/value rows of the details table.
+    """
+    specs = {}
+    for spec_item in backend.select(root, overview_css):
+        parts = backend.texts(spec_item)
+        if len(parts) == 2:
+            value, key = parts
+            specs[key] = value
+
+    for row in backend.select(root, table_row_css):
+        keys = [text(backend, node) for node in backend.select(row, key_css)]
+        values = [text(backend, node) for node in backend.select(row, value_css)]
+        if len(keys) == len(values):
+            for key, value in zip(keys, values):
+                specs[key] = value
+    return specs
+
+
+def extract_detail(html, url, backend=None):
+    """The manual-mode item for one listing detail page (see test_profile.py)."""
+    backend = get_backend(backend)
+    root = backend.parse(html)
+    specs = extract_detail_specs(backend, root)
+    return {
+        'url': url,
+        'price': parse_price(text(backend, backend.select_one(root, 'div.price-tag strong'))),
+        'address': text(backend, backend.select_one(root, 'address.location-text')),
+        'bedrooms': parse_count(specs.get('Kamar Tidur')),
+        'bathrooms': parse_count(specs.get('Kamar Mandi')),
+        'land_size_sqm': parse_size_sqm(specs.get('Luas Tanah')),
+        'building_size_sqm': parse_size_sqm(specs.get('Luas Bangunan')),
+        'scraped_at': datetime.datetime.now().isoformat(),
+        'all_specs': specs,
+    }
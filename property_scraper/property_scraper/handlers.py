@@ -0,0 +1,114 @@
+# property_scraper/handlers.py
+#
+# Download handler that only pays for a Chromium render when a page needs it.
+# Enable it in DOWNLOAD_HANDLERS in place of ScrapyPlaywrightDownloadHandler.
+import inspect
+import re
+from urllib.parse import urlparse
+
+from scrapy.utils.defer import deferred_from_coro
+from scrapy_playwright.handler import ScrapyPlaywrightDownloadHandler
+from twisted.internet.defer import Deferred, inlineCallbacks
+
+from .route_filter import RouteFilter
+
+
+class HybridDownloadHandler:
+    """
+    Fetches with the plain Scrapy HTTP stack first and escalates to Playwright
+    only when the page needs it.
+
+    A request is rendered straight away when:
+      - it sets meta={'playwright': True} (the spider insists), or
+      - its URL matches HYBRID_PLAYWRIGHT_URL_PATTERNS or the spider's
+        `playwright_url_patterns` attribute.
+
+    Otherwise the plain response is checked against meta['playwright_markers']
+    (strings that must all be in the body, e.g. the JSON-LD `Product` script)
+    and the request is re-downloaded through Playwright if any are missing.
+
+    Per-domain counts are kept in the crawl stats under hybrid/<domain>/...
+
+    With ROUTE_FILTER_ENABLED, renders skip images, fonts and trackers through
+    a RouteFilter, unless PLAYWRIGHT_ABORT_REQUEST already names a predicate.
+    """
+
+    # The wrapped Playwright handler must exist before engine_started to launch the browser
+    lazy = False
+
+    def __init__(self, crawler):
+        self.stats = crawler.stats
+        # ScrapyPlaywrightDownloadHandler falls back to plain HTTP/1.1 when
+        # meta['playwright'] is falsy, so one handler covers both paths
+        self._handler = ScrapyPlaywrightDownloadHandler.from_crawler(crawler)
+        if crawler.settings.getbool("ROUTE_FILTER_ENABLED") and self._handler.abort_request is None:
+            self._handler.abort_request = RouteFilter.from_crawler(crawler)
+        self.url_patterns = [
+            re.compile(p) for p in crawler.settings.getlist("HYBRID_PLAYWRIGHT_URL_PATTERNS")
+        ]
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def download_request(self, request, spider):
+        domain = urlparse(request.url).netloc
+
+        if request.meta.get("playwright"):
+            self.stats.inc_value(f"hybrid/{domain}/playwright_forced")
+            return self._download(request, spider)
+
+        if self._requires_playwright(request, spider):
+            self.stats.inc_value(f"hybrid/{domain}/playwright_rule")
+            return self._download_rendered(request, spider)
+
+        self.stats.inc_value(f"hybrid/{domain}/http")
+        dfd = self._download(request, spider)
+        dfd.addCallback(self._maybe_escalate, request, spider, domain)
+        return dfd
+
+    def _maybe_escalate(self, response, request, spider, domain):
+        markers = request.meta.get("playwright_markers")
+        # Error pages never carry the markers; leave them to RetryMiddleware instead of rendering them
+        if not markers or response.status != 200:
+            return response
+
+        missing = [m for m in markers if m.encode() not in response.body]
+        if not missing:
+            return response
+
+        spider.logger.debug(f"Escalating {request.url} to Playwright (missing markers: {missing})")
+        self.stats.inc_value(f"hybrid/{domain}/escalated")
+        return self._download_rendered(request, spider, spent=request.meta.get("download_latency", 0))
+
+    def _requires_playwright(self, request, spider):
+        patterns = self.url_patterns + [re.compile(p) for p in getattr(spider, "playwright_url_patterns", [])]
+        return any(p.search(request.url) for p in patterns)
+
+    def _download_rendered(self, request, spider, spent=0):
+        """
+        Downloads a Playwright copy of `request`. The copy has its own meta, so its
+        latency (including render time and any plain fetch before it) is copied
+        back for the throttle and stats, which only see the original request.
+        """
+        rendered = request.replace(meta={**request.meta, "playwright": True})
+
+        def copy_latency(response):
+            request.meta["download_latency"] = spent + rendered.meta.get("download_latency", 0)
+            request.meta["render_latency"] = rendered.meta.get("download_latency", 0)
+            return response
+
+        return self._download(rendered, spider).addCallback(copy_latency)
+
+    def _download(self, request, spider):
+        # Newer Scrapy/scrapy-playwright versions expose a coroutine without the spider argument
+        if inspect.iscoroutinefunction(self._handler.download_request):
+            return deferred_from_coro(self._handler.download_request(request))
+        return self._handler.download_request(request, spider)
+
+    @inlineCallbacks
+    def close(self):
+        result = self._handler.close()
+        if inspect.isawaitable(result) and not isinstance(result, Deferred):
+            result = deferred_from_coro(result)
+        yield result
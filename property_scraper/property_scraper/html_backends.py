@@ -0,0 +1,135 @@
+# property_scraper/html_backends.py
+#
+# One small interface over three HTML parsers, so offline extraction
+# (manual_scraper.py, test_profile.py, bulk re-parsing of saved pages) can
+# use the fastest one installed:
+#   "selectolax"  lexbor, a C CSS engine              (pip install selectolax)
+#   "lxml"        libxml2 + cssselect, compiled once   (pip install lxml cssselect)
+#   "bs4"         BeautifulSoup with html.parser, pure Python, always there
+# Backends work on their own native nodes; callers only go through the
+# backend's methods, so no wrapper objects are created per node.
+import os
+from functools import lru_cache
+
+
+class Bs4Backend:
+    name = "bs4"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+
+    def parse(self, html):
+        return self._soup(html, "html.parser")
+
+    def select(self, node, css):
+        return node.select(css)
+
+    def select_one(self, node, css):
+        return node.select_one(css)
+
+    def texts(self, node):
+        return list(node.stripped_strings)
+
+    def attr(self, node, name, default=None):
+        value = node.get(name, default)
+        # bs4 returns multi-valued attributes (class, rel) as lists
+        return " ".join(value) if isinstance(value, list) else value
+
+
+class LxmlBackend:
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+        self._fromstring = lxml.html.fromstring
+        self._compile = lru_cache(maxsize=256)(CSSSelector)
+
+    def parse(self, html):
+        return self._fromstring(html)
+
+    def select(self, node, css):
+        return self._compile(css)(node)
+
+    def select_one(self, node, css):
+        found = self._compile(css)(node)
+        return found[0] if found else None
+
+    def texts(self, node):
+        return [t.strip() for t in node.itertext() if t.strip()]
+
+    def attr(self, node, name, default=None):
+        return node.get(name, default)
+
+
+class SelectolaxBackend:
+    name = "selectolax"
+    _SEPARATOR = "\x1f"  # never appears in page text
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def parse(self, html):
+        return self._parser(html)
+
+    def select(self, node, css):
+        return node.css(css)
+
+    def select_one(self, node, css):
+        return node.css_first(css)
+
+    def texts(self, node):
+        joined = node.text(deep=True, separator=self._SEPARATOR)
+        return [t.strip() for t in joined.split(self._SEPARATOR) if t.strip()]
+
+    def attr(self, node, name, default=None):
+        value = node.attributes.get(name, default)
+        return default if value is None else value
+
+
+BACKENDS = {
+    "selectolax": SelectolaxBackend,
+    "lxml": LxmlBackend,
+    "bs4": Bs4Backend,
+}
+# Tried in this order when no backend is named
+PREFERENCE = ["selectolax", "lxml", "bs4"]
+
+
+def available_backends():
+    names = []
+    for name in PREFERENCE:
+        try:
+            BACKENDS[name]()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+@lru_cache(maxsize=None)
+def get_backend(name=None):
+    """
+    The named backend, or HTML_BACKEND from the environment, or the fastest
+    one installed. Raises ImportError if a named backend isn't installed.
+    """
+    name = name or os.getenv("HTML_BACKEND")
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown HTML backend {name!r}; choose from {', '.join(BACKENDS)}")
+        return BACKENDS[name]()
+    for candidate in PREFERENCE:
+        try:
+            return BACKENDS[candidate]()
+        except ImportError:
+            continue
+    raise ImportError("No HTML backend available; install beautifulsoup4")
+
+
+def text(backend, node, separator=""):
+    """Stripped text of a node, like bs4's get_text(strip=True, separator=...). None for a missing node."""
+    if node is None:
+        return None
+    return separator.join(backend.texts(node))
@@ -0,0 +1,129 @@
+# property_scraper/metrics.py
+#
+# Per-request crawl metrics, rolled up per spider and page type into
+# log-bucketed histograms. Filled by PropertyScraperDownloaderMiddleware and
+# PropertyScraperSpiderMiddleware; written as a JSON report at spider close
+# and, optionally, as a live text file during the crawl.
+import json
+import math
+import os
+import weakref
+from pathlib import Path
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class Histogram:
+    """
+    Fixed-memory histogram with buckets growing by `growth` (~4% relative
+    error at the default), so percentiles stay cheap for any crawl length.
+    Exact count, sum, min and max are kept alongside.
+    """
+
+    def __init__(self, growth=1.08, floor=1e-3):
+        self.log_growth = math.log(growth)
+        self.floor = floor
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        index = 0 if value <= self.floor else int(math.log(value / self.floor) / self.log_growth) + 1
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = math.ceil(self.count * p / 100)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Upper edge of the bucket, clamped to what was actually observed
+                upper = self.floor * math.exp(self.log_growth * index)
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return {"count": 0}
+        summary = {"count": self.count, "mean": self.total / self.count, "min": self.min}
+        for p in PERCENTILES:
+            summary[f"p{p}"] = self.percentile(p)
+        summary["max"] = self.max
+        summary["sum"] = self.total
+        return summary
+
+
+class CrawlMetrics:
+    """Histograms keyed by (spider, page type, metric name), plus plain counters."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, spider_name, page_type, metric, value):
+        key = (spider_name, page_type, metric)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        self.histograms[key].add(value)
+
+    def inc(self, spider_name, page_type, counter, count=1):
+        key = (spider_name, page_type, counter)
+        self.counters[key] = self.counters.get(key, 0) + count
+
+    def report(self):
+        """{spider: {page_type: {metric: summary, ..., "counters": {...}}}}"""
+        report = {}
+        for (spider_name, page_type, metric), histogram in sorted(self.histograms.items()):
+            report.setdefault(spider_name, {}).setdefault(page_type, {})[metric] = histogram.summary()
+        for (spider_name, page_type, counter), count in sorted(self.counters.items()):
+            section = report.setdefault(spider_name, {}).setdefault(page_type, {})
+            section.setdefault("counters", {})[counter] = count
+        return report
+
+    def write_json(self, path, extra=None):
+        _write_atomic(path, json.dumps({**(extra or {}), "metrics": self.report()}, indent=2, default=str))
+
+    def write_text(self, path):
+        """Prometheus-style text exposition, one line per percentile/counter."""
+        lines = []
+        for (spider_name, page_type, metric), histogram in sorted(self.histograms.items()):
+            labels = f'spider="{spider_name}",page_type="{page_type}"'
+            for p in PERCENTILES:
+                lines.append(f'crawl_{metric}{{{labels},quantile="0.{p}"}} {histogram.percentile(p):.6g}')
+            lines.append(f"crawl_{metric}_count{{{labels}}} {histogram.count}")
+            lines.append(f"crawl_{metric}_sum{{{labels}}} {histogram.total:.6g}")
+        for (spider_name, page_type, counter), count in sorted(self.counters.items()):
+            lines.append(f'crawl_{counter}_total{{spider="{spider_name}",page_type="{page_type}"}} {count}')
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+
+def _write_atomic(path, text):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+# One CrawlMetrics per crawler, shared by the downloader and spider middlewares
+_registries = weakref.WeakKeyDictionary()
+
+
+def for_crawler(crawler):
+    if crawler not in _registries:
+        _registries[crawler] = CrawlMetrics()
+    return _registries[crawler]
+
+
+def page_type(request, spider):
+    """'detail' for the spider's detail callbacks (see SeenListingMiddleware), else 'search'."""
+    detail_callbacks = getattr(spider, "detail_callbacks", ("parse_property",))
+    return "detail" if getattr(request.callback, "__name__", None) in detail_callbacks else "search"
@@ -3,101 +3,412 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
-from scrapy import signals
+import datetime
+import time
+from pathlib import Path
+
+from scrapy import signals, Request
+from scrapy.http import TextResponse
+from scrapy.exceptions import NotConfigured
+from playwright.async_api import Error as PlaywrightError
+from twisted.internet import task
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
 
+from . import metrics
+from .seen_index import SeenListingIndex, content_hash, listing_id_from_url
+from .snapshots import SnapshotStore
+
 
 class PropertyScraperSpiderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the spider middleware does not modify the
-    # passed objects.
+    """
+    Times each callback and counts what it yields, into the crawl metrics
+    shared with PropertyScraperDownloaderMiddleware (see metrics.py).
+
+    Sits closest to the spider in SPIDER_MIDDLEWARES so parse_ms is the time
+    spent inside the callback itself, not in other middlewares.
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("METRICS_ENABLED"):
+            raise NotConfigured
+        return cls(metrics.for_crawler(crawler))
+
+    def process_spider_output(self, response, result, spider):
+        kind = metrics.page_type(response.request, spider)
+        counts = {"items": 0, "requests": 0}
+        elapsed = 0.0
+        iterator = iter(result)
+        while True:
+            started = time.perf_counter()
+            try:
+                output = next(iterator)
+            except StopIteration:
+                elapsed += time.perf_counter() - started
+                break
+            elapsed += time.perf_counter() - started
+            counts["requests" if isinstance(output, Request) else "items"] += 1
+            yield output
+        self._record(spider, kind, elapsed, counts)
+
+    async def process_spider_output_async(self, response, result, spider):
+        # Async callbacks (e.g. platform_b_api) also await network calls, so this includes them
+        kind = metrics.page_type(response.request, spider)
+        counts = {"items": 0, "requests": 0}
+        elapsed = 0.0
+        iterator = result.__aiter__()
+        while True:
+            started = time.perf_counter()
+            try:
+                output = await iterator.__anext__()
+            except StopAsyncIteration:
+                elapsed += time.perf_counter() - started
+                break
+            elapsed += time.perf_counter() - started
+            counts["requests" if isinstance(output, Request) else "items"] += 1
+            yield output
+        self._record(spider, kind, elapsed, counts)
+
+    def process_spider_exception(self, response, exception, spider):
+        self.metrics.inc(spider.name, metrics.page_type(response.request, spider), "callback_errors")
+
+    def _record(self, spider, kind, elapsed, counts):
+        self.metrics.observe(spider.name, kind, "parse_ms", elapsed * 1000)
+        self.metrics.observe(spider.name, kind, "items_yielded", counts["items"])
+        self.metrics.observe(spider.name, kind, "requests_yielded", counts["requests"])
+
+
+class PropertyScraperDownloaderMiddleware:
+    """
+    Records, per final response: queue wait (scheduled -> download start,
+    including download delay), download time, render time for Playwright
+    pages, response bytes and retries taken, rolled up per spider and page
+    type (search vs detail) in metrics.py histograms.
+
+    Writes the JSON report to METRICS_REPORT_DIR at spider close and, when
+    METRICS_LIVE_PATH is set, a live text snapshot every METRICS_LIVE_INTERVAL
+    seconds. Sits first in DOWNLOADER_MIDDLEWARES so it only sees responses
+    that survived retries and redirects.
+    """
+
+    def __init__(self, crawler, report_dir, live_path, live_interval):
+        self.crawler = crawler
+        self.metrics = metrics.for_crawler(crawler)
+        self.report_dir = report_dir
+        self.live_path = live_path
+        self.live_interval = live_interval
+        self.live_task = None
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
+        settings = crawler.settings
+        if not settings.getbool("METRICS_ENABLED"):
+            raise NotConfigured
+        s = cls(
+            crawler,
+            settings.get("METRICS_REPORT_DIR", "metrics"),
+            settings.get("METRICS_LIVE_PATH"),
+            settings.getfloat("METRICS_LIVE_INTERVAL", 10),
+        )
+        crawler.signals.connect(s.request_scheduled, signal=signals.request_scheduled)
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
         return s
 
-    def process_spider_input(self, response, spider):
-        # Called for each response that goes through the spider
-        # middleware and into the spider.
+    def request_scheduled(self, request, spider):
+        # Retries are rescheduled copies, so each attempt gets its own stamp
+        request.meta["metrics_scheduled_at"] = time.time()
 
-        # Should return None or raise an exception.
+    def process_request(self, request, spider):
         return None
 
-    def process_spider_output(self, response, result, spider):
-        # Called with the results returned from the Spider, after
-        # it has processed the response.
+    def process_response(self, request, response, spider):
+        now = time.time()
+        kind = metrics.page_type(request, spider)
+        name = spider.name
+        latency = request.meta.get("download_latency")
+        if latency is not None:
+            self.metrics.observe(name, kind, "download_ms", latency * 1000)
+            scheduled = request.meta.get("metrics_scheduled_at")
+            if scheduled is not None:
+                self.metrics.observe(name, kind, "queue_wait_ms", max(0.0, now - latency - scheduled) * 1000)
+            # HybridDownloadHandler reports render time separately when it escalated;
+            # a request that asked for Playwright outright spent all of it rendering
+            render = request.meta.get("render_latency", latency if request.meta.get("playwright") else None)
+            if render is not None:
+                self.metrics.observe(name, kind, "render_ms", render * 1000)
+        self.metrics.observe(name, kind, "response_bytes", len(response.body))
+        self.metrics.observe(name, kind, "retries", request.meta.get("retry_times", 0))
+        self.metrics.inc(name, kind, f"status_{response.status}")
+        return response
 
-        # Must return an iterable of Request, or item objects.
-        for i in result:
-            yield i
+    def process_exception(self, request, exception, spider):
+        self.metrics.inc(spider.name, metrics.page_type(request, spider), f"error_{type(exception).__name__}")
+        return None
 
-    def process_spider_exception(self, response, exception, spider):
-        # Called when a spider or process_spider_input() method
-        # (from other spider middleware) raises an exception.
+    def spider_opened(self, spider):
+        self.started_at = datetime.datetime.now()
+        if self.live_path:
+            self.live_task = task.LoopingCall(self.metrics.write_text, self.live_path)
+            self.live_task.start(self.live_interval, now=False)
 
-        # Should return either None or an iterable of Request or item objects.
-        pass
+    def spider_closed(self, spider, reason):
+        if self.live_task and self.live_task.running:
+            self.live_task.stop()
+        if self.live_path:
+            self.metrics.write_text(self.live_path)
+        path = Path(self.report_dir) / f"{spider.name}_{self.started_at:%Y%m%dT%H%M%S}.json"
+        self.metrics.write_json(path, extra={
+            "spider": spider.name,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.datetime.now().isoformat(),
+            "finish_reason": reason,
+        })
+        spider.logger.info(f"Crawl metrics written to {path}")
 
-    def process_start_requests(self, start_requests, spider):
-        # Called with the start requests of the spider, and works
-        # similarly to the process_spider_output() method, except
-        # that it doesn’t have a response associated.
 
-        # Must return only requests (not items).
-        for r in start_requests:
-            yield r
+class PlaywrightContextPoolMiddleware:
+    """
+    Spreads Playwright requests over a fixed pool of browser contexts.
 
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+    Requests that already name a `playwright_context` (e.g. the ordered
+    search-page chain) are left alone. Everything else is assigned to the
+    least busy context in the pool. A context is retired after
+    PLAYWRIGHT_POOL_CONTEXT_BUDGET requests and closed once its last page is
+    done, and requests that die with the page/browser are retried on a fresh
+    context up to PLAYWRIGHT_POOL_CRASH_RETRIES times.
+    """
 
+    CRASH_MARKERS = ("crash", "target closed", "has been closed", "browser closed")
 
-class PropertyScraperDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    def __init__(self, stats, pool_size, context_budget, crash_retries):
+        self.stats = stats
+        self.pool_size = pool_size
+        self.context_budget = context_budget
+        self.crash_retries = crash_retries
+        # slot -> generation, and per context name: requests assigned / in flight
+        self.generations = [0] * pool_size
+        self.assigned = {}
+        self.in_flight = {}
+        self.retired = set()
+        # context name -> BrowserContext, learned from the pages that come back
+        self.contexts = {}
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
+        settings = crawler.settings
+        s = cls(
+            crawler.stats,
+            pool_size=max(1, settings.getint("PLAYWRIGHT_POOL_SIZE", 4)),
+            context_budget=max(1, settings.getint("PLAYWRIGHT_POOL_CONTEXT_BUDGET", 50)),
+            crash_retries=settings.getint("PLAYWRIGHT_POOL_CRASH_RETRIES", 2),
+        )
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
         return s
 
+    def context_name(self, slot):
+        return f"pool-{slot}-{self.generations[slot]}"
+
+    def pick_slot(self):
+        return min(range(self.pool_size), key=lambda slot: self.in_flight.get(self.context_name(slot), 0))
+
     def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
-
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
-        return None
+        if not request.meta.get("playwright") or "playwright_context" in request.meta:
+            return None
 
-    def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
+        slot = self.pick_slot()
+        name = self.context_name(slot)
+        self.assigned[name] = self.assigned.get(name, 0) + 1
+        self.in_flight[name] = self.in_flight.get(name, 0) + 1
+        if self.assigned[name] >= self.context_budget:
+            # Retire it now so no new requests land here; it is closed once drained
+            self.retired.add(name)
+            self.generations[slot] += 1
+            self.stats.inc_value("playwright_pool/contexts_recycled")
+
+        request.meta["playwright_context"] = name
+        request.meta["playwright_include_page"] = True
+        request.meta["_pool_context"] = name
+        self.stats.inc_value("playwright_pool/requests_assigned")
+        return None
 
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+    async def process_response(self, request, response, spider):
+        await self._release(request)
         return response
 
-    def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
+    async def process_exception(self, request, exception, spider):
+        name = request.meta.get("_pool_context")
+        if name is None:
+            return None
 
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
+        crashed = isinstance(exception, PlaywrightError) and any(
+            marker in str(exception).lower() for marker in self.CRASH_MARKERS
+        )
+        slot = int(name.split("-")[1])
+        if crashed and name == self.context_name(slot):
+            self.retired.add(name)
+            self.generations[slot] += 1
+            self.stats.inc_value("playwright_pool/contexts_crashed")
+        await self._release(request, close_context=crashed)
+
+        retries = request.meta.get("_pool_crash_retries", 0)
+        if not crashed or retries >= self.crash_retries:
+            return None
+
+        spider.logger.warning(f"Browser context {name} crashed on {request.url}, retrying on a fresh context.")
+        self.stats.inc_value("playwright_pool/crash_retries")
+        meta = {k: v for k, v in request.meta.items() if k not in ("playwright_context", "playwright_page", "_pool_context")}
+        meta["_pool_crash_retries"] = retries + 1
+        return request.replace(meta=meta, dont_filter=True)
+
+    async def _release(self, request, close_context=False):
+        name = request.meta.pop("_pool_context", None)
+        if name is None:
+            return
+        self.in_flight[name] = max(0, self.in_flight.get(name, 0) - 1)
+
+        # The page only stays open so the pool can reach its context; callbacks never use it
+        page = request.meta.pop("playwright_page", None)
+        try:
+            if page is not None:
+                self.contexts[name] = page.context
+                if not page.is_closed():
+                    await page.close()
+            # Checked even without a page: a retired context's last request may die before one is made
+            if name in self.retired and (close_context or self.in_flight[name] == 0):
+                self.retired.discard(name)
+                self.assigned.pop(name, None)
+                self.in_flight.pop(name, None)
+                context = self.contexts.pop(name, None)
+                if context is not None:
+                    await context.close()
+        except PlaywrightError:
+            pass  # Already gone with the browser
+
+    def spider_opened(self, spider):
+        spider.logger.info(
+            f"Playwright context pool: {self.pool_size} contexts, recycled every {self.context_budget} requests."
+        )
+
+
+class SeenListingMiddleware:
+    """
+    Skips detail requests for listings captured within SEEN_INDEX_FRESHNESS_HOURS
+    and records every scraped listing in the shared SeenListingIndex.
+
+    Detail requests are recognised by callback name, taken from the spider's
+    `detail_callbacks` attribute (default: parse_property).
+    """
+
+    def __init__(self, stats, index_path, freshness_hours):
+        self.stats = stats
+        self.index_path = index_path
+        self.max_age = freshness_hours * 3600
+        self.index = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("SEEN_INDEX_ENABLED") or not settings.get("SEEN_INDEX_PATH"):
+            raise NotConfigured
+        s = cls(
+            crawler.stats,
+            index_path=settings.get("SEEN_INDEX_PATH"),
+            freshness_hours=settings.getfloat("SEEN_INDEX_FRESHNESS_HOURS", 24 * 7),
+        )
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def process_spider_output(self, response, result, spider):
+        from_detail_page = self._from_detail_page(response, spider)
+        for i in result:
+            if self._passes(i, response, spider, from_detail_page):
+                yield i
+
+    async def process_spider_output_async(self, response, result, spider):
+        from_detail_page = self._from_detail_page(response, spider)
+        async for i in result:
+            if self._passes(i, response, spider, from_detail_page):
+                yield i
+
+    def _from_detail_page(self, response, spider):
+        detail_callbacks = getattr(spider, "detail_callbacks", ("parse_property",))
+        return getattr(response.request.callback, "__name__", None) in detail_callbacks
+
+    def _passes(self, i, response, spider, from_detail_page):
+        """False for detail requests of fresh listings; items are recorded in the index."""
+        if isinstance(i, Request):
+            callback = getattr(i.callback, "__name__", None)
+            detail_callbacks = getattr(spider, "detail_callbacks", ("parse_property",))
+            if callback in detail_callbacks and self.index.is_fresh(listing_id_from_url(i.url), self.max_age):
+                self.stats.inc_value("seen_index/skipped")
+                return False
+        elif is_item(i):
+            # Detail pages are keyed on their URL so it matches the lookup above;
+            # items from listing/API responses carry their own slug ID
+            adapter = ItemAdapter(i)
+            listing_id = listing_id_from_url(response.url) if from_detail_page else adapter.get("id")
+            if not listing_id:
+                return True
+            if self.index.record(listing_id, content_hash(adapter.asdict())):
+                self.stats.inc_value("seen_index/new_or_changed")
+            else:
+                self.stats.inc_value("seen_index/unchanged")
+        return True
+
+    def spider_opened(self, spider):
+        self.index = SeenListingIndex(self.index_path)
+        spider.logger.info(f"Seen-listing index {self.index_path}: {len(self.index)} listings known.")
+
+    def spider_closed(self, spider):
+        self.index.close()
+
+
+class SnapshotMiddleware:
+    """
+    Archives every successful text response in the SnapshotStore at
+    SNAPSHOT_DIR, together with the callback it was meant for, so reparse.py
+    can re-run the spider's callbacks offline. Sits below HttpCompression and
+    Redirect in DOWNLOADER_MIDDLEWARES so it sees final, decoded bodies.
+    """
+
+    def __init__(self, stats, store_dir):
+        self.stats = stats
+        self.store_dir = store_dir
+        self.store = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("SNAPSHOT_ENABLED") or not settings.get("SNAPSHOT_DIR"):
+            raise NotConfigured
+        s = cls(crawler.stats, settings.get("SNAPSHOT_DIR"))
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def process_response(self, request, response, spider):
+        if response.status == 200 and isinstance(response, TextResponse):
+            _, stored = self.store.put(
+                spider.name,
+                response.url,
+                response.body,
+                status=response.status,
+                encoding=response.encoding,
+                callback=getattr(request.callback, "__name__", None) or "parse",
+            )
+            self.stats.inc_value("snapshots/stored" if stored else "snapshots/duplicate_body")
+        return response
 
     def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+        self.store = SnapshotStore(self.store_dir)
+        spider.logger.info(f"Archiving response bodies to {self.store_dir}")
+
+    def spider_closed(self, spider):
+        self.store.close()
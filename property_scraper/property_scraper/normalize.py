@@ -0,0 +1,149 @@
+# property_scraper/normalize.py
+#
+# Shared parsing of raw listing strings (prices, sizes, room counts, spec
+# tables) for every scraper in the project. Patterns are compiled once; the
+# batch functions take a list of raw strings and return NumPy arrays.
+import re
+
+import numpy as np
+
+# First number in a string, keeping its thousand/decimal separators ("1.250.000", "1,5")
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+# Thousand-separated integer ("6.734", "1.500.000.000")
+THOUSANDS_RE = re.compile(r"\d{1,3}(?:\.\d{3})+")
+# Unit word right after the price number ("-an" forms like "700 jutaan" mean the
+# same). "M" is Indonesian shorthand for Miliar, and the word boundary keeps "m²"
+# from being read as one.
+PRICE_UNIT_RE = re.compile(
+    r"\s*(triliun|miliar|milyar|juta|ribu)(?:an)?\b\.?|\s*(jt|rb|billion|million|bn|b|m)\b\.?", re.IGNORECASE
+)
+# A plain amount ending in ",00"-style decimals ("Rp 1.250.000,00")
+DECIMAL_CENTS_RE = re.compile(r".*,\d{1,2}")
+
+PRICE_MULTIPLIERS = {
+    "triliun": 1_000_000_000_000,
+    "miliar": 1_000_000_000,
+    "milyar": 1_000_000_000,
+    "billion": 1_000_000_000,
+    "bn": 1_000_000_000,
+    "b": 1_000_000_000,
+    "m": 1_000_000_000,
+    "juta": 1_000_000,
+    "jt": 1_000_000,
+    "million": 1_000_000,
+    "ribu": 1_000,
+    "rb": 1_000,
+}
+
+
+def _to_float(number):
+    """Reads "1,5", "1.5", "6.734" or "1.250,5" the way Indonesian listings write them."""
+    if "," in number:
+        # Comma is the decimal separator; any dots are thousand separators
+        number = number.replace(".", "").replace(",", ".", 1).replace(",", "")
+    elif THOUSANDS_RE.fullmatch(number):
+        number = number.replace(".", "")
+    return float(number)
+
+
+def parse_price(s):
+    """
+    Price in Rupiah from strings like "Rp 1.500.000.000", "Rp 1.250.000,00",
+    "Rp 1,5 Miliar", "Mulai Rp 700 jutaan" or "Rp 2,3 M". Returns an int, or
+    None if there is no number.
+    """
+    if not s or isinstance(s, bool):
+        return None
+    s = str(s)
+    match = NUMBER_RE.search(s)
+    if not match:
+        return None
+    number = match.group(0)
+
+    unit = PRICE_UNIT_RE.match(s, match.end())
+    if unit:
+        try:
+            return int(round(_to_float(number) * PRICE_MULTIPLIERS[(unit.group(1) or unit.group(2)).lower()]))
+        except ValueError:
+            return None
+    if DECIMAL_CENTS_RE.fullmatch(number):
+        return int(round(_to_float(number)))
+    # No unit: a plain amount, every other separator is a thousand separator
+    return int(number.replace(".", "").replace(",", ""))
+
+
+def parse_size_sqm(s):
+    """Size in m² from strings like "120 m²", "6.734 m²" or "120,5 m2". Returns an int or None."""
+    if not s or not isinstance(s, str):
+        return None
+    match = NUMBER_RE.search(s)
+    if not match:
+        return None
+    try:
+        return int(_to_float(match.group(0)))
+    except ValueError:
+        return None
+
+
+def parse_count(s):
+    """Room counts like "3", "3+1" or "4 KT" -> the first integer, or None."""
+    if s is None or isinstance(s, bool):
+        return None
+    if isinstance(s, int):
+        return s
+    match = NUMBER_RE.search(str(s))
+    return int(match.group(0).replace(".", "").split(",")[0]) if match else None
+
+
+def _parse_batch(values, parse):
+    """Runs `parse` over many raw strings, parsing each distinct string only once."""
+    out = np.full(len(values), np.nan, dtype=np.float64)
+    memo = {}
+    for i, value in enumerate(values):
+        try:
+            parsed = memo[value]
+        except KeyError:
+            parsed = memo[value] = parse(value)
+        except TypeError:  # unhashable (e.g. a list); parse it directly
+            parsed = parse(value)
+        if parsed is not None:
+            out[i] = parsed
+    return out
+
+
+def parse_prices(values):
+    """Batch parse_price: float64 array of Rupiah, NaN where no price was found."""
+    return _parse_batch(values, parse_price)
+
+
+def parse_sizes(values):
+    """Batch parse_size_sqm: float64 array of m², NaN where no size was found."""
+    return _parse_batch(values, parse_size_sqm)
+
+
+def parse_counts(values):
+    """Batch parse_count: float64 array of room counts, NaN where no count was found."""
+    return _parse_batch(values, parse_count)
+
+
+def extract_specs(selector, overview_css="div.listing-overview > div",
+                  table_row_css="div.listing-details table tr",
+                  key_css="td.table-header p::text", value_css="td.table-value p::text"):
+    """
+    Key/value specs from a Platform B style listing page (a parsel Selector or
+    Scrapy response): "value key" tiles in the overview, then the details table.
+    """
+    specs = {}
+    for spec_item in selector.css(overview_css):
+        parts = [part.strip() for part in spec_item.css('::text').getall() if part.strip()]
+        if len(parts) == 2:
+            value, key = parts
+            specs[key] = value
+
+    for row in selector.css(table_row_css):
+        keys = row.css(key_css).getall()
+        values = row.css(value_css).getall()
+        if len(keys) == len(values):
+            for key, value in zip(keys, values):
+                specs[key.strip()] = value.strip()
+    return specs
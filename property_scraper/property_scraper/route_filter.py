@@ -0,0 +1,120 @@
+# property_scraper/route_filter.py
+#
+# Keeps Playwright renders from downloading what the extractors never look at:
+# images, fonts, video, ad and analytics scripts. The same filter serves the
+# crawls (as scrapy-playwright's PLAYWRIGHT_ABORT_REQUEST predicate, set up by
+# HybridDownloadHandler) and the standalone browser scripts (via install()).
+import re
+from urllib.parse import urlparse
+
+
+class RouteFilter:
+    """
+    Decides per browser request whether to abort it.
+
+    A request is aborted when its resource type is in ROUTE_FILTER_BLOCK_TYPES
+    or its URL matches ROUTE_FILTER_BLOCK_PATTERNS, unless its URL matches one
+    of the allow patterns of the platform the page belongs to
+    (ROUTE_FILTER_ALLOW, keyed by domain). Navigations of the page itself are
+    never aborted.
+
+    Counts go to the crawl stats (or to `self.counts` outside a crawl) under
+    route_filter/...; bytes saved are estimated from ROUTE_FILTER_TYPICAL_BYTES,
+    since an aborted request never says how big it would have been.
+    """
+
+    def __init__(self, block_types=(), block_patterns=(), allow=None, typical_bytes=None, stats=None):
+        self.block_types = set(block_types)
+        self.block_pattern = re.compile("|".join(block_patterns)) if block_patterns else None
+        self.allow = {
+            domain.lower(): re.compile("|".join(patterns))
+            for domain, patterns in (allow or {}).items() if patterns
+        }
+        self.typical_bytes = typical_bytes or {}
+        self.stats = stats
+        self.counts = {}
+
+    @classmethod
+    def from_settings(cls, settings, stats=None):
+        return cls(
+            block_types=settings.getlist("ROUTE_FILTER_BLOCK_TYPES"),
+            block_patterns=settings.getlist("ROUTE_FILTER_BLOCK_PATTERNS"),
+            allow=settings.getdict("ROUTE_FILTER_ALLOW"),
+            typical_bytes=settings.getdict("ROUTE_FILTER_TYPICAL_BYTES"),
+            stats=stats,
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls.from_settings(crawler.settings, crawler.stats)
+
+    def __call__(self, request):
+        """True if the Playwright request should be aborted."""
+        resource_type = request.resource_type
+        url = request.url
+        if resource_type == "document" and self._is_main_frame(request):
+            return False
+
+        allow = self._allow_pattern(request)
+        if allow is not None and allow.search(url):
+            self._inc("route_filter/allowed_by_rule")
+            return False
+
+        if resource_type in self.block_types:
+            reason = "type"
+        elif self.block_pattern is not None and self.block_pattern.search(url):
+            reason = "pattern"
+        else:
+            return False
+
+        self._inc("route_filter/requests_blocked")
+        self._inc(f"route_filter/blocked/{reason}/{resource_type}")
+        self._inc("route_filter/bytes_saved_estimate",
+                  self.typical_bytes.get(resource_type, self.typical_bytes.get("other", 0)))
+        return True
+
+    async def install(self, target):
+        """Applies the filter to every request of a Page or BrowserContext."""
+        async def handle(route, request):
+            if self(request):
+                await route.abort()
+            else:
+                await route.fallback()
+        await target.route("**/*", handle)
+
+    def summary(self):
+        blocked = self.counts.get("route_filter/requests_blocked", 0)
+        saved = self.counts.get("route_filter/bytes_saved_estimate", 0)
+        return f"{blocked} requests blocked, ~{saved / 1_000_000:.1f} MB saved"
+
+    def _allow_pattern(self, request):
+        host = self._page_host(request)
+        while host:
+            if host in self.allow:
+                return self.allow[host]
+            # www.platform-b.com -> platform-b.com -> com
+            host = host.partition(".")[2]
+        return None
+
+    @staticmethod
+    def _page_host(request):
+        try:
+            page_url = request.frame.page.url
+        except Exception:
+            # Service worker requests have no frame
+            page_url = ""
+        if not page_url.startswith("http"):
+            page_url = request.url
+        return (urlparse(page_url).hostname or "").lower()
+
+    @staticmethod
+    def _is_main_frame(request):
+        try:
+            return request.frame.parent_frame is None
+        except Exception:
+            return False
+
+    def _inc(self, key, count=1):
+        self.counts[key] = self.counts.get(key, 0) + count
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
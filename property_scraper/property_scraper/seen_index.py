@@ -0,0 +1,133 @@
+# property_scraper/seen_index.py
+#
+# On-disk index of listings we have already captured, so re-crawls only
+# fetch new or stale listings. Backed by SQLite in WAL mode, which lets
+# several crawl processes read and write the same file at once.
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+
+def listing_id_from_url(url):
+    """Listing slug ID, derived the same way the spiders fill item['id']."""
+    return os.path.basename(os.path.normpath(url))
+
+
+def content_hash(item):
+    """Stable hash of an item's content, ignoring fields that change on every fetch."""
+    data = {k: v for k, v in dict(item).items() if k not in ("scraped_at", "url")}
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class SeenListingIndex:
+    """
+    Maps listing ID -> (last_seen, content_hash).
+
+    All rows are loaded into a dict on open so lookups are O(1); a miss falls
+    back to SQLite to pick up listings written by other processes since then.
+    Writes are buffered in memory and flushed every `commit_every` records in
+    one short transaction, so the write lock is never held between callbacks
+    and other crawl processes sharing the file are not blocked.
+    """
+
+    def __init__(self, path, commit_every=100):
+        self.path = path
+        self.commit_every = commit_every
+        self.pending = []
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS listings ("
+            "id TEXT PRIMARY KEY, last_seen REAL NOT NULL, content_hash TEXT)"
+        )
+        self.entries = {
+            row[0]: (row[1], row[2])
+            for row in self.conn.execute("SELECT id, last_seen, content_hash FROM listings")
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, listing_id):
+        entry = self.entries.get(listing_id)
+        if entry is None:
+            row = self.conn.execute(
+                "SELECT last_seen, content_hash FROM listings WHERE id = ?", (listing_id,)
+            ).fetchone()
+            if row:
+                entry = self.entries[listing_id] = (row[0], row[1])
+        return entry
+
+    def is_fresh(self, listing_id, max_age_seconds, now=None):
+        entry = self.get(listing_id)
+        if entry is None:
+            return False
+        now = time.time() if now is None else now
+        return now - entry[0] < max_age_seconds
+
+    def record(self, listing_id, digest=None, now=None):
+        """Marks a listing as seen. Returns True if it is new or its content changed."""
+        now = time.time() if now is None else now
+        previous = self.entries.get(listing_id)
+        self.entries[listing_id] = (now, digest)
+
+        self.pending.append((listing_id, now, digest))
+        if len(self.pending) >= self.commit_every:
+            self.commit()
+        return previous is None or (digest is not None and previous[1] != digest)
+
+    def commit(self):
+        """Writes the buffered records in one transaction, opened and committed here."""
+        if not self.pending:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "INSERT INTO listings (id, last_seen, content_hash) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET last_seen = excluded.last_seen, "
+                "content_hash = COALESCE(excluded.content_hash, listings.content_hash)",
+                self.pending,
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.pending = []
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+def seed_from_files(index, paths):
+    """Seeds the index with listing IDs from JSON arrays or JSON-lines files."""
+    count = 0
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".json") and f.read(1) == "[":
+                f.seek(0)
+                records = json.load(f)
+            else:
+                f.seek(0)
+                records = (json.loads(line) for line in f if line.strip())
+            for record in records:
+                if record.get("id"):
+                    index.record(record["id"], content_hash(record) if len(record) > 1 else None)
+                    count += 1
+    index.commit()
+    return count
+
+
+if __name__ == "__main__":
+    # Usage: python -m property_scraper.seen_index <index.db> <listings.json|jsonl> [...]
+    if len(sys.argv) < 3:
+        print("Usage: python -m property_scraper.seen_index <index.db> <listings.json|jsonl> [...]")
+        sys.exit(1)
+    seen = SeenListingIndex(sys.argv[1])
+    added = seed_from_files(seen, sys.argv[2:])
+    print(f"Seeded {added} listings. Index now holds {len(seen)} IDs.")
+    seen.close()
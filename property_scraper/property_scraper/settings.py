@@ -19,32 +19,139 @@ NEWSPIDER_MODULE = "property_scraper.spiders"
 USER_AGENT = os.getenv("SCRAPER_USER_AGENT", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
 
 ROBOTSTXT_OBEY = True
-CONCURRENT_REQUESTS = 1 # Send one request at a time
-DOWNLOAD_DELAY = 3 # Wait 3 seconds between requests
+# Number of pooled browser contexts rendering detail pages in parallel
+PLAYWRIGHT_POOL_SIZE = int(os.getenv("PLAYWRIGHT_POOL_SIZE", 4))
 RETRY_TIMES = 5
 
-# AutoThrottle automatically adjusts scraping speed to be respectful to servers
-AUTOTHROTTLE_ENABLED = True
+# Speed is set per domain by AdaptiveThrottle (extensions.py) from observed
+# latency incl. render time, errors, 403/429s and soft blocks, replacing the
+# fixed delay + AutoThrottle. It starts cautious and works up to the ceilings.
+ADAPTIVE_THROTTLE_ENABLED = os.getenv("ADAPTIVE_THROTTLE_ENABLED", "True").lower() == "true"
+ADAPTIVE_THROTTLE_START_DELAY = 3.0
+ADAPTIVE_THROTTLE_MIN_DELAY = float(os.getenv("ADAPTIVE_THROTTLE_MIN_DELAY", 0.25))
+ADAPTIVE_THROTTLE_MAX_DELAY = 60.0
+ADAPTIVE_THROTTLE_START_CONCURRENCY = 1
+# Pool + the ordered search-page chain
+ADAPTIVE_THROTTLE_MAX_CONCURRENCY = int(os.getenv("ADAPTIVE_THROTTLE_MAX_CONCURRENCY", PLAYWRIGHT_POOL_SIZE + 1))
+ADAPTIVE_THROTTLE_WINDOW = 20  # Responses between speed-up/slow-down decisions
+ADAPTIVE_THROTTLE_LATENCY_TOLERANCE = 2.0  # x the fastest latency seen before it counts as overload
+ADAPTIVE_THROTTLE_MAX_ERROR_RATE = 0.1
+ADAPTIVE_THROTTLE_COOLDOWN = 30.0  # Seconds to hold after a back-off
+# Challenge pages, matched in the <title> so a reCAPTCHA widget on a normal page doesn't count
+ADAPTIVE_THROTTLE_BLOCK_PATTERNS = [
+    r"<title>[^<]*(captcha|attention required|access denied|just a moment)",
+]
+
+EXTENSIONS = {
+    "property_scraper.extensions.AdaptiveThrottle": 500,
+}
+
+# Starting values for each new domain slot, and the hard ceilings
+DOWNLOAD_DELAY = ADAPTIVE_THROTTLE_START_DELAY if ADAPTIVE_THROTTLE_ENABLED else 3
+CONCURRENT_REQUESTS = ADAPTIVE_THROTTLE_MAX_CONCURRENCY
+CONCURRENT_REQUESTS_PER_DOMAIN = ADAPTIVE_THROTTLE_MAX_CONCURRENCY
+
+# Stock AutoThrottle only when the adaptive one is switched off
+AUTOTHROTTLE_ENABLED = not ADAPTIVE_THROTTLE_ENABLED
 AUTOTHROTTLE_START_DELAY = 5
 AUTOTHROTTLE_MAX_DELAY = 60
-AUTOTHROTTLE_TARGET_CONCURRENCY = 1.0
+# Renders overlap, so aim for one in-flight request per pooled context
+AUTOTHROTTLE_TARGET_CONCURRENCY = float(PLAYWRIGHT_POOL_SIZE)
 
 # --- PLAYWRIGHT SETTINGS ---
-# This tells Scrapy to use Playwright for all http and https requests
+# Plain HTTP first; Playwright only for requests that ask for it, match one of
+# the URL patterns below, or come back without their meta['playwright_markers']
 DOWNLOAD_HANDLERS = {
-    "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+    "http": "property_scraper.handlers.HybridDownloadHandler",
+    "https": "property_scraper.handlers.HybridDownloadHandler",
 }
+HYBRID_PLAYWRIGHT_URL_PATTERNS = []
 
 # This specific reactor is required for Playwright to work correctly
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 
+# Context pool: each context is recycled after this many requests, and
+# requests that die with a crashed page/browser are retried on a fresh one
+PLAYWRIGHT_POOL_CONTEXT_BUDGET = int(os.getenv("PLAYWRIGHT_POOL_CONTEXT_BUDGET", 50))
+PLAYWRIGHT_POOL_CRASH_RETRIES = 2
+PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 2
+
+DOWNLOADER_MIDDLEWARES = {
+    "property_scraper.middlewares.PropertyScraperDownloaderMiddleware": 50,
+    # Sits close to the download handler so crash retries run before RetryMiddleware
+    "property_scraper.middlewares.PlaywrightContextPoolMiddleware": 600,
+    "property_scraper.middlewares.SnapshotMiddleware": 580,
+}
+
+# Renders skip images, fonts, video and ad/analytics scripts (route_filter.py).
+# ROUTE_FILTER_ALLOW keeps what a platform's pages need to render or pass a
+# challenge; allow patterns win over both block lists.
+ROUTE_FILTER_ENABLED = os.getenv("ROUTE_FILTER_ENABLED", "True").lower() == "true"
+ROUTE_FILTER_BLOCK_TYPES = ["image", "media", "font", "texttrack", "manifest"]
+ROUTE_FILTER_BLOCK_PATTERNS = [
+    r"google-analytics\.com", r"googletagmanager\.com", r"doubleclick\.net", r"googlesyndication\.com",
+    r"googleadservices\.com", r"adservice\.google\.", r"connect\.facebook\.net", r"facebook\.com/tr",
+    r"analytics\.tiktok\.com", r"hotjar\.com", r"clarity\.ms", r"criteo\.(com|net)", r"taboola\.com",
+    r"outbrain\.com", r"cdn\.segment\.com", r"mixpanel\.com", r"amplitude\.com", r"nr-data\.net",
+]
+ROUTE_FILTER_ALLOW = {
+    os.getenv("PLATFORM_A_DOMAIN", "platform-a.com"): [r"/recaptcha/", r"challenges\.cloudflare\.com"],
+    os.getenv("PLATFORM_B_DOMAIN", "platform-b.com"): [r"/recaptcha/", r"challenges\.cloudflare\.com"],
+}
+# Rough transfer size of one blocked request, for the bytes_saved_estimate stat
+ROUTE_FILTER_TYPICAL_BYTES = {
+    "image": 80_000, "media": 500_000, "font": 40_000, "script": 60_000,
+    "texttrack": 5_000, "manifest": 2_000, "other": 5_000,
+}
+
 # Debugging: Launch headful browser (useful for dev, can be toggled via env in production)
 PLAYWRIGHT_LAUNCH_OPTIONS = {
     "headless": os.getenv("HEADLESS_MODE", "False").lower() == "true"
 }
 
+# --- INCREMENTAL RE-CRAWLS ---
+# Detail pages of listings captured within the freshness window are skipped.
+# The index file can be shared by several crawl processes at once.
+# Off by default: such a crawl only emits new or stale listings, and the
+# spiders' feeds overwrite their file, so it would replace the full export
+# with that subset. Enable it together with an appending or per-run feed,
+# e.g. -s SEEN_INDEX_ENABLED=True -s 'FEEDS={"new_listings.jsonl": {"format": "jsonlines"}}'.
+SEEN_INDEX_ENABLED = os.getenv("SEEN_INDEX_ENABLED", "False").lower() == "true"
+SEEN_INDEX_PATH = os.getenv("SEEN_INDEX_PATH", "seen_listings.db")
+SEEN_INDEX_FRESHNESS_HOURS = float(os.getenv("SEEN_INDEX_FRESHNESS_HOURS", 24 * 7))
+
+SPIDER_MIDDLEWARES = {
+    "property_scraper.middlewares.SeenListingMiddleware": 543,
+    "property_scraper.middlewares.PropertyScraperSpiderMiddleware": 950,
+}
+
+# --- CRAWL METRICS ---
+# Per-request timings (queue wait, download, render, parse), sizes, retries and
+# yields, as percentile histograms per spider and page type. A JSON report goes
+# to METRICS_REPORT_DIR at close; set METRICS_LIVE_PATH for a live text file.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+METRICS_REPORT_DIR = os.getenv("METRICS_REPORT_DIR", "metrics")
+METRICS_LIVE_PATH = os.getenv("METRICS_LIVE_PATH")
+METRICS_LIVE_INTERVAL = 10
+
+# --- RAW SNAPSHOTS ---
+# Every fetched page body is archived (deduplicated, gzip) so fields can be
+# re-extracted offline with `python reparse.py <spider>` after a selector change.
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "True").lower() == "true"
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+
+# --- COLUMNAR OUTPUT ---
+# Besides the JSONL feeds, items are written as typed, zstd-compressed Parquet
+# shards to COLUMNAR_EXPORT_DIR/<spider name>/ (read them with columnar.read_listings).
+COLUMNAR_EXPORT_ENABLED = os.getenv("COLUMNAR_EXPORT_ENABLED", "True").lower() == "true"
+COLUMNAR_EXPORT_DIR = os.getenv("COLUMNAR_EXPORT_DIR", "columnar")
+COLUMNAR_FLUSH_ITEMS = int(os.getenv("COLUMNAR_FLUSH_ITEMS", 500))
+COLUMNAR_FLUSH_SECONDS = float(os.getenv("COLUMNAR_FLUSH_SECONDS", 60))
+COLUMNAR_COMPRESSION = "zstd"
+
+ITEM_PIPELINES = {
+    "property_scraper.pipelines.ColumnarExportPipeline": 300,
+}
+
 # --- DEFAULT SCRAPY SETTINGS ---
-# COOKIES_ENABLED = False
-# DOWNLOADER_MIDDLEWARES = ...
-# ITEM_PIPELINES = ...
\ No newline at end of file
+# COOKIES_ENABLED = False
\ No newline at end of file
@@ -0,0 +1,109 @@
+# property_scraper/snapshots.py
+#
+# Content-addressed archive of fetched page bodies, so fields can be
+# re-extracted offline (see reparse.py) after a selector changes instead of
+# re-crawling. Bodies are stored once per SHA-256 as gzip files under
+# blobs/; an SQLite index maps (spider, url, fetch time) to the body hash.
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+
+class SnapshotStore:
+    """
+    Layout of `root`:
+        index.db                  snapshots(spider, url, fetched_at, body_hash, ...)
+        blobs/ab/abcdef....gz     one gzip file per distinct body
+
+    Identical bodies (the same page fetched twice, or mirrors of one listing)
+    share a blob. Like SeenListingIndex, the index runs in WAL mode so several
+    crawl processes can write to one store; index rows are buffered and
+    written every `commit_every` puts in one short transaction.
+    """
+
+    def __init__(self, root, commit_every=100, compresslevel=6):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.commit_every = commit_every
+        self.compresslevel = compresslevel
+        self.pending = []
+        self.conn = sqlite3.connect(self.root / "index.db", timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            "spider TEXT NOT NULL, url TEXT NOT NULL, fetched_at REAL NOT NULL, "
+            "body_hash TEXT NOT NULL, status INTEGER, encoding TEXT, callback TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS snapshots_spider_url ON snapshots (spider, url)")
+
+    def blob_path(self, body_hash):
+        return self.blob_dir / body_hash[:2] / f"{body_hash}.gz"
+
+    def put(self, spider, url, body, status=200, encoding=None, callback=None, fetched_at=None):
+        """Archives one response body. Returns (body_hash, stored) where stored is False for a duplicate body."""
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self.blob_path(body_hash)
+        stored = not path.exists()
+        if stored:
+            path.parent.mkdir(exist_ok=True)
+            # Write under a temp name and rename, so a concurrent writer or a crash never leaves a torn blob
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(gzip.compress(body, compresslevel=self.compresslevel, mtime=0))
+            os.replace(tmp_path, path)
+
+        self.pending.append(
+            (spider, url, time.time() if fetched_at is None else fetched_at, body_hash, status, encoding, callback)
+        )
+        if len(self.pending) >= self.commit_every:
+            self.commit()
+        return body_hash, stored
+
+    def get_body(self, body_hash):
+        with open(self.blob_path(body_hash), "rb") as f:
+            return gzip.decompress(f.read())
+
+    def snapshots(self, spider, callback=None, latest_only=True):
+        """
+        Rows (url, fetched_at, body_hash, encoding, callback) for a spider,
+        only the newest fetch of each URL unless latest_only is False.
+        """
+        query = "SELECT url, fetched_at, body_hash, encoding, callback FROM snapshots WHERE spider = ?"
+        params = [spider]
+        if callback:
+            query += " AND callback = ?"
+            params.append(callback)
+        if latest_only:
+            query = (
+                f"SELECT s.url, s.fetched_at, s.body_hash, s.encoding, s.callback FROM ({query}) s "
+                "JOIN (SELECT url, MAX(fetched_at) AS fetched_at FROM snapshots WHERE spider = ? GROUP BY url) m "
+                "ON s.url = m.url AND s.fetched_at = m.fetched_at"
+            )
+            params.append(spider)
+        return self.conn.execute(query + " ORDER BY 1, 2", params).fetchall()
+
+    def commit(self):
+        """Writes the buffered index rows in one transaction, opened and committed here."""
+        if not self.pending:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "INSERT INTO snapshots (spider, url, fetched_at, body_hash, status, encoding, callback) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self.pending,
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.pending = []
+
+    def close(self):
+        self.commit()
+        self.conn.close()
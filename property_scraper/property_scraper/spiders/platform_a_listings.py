@@ -2,22 +2,13 @@ import scrapy
 import json
 import os
 import datetime
-import re
 from ..items import PropertyScraperItem
+from ..normalize import parse_price
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Helper function to parse price strings from HTML
-def parse_price_from_html(s):
-    if s and (value := re.search(r"[\d\.,]+", s)):
-        price_val = float(value.group(0).replace(".", "").replace(",", "."))
-        if "miliar" in s.lower():
-            return price_val * 1_000_000_000
-        elif "juta" in s.lower():
-            return price_val * 1_000_000
-    return None
-
+PLATFORM_A_BASE_URL = os.getenv("PLATFORM_A_BASE_URL", "https://www.platform-a.com/sale/houses/")
 
 class PlatformAListingsSpider(scrapy.Spider):
     name = "platform_a_listings"  # Sanitized Name
@@ -29,17 +20,28 @@ class PlatformAListingsSpider(scrapy.Spider):
     # Load domains/URLs from environment or use placeholders
     allowed_domains = [os.getenv("PLATFORM_A_DOMAIN", "platform-a.com")]
     
-    # Generate generic start URLs
-    base_url = os.getenv("PLATFORM_A_BASE_URL", "https://www.platform-a.com/sale/houses/")
-    start_urls = [
-       f"{base_url}?page={x}" for x in range(1, 500) # Set for a larger data collection run
-    ]
+    base_url = PLATFORM_A_BASE_URL
+
+    # Markers the plain HTTP response must contain; otherwise the page is re-fetched with Playwright
+    SEARCH_MARKERS = ['property-card']
+    DETAIL_MARKERS = ['application/ld+json', 'Product']
+
+    def __init__(self, *args, **kwargs):
+        """Initializes spider with start and end page arguments (default: pages 1-499)."""
+        super(PlatformAListingsSpider, self).__init__(*args, **kwargs)
+        self.start_page = int(kwargs.get('start_page', 1))
+        self.end_page = int(kwargs.get('end_page', 499))  # Set for a larger data collection run
+
+    def start_requests(self):
+        for page in range(self.start_page, self.end_page + 1):
+            yield scrapy.Request(f"{self.base_url}?page={page}", callback=self.parse,
+                                 meta={'playwright_markers': self.SEARCH_MARKERS})
 
     def parse(self, response):
         # Generic Selector for property cards
         property_links = response.xpath('//div[contains(@class, "property-card")]//a[@title]/@href').getall()
         for link in property_links:
-            yield response.follow(link, callback=self.parse_property)
+            yield response.follow(link, callback=self.parse_property, meta={'playwright_markers': self.DETAIL_MARKERS})
 
     def parse_property(self, response):
         item = PropertyScraperItem()
@@ -86,7 +88,7 @@ class PlatformAListingsSpider(scrapy.Spider):
         for selector in selectors:
             price_text = response.css(selector).get()
             if price_text:
-                return parse_price_from_html(price_text)
+                return parse_price(price_text)
         return None
 
     def extract_address_from_html(self, response):
@@ -0,0 +1,168 @@
+import asyncio
+import datetime
+import json
+import os
+from pathlib import Path
+from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
+
+import scrapy
+from scrapy.utils.defer import maybe_deferred_to_future
+from dotenv import load_dotenv
+
+from ..auth import TokenCache, capture_token_headless
+from ..items import PropertyScraperItem
+from ..normalize import parse_size_sqm
+from ..route_filter import RouteFilter
+
+load_dotenv()
+
+# Where each item field lives in a listing of the JSON search response.
+# Dotted paths are tried in order; adjust them if the API shape changes.
+API_FIELD_MAP = {
+    'id': ['slug', 'id'],
+    'url': ['url', 'permalink'],
+    'price': ['price.value', 'price'],
+    'address': ['location.address', 'address'],
+    'address_locality': ['location.district', 'location.city'],
+    'latitude': ['location.latitude', 'location.lat'],
+    'longitude': ['location.longitude', 'location.lng'],
+    'description': ['description'],
+    'bedrooms': ['attributes.bedrooms', 'bedrooms'],
+    'bathrooms': ['attributes.bathrooms', 'bathrooms'],
+    'land_size_sqm': ['attributes.land_size', 'land_size'],
+    'building_size_sqm': ['attributes.building_size', 'building_size'],
+    'specs': ['attributes', 'specs'],
+}
+LISTINGS_PATHS = ['data', 'listings', 'results']
+TOTAL_PAGES_PATHS = ['meta.total_pages', 'pagination.total_pages', 'total_pages']
+
+
+def lookup(data, paths):
+    """Returns the value at the first dotted path that exists in `data`."""
+    for path in paths:
+        value = data
+        for key in path.split('.'):
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            return value
+    return None
+
+
+class PlatformBApiSpider(scrapy.Spider):
+    """
+    Crawls Platform B through the JSON search API the site itself calls
+    (see diagnose_network.py), over plain HTTP with a cached bearer token.
+
+    The token comes from PLATFORM_B_TOKEN_URL when set (e.g. the local
+    stand-in from api_standin.py), otherwise it is captured headlessly from
+    TARGET_PLATFORM_B_URL like get_token.py does. A 401 triggers one refresh.
+
+    Arguments: start_page, end_page, and record_dir to save every raw search
+    response as search_page_<n>.json for offline replay.
+    """
+    name = "platform_b_api"
+    allowed_domains = [os.getenv("PLATFORM_B_DOMAIN", "platform-b.com")]
+    handle_httpstatus_list = [401]
+
+    custom_settings = {
+        'FEEDS': {
+            'platform_b_properties.jsonl': {'format': 'jsonlines', 'overwrite': True}
+        }
+    }
+
+    MAX_TOKEN_REFRESHES = 2
+
+    def __init__(self, *args, **kwargs):
+        super(PlatformBApiSpider, self).__init__(*args, **kwargs)
+        self.start_page = int(kwargs.get('start_page', 1))
+        self.end_page = int(kwargs.get('end_page', 9999))
+        self.record_dir = kwargs.get('record_dir')
+        self.api_url = os.getenv("PLATFORM_B_API_URL", "https://www.platform-b.com/api/search?city=bandung")
+        self.token_url = os.getenv("PLATFORM_B_TOKEN_URL")
+        self.token_page_url = os.getenv("TARGET_PLATFORM_B_URL", "https://www.platform-b.com/listings")
+        self.token_cache = TokenCache(os.getenv("PLATFORM_B_TOKEN_CACHE", ".platform_b_token.json"))
+        self.token = self.token_cache.load()
+        self.token_lock = asyncio.Lock()
+
+    def start_requests(self):
+        # With no cached token the first request comes back 401 and triggers the refresh
+        yield self.search_request(self.start_page)
+
+    def search_request(self, page, refreshes=0):
+        parts = urlparse(self.api_url)
+        query = parse_qs(parts.query)
+        query['page'] = [str(page)]
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        return scrapy.Request(
+            urlunparse(parts._replace(query=urlencode(query, doseq=True))),
+            headers=headers,
+            callback=self.parse_search,
+            meta={'page': page, 'token_refreshes': refreshes},
+            dont_filter=True
+        )
+
+    async def parse_search(self, response):
+        page = response.meta['page']
+
+        if response.status == 401:
+            refreshes = response.meta['token_refreshes']
+            if refreshes >= self.MAX_TOKEN_REFRESHES:
+                self.logger.error(f"Still unauthorized on page {page} after {refreshes} token refreshes. Stopping.")
+                return
+            await self.refresh_token(stale_token=response.request.headers.get('Authorization'))
+            yield self.search_request(page, refreshes + 1)
+            return
+
+        if self.record_dir:
+            Path(self.record_dir).mkdir(parents=True, exist_ok=True)
+            (Path(self.record_dir) / f"search_page_{page}.json").write_bytes(response.body)
+
+        data = json.loads(response.text)
+        listings = lookup(data, LISTINGS_PATHS) or []
+        self.logger.info(f"API page {page}: {len(listings)} listings.")
+        for listing in listings:
+            yield self.listing_to_item(listing, response)
+
+        total_pages = lookup(data, TOTAL_PAGES_PATHS)
+        if not listings or page >= self.end_page or (total_pages and page >= int(total_pages)):
+            self.logger.info(f"Stopping pagination at page {page}.")
+            return
+        yield self.search_request(page + 1)
+
+    def listing_to_item(self, listing, response):
+        """Maps one API listing onto the same fields PlatformBListingsSpider produces."""
+        item = PropertyScraperItem()
+        for field, paths in API_FIELD_MAP.items():
+            item[field] = lookup(listing, paths)
+
+        item['url'] = response.urljoin(item['url']) if item['url'] else None
+        if not item['id'] and item['url']:
+            item['id'] = os.path.basename(os.path.normpath(item['url']))
+        for field in ('land_size_sqm', 'building_size_sqm'):
+            if isinstance(item[field], str):
+                item[field] = parse_size_sqm(item[field])
+        item['specs'] = item['specs'] if isinstance(item['specs'], dict) else {}
+        item['scraped_at'] = datetime.datetime.now().isoformat()
+        return item
+
+    async def refresh_token(self, stale_token=None):
+        """Fetches a new token once, even if several requests hit 401 at the same time."""
+        async with self.token_lock:
+            if self.token and stale_token != f"Bearer {self.token}".encode():
+                return  # Another request already refreshed it
+            self.token_cache.clear()
+            if self.token_url:
+                token_response = await maybe_deferred_to_future(
+                    self.crawler.engine.download(scrapy.Request(self.token_url, dont_filter=True))
+                )
+                token_data = json.loads(token_response.text)
+            else:
+                self.logger.info(f"Capturing a new API token from {self.token_page_url} with a headless browser...")
+                route_filter = RouteFilter.from_crawler(self.crawler) if self.settings.getbool("ROUTE_FILTER_ENABLED") else None
+                token_data = await capture_token_headless(self.token_page_url, route_filter=route_filter)
+            self.token = self.token_cache.save(token_data)
+            self.logger.info("API token refreshed.")
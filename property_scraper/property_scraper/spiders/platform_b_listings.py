@@ -3,21 +3,14 @@ import json
 import os
 import datetime
 import re
+from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
 from ..items import PropertyScraperItem
+from ..normalize import parse_price, parse_size_sqm, parse_count, extract_specs
 from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Helper functions (unchanged)
-def parse_full_price(s):
-    if s: numbers = re.findall(r"\d+", s); return int("".join(numbers)) if numbers else None
-    return None
-
-def parse_size_sqm(s):
-    if s and isinstance(s, str): numbers = re.findall(r"\d+", s); return int(numbers[0]) if numbers else None
-    return None
-
 class PlatformBListingsSpider(scrapy.Spider):
     name = "platform_b_listings" # Sanitized name
     # Allowed domain from env or generic placeholder
@@ -35,19 +28,57 @@ class PlatformBListingsSpider(scrapy.Spider):
         super(PlatformBListingsSpider, self).__init__(*args, **kwargs)
         self.start_page = int(kwargs.get('start_page', 1))
         self.end_page = int(kwargs.get('end_page', 9999)) 
+        # Sanitized: Load base URL from env
+        self.search_url = os.getenv("PLATFORM_B_SEARCH_URL", "https://www.platform-b.com/sale/houses/bandung")
+
+    def page_url(self, page):
+        """Builds the search URL for a page number directly (the same 'page' param parse() reads)."""
+        parts = urlparse(self.search_url)
+        query = parse_qs(parts.query)
+        query['page'] = [str(page)]
+        return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
 
     def start_requests(self):
+        """Seeks straight to start_page, falling back to clicking through from page 1."""
+        if self.start_page > 1:
+            self.logger.info(f"Spider starting. Seeking directly to page {self.start_page}, will scrape until page {self.end_page}.")
+            yield scrapy.Request(
+                self.page_url(self.start_page),
+                meta={'playwright': True, 'playwright_context': 'search', 'seek_page': self.start_page},
+                callback=self.verify_seek,
+                errback=self.seek_failed,
+                priority=10
+            )
+        else:
+            yield from self.click_through_requests()
+
+    def click_through_requests(self):
         """Starts the process by going to page 1 to navigate from there."""
-        # Sanitized: Load base URL from env
-        start_url = os.getenv("PLATFORM_B_SEARCH_URL", "https://www.platform-b.com/sale/houses/bandung")
-        
-        self.logger.info(f"Spider starting. Will navigate to page {self.start_page} then scrape until page {self.end_page}.")
+        self.logger.info(f"Will navigate to page {self.start_page} then scrape until page {self.end_page}.")
         yield scrapy.Request(
-            start_url,
-            meta={'playwright': True, 'current_page': 1},
-            callback=self.navigate_to_start
+            self.search_url,
+            meta={'playwright': True, 'playwright_context': 'search', 'current_page': 1},
+            callback=self.navigate_to_start,
+            dont_filter=True,
+            priority=10
         )
 
+    def verify_seek(self, response):
+        """Checks that direct addressing actually landed on the wanted page with listings."""
+        wanted = response.meta['seek_page']
+        page_match = re.search(r'page=(\d+)', response.url)
+        landed = int(page_match.group(1)) if page_match else 1
+        if landed == wanted and response.xpath('//h2/parent::a/@href').get():
+            self.logger.info(f"Seek to page {wanted} succeeded. Beginning scrape.")
+            yield from self.parse(response)
+        else:
+            self.logger.warning(f"Seek to page {wanted} landed on page {landed} without listings. Falling back to click-through.")
+            yield from self.click_through_requests()
+
+    def seek_failed(self, failure):
+        self.logger.warning(f"Seek to page {self.start_page} failed ({failure.value!r}). Falling back to click-through.")
+        yield from self.click_through_requests()
+
     def navigate_to_start(self, response):
         """Navigates to the self.start_page before scraping begins."""
         current_page = response.meta['current_page']
@@ -58,8 +89,9 @@ class PlatformBListingsSpider(scrapy.Spider):
             if next_page_url:
                 yield scrapy.Request(
                     response.urljoin(next_page_url),
-                    meta={'playwright': True, 'current_page': current_page + 1},
-                    callback=self.navigate_to_start
+                    meta={'playwright': True, 'playwright_context': 'search', 'current_page': current_page + 1},
+                    callback=self.navigate_to_start,
+                    priority=10
                 )
             else:
                 self.logger.warning(f"No 'Next' button on page {current_page}. Starting scrape from here.")
@@ -78,6 +110,7 @@ class PlatformBListingsSpider(scrapy.Spider):
         self.logger.info(f"Scraping links from search page: {current_page}")
         
         # Extract property links (Generic Selector)
+        # Detail pages go to the pooled contexts and render in parallel
         property_links = response.xpath('//h2/parent::a/@href').getall()
         for link in property_links:
             if "/projects/" in link: continue
@@ -96,10 +129,13 @@ class PlatformBListingsSpider(scrapy.Spider):
         next_page_url = response.css('a.pagination-next::attr(href)').get()
         if next_page_url:
             self.logger.info(f"Found next page. Following to page {current_page + 1}.")
+            # Search pages stay on their own context and chain one after another,
+            # so pagination is ordered; the priority keeps it ahead of detail pages
             yield scrapy.Request(
                 response.urljoin(next_page_url), 
                 callback=self.parse, 
-                meta={'playwright': True}
+                meta={'playwright': True, 'playwright_context': 'search'},
+                priority=10
             )
         else:
             self.logger.info("No more pages to scrape. Finishing.")
@@ -113,8 +149,8 @@ class PlatformBListingsSpider(scrapy.Spider):
         item['description'] = self.extract_description(response)
         item['url'] = response.url
         item['scraped_at'] = datetime.datetime.now().isoformat()
-        item['bedrooms'] = all_specs.get('Kamar Tidur')
-        item['bathrooms'] = all_specs.get('Kamar Mandi')
+        item['bedrooms'] = parse_count(all_specs.get('Kamar Tidur'))
+        item['bathrooms'] = parse_count(all_specs.get('Kamar Mandi'))
         item['land_size_sqm'] = parse_size_sqm(all_specs.get('Luas Tanah'))
         item['building_size_sqm'] = parse_size_sqm(all_specs.get('Luas Bangunan'))
         item['specs'] = all_specs
@@ -123,24 +159,14 @@ class PlatformBListingsSpider(scrapy.Spider):
     def extract_price(self, response):
         # Generic Price Selector
         price_text = response.css('div.price-tag strong::text').get()
-        return parse_full_price(price_text)
+        return parse_price(price_text)
 
     def extract_address(self, response):
         return response.css('address.location-address::text').get()
 
     def extract_specs(self, response):
-        specs = {}
         # Generic Spec Extraction Logic
-        for spec_item in response.css('div.listing-overview > div'):
-            parts = [part.strip() for part in spec_item.css('::text').getall() if part.strip()]
-            if len(parts) == 2: value, key = parts; specs[key] = value
-            
-        for row in response.css("div.listing-details table tr"):
-            keys = row.css('td.table-header p::text').getall()
-            values = row.css('td.table-value p::text').getall()
-            if len(keys) == len(values):
-                for i in range(len(keys)): specs[keys[i].strip()] = values[i].strip()
-        return specs
+        return extract_specs(response)
     
     def extract_description(self, response):
         desc_parts = response.css('div.listing-description ::text').getall()
@@ -1,22 +1,135 @@
+import argparse
+import json
+import multiprocessing
+import os
 import sys
 from scrapy.crawler import CrawlerProcess
 from scrapy.utils.project import get_project_settings
 
-# Check if a spider name was provided from the command line
-if len(sys.argv) < 2:
-    print("Error: You must provide a spider name to run.")
-    print("Usage: python run.py <spider_name>")
-    # Example: python run.py rumah123_listings
-    sys.exit(1)
 
-# Get the spider name from the first command-line argument
-spider_name = sys.argv[1]
+def parse_pairs(pairs):
+    """Turns ['key=value', ...] (from -a / -s) into a dict."""
+    result = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        result[key] = value
+    return result
 
-# --- The rest of the logic is the same ---
-settings = get_project_settings()
-process = CrawlerProcess(settings)
 
-process.crawl(spider_name)
+def run_crawl(spider_name, spider_args=None, setting_overrides=None):
+    settings = get_project_settings()
+    for key, value in (setting_overrides or {}).items():
+        settings.set(key, value, priority="cmdline")
+    process = CrawlerProcess(settings)
 
-# Use our bypass for the signal handling issue
-process.start(install_signal_handlers=False)
\ No newline at end of file
+    process.crawl(spider_name, **(spider_args or {}))
+
+    # Use our bypass for the signal handling issue
+    process.start(install_signal_handlers=False)
+
+
+def split_pages(start_page, end_page, shards):
+    """Splits start_page..end_page (inclusive) into up to `shards` contiguous ranges."""
+    total = end_page - start_page + 1
+    shards = max(1, min(shards, total))
+    size, extra = divmod(total, shards)
+    ranges, page = [], start_page
+    for i in range(shards):
+        last = page + size - 1 + (1 if i < extra else 0)
+        ranges.append((page, last))
+        page = last + 1
+    return ranges
+
+
+def merge_jsonl(paths, output_path):
+    """Concatenates shard outputs into one JSONL file, dropping repeated listing IDs (items without one are kept)."""
+    seen, written = set(), 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for path in paths:
+            if not os.path.exists(path):
+                print(f"⚠️ Shard output {path} is missing, skipping it.")
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        item_id = json.loads(line).get("id")
+                    except json.JSONDecodeError:
+                        continue
+                    if item_id:
+                        if item_id in seen:
+                            continue
+                        seen.add(item_id)
+                    out.write(line if line.endswith("\n") else line + "\n")
+                    written += 1
+    return written
+
+
+def run_sharded(spider_name, start_page, end_page, shards, output_path, spider_args=None, setting_overrides=None):
+    """Runs one crawl process per page range, then merges their JSONL outputs."""
+    shard_dir = "shards"
+    os.makedirs(shard_dir, exist_ok=True)
+
+    # Each shard needs its own process: the Twisted reactor cannot be restarted
+    ctx = multiprocessing.get_context("spawn")
+    workers, shard_paths = [], []
+    for i, (first, last) in enumerate(split_pages(start_page, end_page, shards)):
+        shard_path = os.path.join(shard_dir, f"{spider_name}_shard_{i}.jsonl")
+        shard_paths.append(shard_path)
+        args = {**(spider_args or {}), "start_page": first, "end_page": last}
+        overrides = {
+            **(setting_overrides or {}),
+            "FEEDS": {shard_path: {"format": "jsonlines", "overwrite": True}},
+            "LOG_FILE": os.path.join(shard_dir, f"{spider_name}_shard_{i}.log"),
+        }
+        print(f"Shard {i}: pages {first}-{last} -> {shard_path}")
+        worker = ctx.Process(target=run_crawl, args=(spider_name, args, overrides))
+        worker.start()
+        workers.append(worker)
+
+    failed = 0
+    for i, worker in enumerate(workers):
+        worker.join()
+        if worker.exitcode != 0:
+            failed += 1
+            print(f"❌ Shard {i} exited with code {worker.exitcode}.")
+
+    written = merge_jsonl(shard_paths, output_path)
+    print(f"✅ Merged {written} listings from {len(shard_paths)} shards into '{output_path}'.")
+    return 1 if failed else 0
+
+
+def default_output(spider_name):
+    """The spider's own feed file, so a sharded run writes where a normal run would."""
+    from scrapy.spiderloader import SpiderLoader
+    spider_cls = SpiderLoader.from_settings(get_project_settings()).load(spider_name)
+    feeds = (getattr(spider_cls, "custom_settings", None) or {}).get("FEEDS", {})
+    return next(iter(feeds), f"{spider_name}.jsonl")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a spider, optionally split over parallel page-range shards.",
+        epilog="Example: python run.py platform_b_listings --shards 4 --start-page 1 --end-page 400",
+    )
+    parser.add_argument("spider_name", help="e.g. platform_a_listings or platform_b_listings")
+    parser.add_argument("-a", dest="spider_args", action="append", default=[], metavar="NAME=VALUE",
+                        help="spider argument (may be repeated)")
+    parser.add_argument("-s", dest="settings", action="append", default=[], metavar="NAME=VALUE",
+                        help="setting override (may be repeated)")
+    parser.add_argument("--shards", type=int, default=1, help="number of parallel crawl processes")
+    parser.add_argument("--start-page", type=int, default=1)
+    parser.add_argument("--end-page", type=int, help="required with --shards")
+    parser.add_argument("--output", help="merged JSONL output (default: the spider's own feed file)")
+    args = parser.parse_args()
+
+    spider_args = parse_pairs(args.spider_args)
+    overrides = parse_pairs(args.settings)
+
+    if args.shards > 1:
+        if args.end_page is None:
+            parser.error("--end-page is required with --shards")
+        output = args.output or default_output(args.spider_name)
+        sys.exit(run_sharded(args.spider_name, args.start_page, args.end_page, args.shards, output,
+                             spider_args, overrides))
+
+    run_crawl(args.spider_name, spider_args, overrides)
@@ -1,58 +1,79 @@
+import asyncio
 import json
 import re
-import datetime
 import os
 from urllib.parse import urljoin
 from parsel import Selector
-from playwright.sync_api import sync_playwright, TimeoutError
+from playwright.async_api import async_playwright, TimeoutError
 from dotenv import load_dotenv
+from scrapy.utils.project import get_project_settings
+from property_scraper.extraction import extract_detail
+from property_scraper.route_filter import RouteFilter
 
 # Load environment variables for paths and keys
 load_dotenv()
 
 # --- Helper Functions (Generic) ---
-def parse_full_price(s):
-    if s: numbers = re.findall(r"\d+", s); return int("".join(numbers)) if numbers else None
-    return None
-
-def parse_size_sqm(s):
-    if s and isinstance(s, str): numbers = re.findall(r"\d+", s); return int(numbers[0]) if numbers else None
-    return None
-    
-def extract_specs(selector):
+def parse_listing(html, url):
     """
-    Generic function to extract key-value specs from a listing page.
+    Builds the item for one listing page, on the fastest installed HTML
+    backend (see property_scraper.html_backends; override with HTML_BACKEND).
     Selectors should be adjusted based on the target site structure.
     """
-    specs = {}
-    # Example logic for 'Platform A' structure
-    for spec_item in selector.css('div.generic-listing-overview > div'):
-        parts = [part.strip() for part in spec_item.css('::text').getall() if part.strip()]
-        if len(parts) == 2: value, key = parts; specs[key] = value
-    
-    for row in selector.css("div.generic-detail-table table tr"):
-        keys = row.css('td.header p::text').getall()
-        values = row.css('td.description p::text').getall()
-        if len(keys) == len(values):
-            for i in range(len(keys)): specs[keys[i].strip()] = values[i].strip()
-    return specs
+    return extract_detail(html, url)
+
+async def scrape_listings(tabs, urls, filename):
+    """
+    Fans the listing URLs out over the background tabs, one URL per free tab,
+    and appends each item to `filename` as soon as its tab finishes, so an
+    interruption loses only the listings still loading: up to one per tab,
+    i.e. up to len(tabs) items. Returns the item count.
+    """
+    queue = asyncio.Queue()
+    for position, url in enumerate(urls, start=1):
+        queue.put_nowait((position, url))
+    saved = 0
+
+    with open(filename, 'w', encoding='utf-8') as f:
+        async def worker(tab):
+            nonlocal saved
+            while not queue.empty():
+                position, url = queue.get_nowait()
+                print(f"   > Scraping item {position}/{len(urls)}...")
+                try:
+                    await tab.goto(url, wait_until='domcontentloaded', timeout=60000)
+                    item = parse_listing(await tab.content(), url)
+                except Exception as e:
+                    print(f"     [ERROR] Failed to scrape item {position}: {e}")
+                    continue
+                f.write(json.dumps(item) + '\n')
+                f.flush()
+                saved += 1
+
+        await asyncio.gather(*(worker(tab) for tab in tabs))
+    return saved
 
 # --- Main Scraping Script ---
 def run_manual_scraper():
+    asyncio.run(_run_manual_scraper())
+
+async def _run_manual_scraper():
     # --- PATHS LOADED FROM ENV (Privacy Protection) ---
     # executable_path and user_data_dir should be set in your .env file
     executable_path = os.getenv("CHROME_EXECUTABLE_PATH", "default/path/to/chrome")
     user_data_dir = os.getenv("CHROME_USER_DATA_DIR", "default/path/to/profile")
+    # Background tabs that load listing pages in parallel; an interrupt can lose one in-flight item per tab
+    tab_count = max(1, int(os.getenv("MANUAL_SCRAPER_TABS", 4)))
 
     if "default/path" in user_data_dir:
         print("❌ CONFIG ERROR: Please set CHROME_USER_DATA_DIR in your .env file.")
         return
 
     print("🚨 IMPORTANT: Make sure all Chrome windows are closed before proceeding.")
-    input("   Press ENTER to launch the browser...")
+    await asyncio.to_thread(input, "   Press ENTER to launch the browser...")
 
-    with sync_playwright() as p:
-        context = p.chromium.launch_persistent_context(
+    async with async_playwright() as p:
+        context = await p.chromium.launch_persistent_context(
             user_data_dir,
             headless=False,
             channel="chrome",
@@ -62,24 +83,31 @@ def run_manual_scraper():
             geolocation={"latitude": float(os.getenv("TARGET_LAT", 0.0)), 
                          "longitude": float(os.getenv("TARGET_LON", 0.0))}
         )
-        page = context.new_page()
+        page = await context.new_page()
+        # Listing pages load here; the search tab is never navigated away from
+        tabs = [await context.new_page() for _ in range(tab_count)]
+        # Only the background tabs skip images, fonts and trackers; the search tab is yours to browse
+        route_filter = RouteFilter.from_settings(get_project_settings())
+        for tab in tabs:
+            await route_filter.install(tab)
+        await page.bring_to_front()
 
         # Load target URL from environment or use a placeholder
         start_url = os.getenv("TARGET_SCRAPE_URL", "https://www.generic-property-site.com/listings")
         print(f"Controlling your 'Scraper' Chrome profile. Navigating to: {start_url}")
         
         try:
-            page.goto(start_url, wait_until='domcontentloaded', timeout=90000)
+            await page.goto(start_url, wait_until='domcontentloaded', timeout=90000)
         except TimeoutError:
              print("Page load timed out. The site might be slow. Try running again.")
-             context.close()
+             await context.close()
              return
 
-        print("✅ Scraper profile is now running. The browser window should be fully interactive.")
+        print(f"✅ Scraper profile is now running with {tab_count} background tabs. The browser window should be fully interactive.")
         
         while True:
             print("\n--------------------------------------------------------------------")
-            choice = input(">>> Press ENTER to scrape the page (or type 'q' and ENTER to quit): ")
+            choice = await asyncio.to_thread(input, ">>> Press ENTER to scrape the page (or type 'q' and ENTER to quit): ")
 
             if choice.lower() == 'q':
                 break
@@ -89,7 +117,7 @@ def run_manual_scraper():
             print("Waiting for listing links to appear...")
             try:
                 # Generic selector for listing cards
-                page.wait_for_selector('//h2/parent::a', timeout=60000)
+                await page.wait_for_selector('//h2/parent::a', timeout=60000)
                 print("✅ Listings found. Starting scrape.")
             except TimeoutError:
                 print("❌ Timed out waiting for listings.")
@@ -101,47 +129,19 @@ def run_manual_scraper():
             filename = f"platform_a_listings_page_{current_page}.jsonl"
             
             print(f"Scraping page {current_page}...")
-            selector = Selector(text=page.content())
+            selector = Selector(text=await page.content())
             property_links = selector.xpath('//h2/parent::a/@href').getall()
             print(f"Found {len(property_links)} listings.")
-            
-            scraped_items = []
-            for i, link in enumerate(property_links):
-                if "/projects/" in link: continue # Skip ads/projects
-                full_url = urljoin(current_search_page_url, link)
-                print(f"   > Scraping item {i+1}/{len(property_links)}...")
-                try:
-                    page.goto(full_url, wait_until='domcontentloaded', timeout=60000)
-                    item_selector = Selector(text=page.content())
-                    specs = extract_specs(item_selector)
-                    
-                    # Generic Item Structure
-                    item = {
-                        'url': full_url, # Note: You might want to mask this in production
-                        'price': parse_full_price(item_selector.css('div.price-tag strong::text').get()),
-                        'address': item_selector.css('address.location-text::text').get(),
-                        'bedrooms': specs.get('Kamar Tidur'),
-                        'bathrooms': specs.get('Kamar Mandi'),
-                        'land_size_sqm': parse_size_sqm(specs.get('Luas Tanah')),
-                        'building_size_sqm': parse_size_sqm(specs.get('Luas Bangunan')),
-                        'scraped_at': datetime.datetime.now().isoformat(),
-                        'all_specs': specs
-                    }
-                    scraped_items.append(item)
-                except Exception as e:
-                    print(f"     [ERROR] Failed to scrape item: {e}")
-                finally:
-                    page.goto(current_search_page_url, wait_until='domcontentloaded') 
 
-            with open(filename, 'w', encoding='utf-8') as f:
-                for item in scraped_items:
-                    f.write(json.dumps(item) + '\n')
+            urls = [urljoin(current_search_page_url, link) for link in property_links
+                    if "/projects/" not in link] # Skip ads/projects
+            saved = await scrape_listings(tabs, urls, filename)
             
-            print(f"\n✅ Success! Saved {len(scraped_items)} listings to '{filename}'.")
+            print(f"\n✅ Success! Saved {saved} listings to '{filename}'. Page weight so far: {route_filter.summary()}.")
             print(">>> Script is paused. Click 'Next Page' in the browser.")
 
         print("Exiting. Closing browser.")
-        context.close()
+        await context.close()
 
 if __name__ == "__main__":
-    run_manual_scraper()
\ No newline at end of file
+    run_manual_scraper()